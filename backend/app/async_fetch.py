@@ -0,0 +1,72 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.database import SessionLocal
+
+# 上流（Yahoo Finance）呼び出しの同時実行数とタイムアウト（秒）
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "8"))
+FETCH_TIMEOUT = float(os.getenv("FETCH_TIMEOUT", "20"))
+
+_executor = ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS, thread_name_prefix="fetch")
+
+
+class FetchTimeoutError(Exception):
+    """上流呼び出しがタイムアウトした"""
+
+
+async def fetch(
+    func: Callable[..., Any],
+    *args,
+    timeout: Optional[float] = None,
+    **kwargs
+) -> Any:
+    """
+    ブロッキングな上流呼び出しを専用スレッドプールで実行
+
+    イベントループを止めずに待機し、timeout秒（省略時はFETCH_TIMEOUT）を
+    超えるとFetchTimeoutErrorを送出する。待機中のリクエストがキャンセル
+    された場合、未着手の呼び出しは実行されずに破棄される
+    （実行中のスレッドは完了まで動作し、結果は捨てられる）。
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+    timeout = FETCH_TIMEOUT if timeout is None else timeout
+
+    try:
+        return await asyncio.wait_for(future, timeout=timeout)
+    except asyncio.TimeoutError:
+        name = getattr(func, "__qualname__", repr(func))
+        raise FetchTimeoutError(f"{name} timed out after {timeout:.0f}s")
+
+
+def _call_with_session(func: Callable[..., Any], *args, **kwargs) -> Any:
+    db = SessionLocal()
+    try:
+        return func(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+async def fetch_with_db(
+    func: Callable[..., Any],
+    *args,
+    timeout: Optional[float] = None,
+    **kwargs
+) -> Any:
+    """
+    DBアクセスと上流呼び出しを含む処理をスレッドプールで実行
+
+    セッションはワーカースレッド内で生成・クローズするため、タイムアウト後も
+    実行中の処理がリクエスト側のセッションと競合しない。funcは第1引数にSessionを受け取る。
+    """
+    return await fetch(_call_with_session, func, *args, timeout=timeout, **kwargs)
+
+
+async def run_db(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """短時間のDB処理をイベントループ外（Starletteのスレッドプール）で実行"""
+    return await run_in_threadpool(func, *args, **kwargs)
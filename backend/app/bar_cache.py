@@ -0,0 +1,292 @@
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# キャッシュファイルの保存先
+BAR_CACHE_DIR = os.getenv("BAR_CACHE_DIR", os.path.join(".", "cache", "bars"))
+
+# ファイル形式:
+#   [ヘッダー 64バイト][date × capacity][open × capacity][high × capacity]
+#   [low × capacity][close × capacity][volume × capacity]
+# 各列は8バイト固定長で連続配置し、length件目までが有効データ
+_MAGIC = b"BARS"
+_VERSION = 1
+_HEADER_SIZE = 64
+_HEADER_DTYPE = np.dtype([
+    ('magic', 'S4'),
+    ('version', '<u4'),
+    ('capacity', '<i8'),
+    ('length', '<i8'),
+])
+_INITIAL_CAPACITY = 1024
+
+COLUMNS: List[Tuple[str, str]] = [
+    ('date', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<i8'),
+]
+
+
+class BarSeries:
+    """
+    列指向の足データ
+
+    各列はnumpy配列（memmap上のビューを含む）で保持し、スライスはコピーせずに
+    ビューを返す。IndicatorCalculatorにはDataFrameの代わりにそのまま渡せる。
+    """
+
+    def __init__(
+        self,
+        date: np.ndarray,
+        open: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray
+    ):
+        self.date = date
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def __len__(self) -> int:
+        return len(self.date)
+
+    def __getitem__(self, column: str) -> pd.Series:
+        """列をpandas Seriesとして取得（データはコピーしない）"""
+        return pd.Series(getattr(self, column), copy=False, name=column)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.date) == 0
+
+    def _slice(self, start: int, stop: Optional[int] = None) -> "BarSeries":
+        return BarSeries(*(getattr(self, name)[start:stop] for name, _ in COLUMNS))
+
+    def slice_from(self, start) -> "BarSeries":
+        """指定日以降の足をビューで取得"""
+        if start is None:
+            return self
+        index = int(np.searchsorted(self.date, np.datetime64(pd.Timestamp(start), 'ns')))
+        return self._slice(index)
+
+    def take(self, indices: np.ndarray) -> "BarSeries":
+        """指定インデックスの足を取得（コピー）"""
+        return BarSeries(*(getattr(self, name)[indices] for name, _ in COLUMNS))
+
+    def tail(self, n: int) -> "BarSeries":
+        return self._slice(max(len(self) - n, 0))
+
+    def time_strings(self) -> List[str]:
+        """日付を 'YYYY-MM-DD' 形式の文字列リストに変換"""
+        return np.datetime_as_string(self.date, unit='D').tolist()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "BarSeries":
+        """fetch_stock_data形式のDataFrameから生成"""
+        df = df.sort_values('date')
+        return cls(
+            df['date'].to_numpy(dtype='datetime64[ns]'),
+            df['open'].to_numpy(dtype='float64'),
+            df['high'].to_numpy(dtype='float64'),
+            df['low'].to_numpy(dtype='float64'),
+            df['close'].to_numpy(dtype='float64'),
+            df['volume'].fillna(0).to_numpy(dtype='int64'),
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({name: getattr(self, name) for name, _ in COLUMNS})
+
+
+class BarCache:
+    """
+    銘柄・時間軸ごとの列指向足データキャッシュ（メモリマップドファイル）
+
+    読み出しはmemmap上のビューを返すため、同一銘柄の再表示は
+    ページキャッシュの読み出しのみで済む。新しい足はファイル末尾に追記する。
+    """
+
+    _lock = threading.Lock()
+    # パス -> (memmap, inode, サイズ)
+    _maps: Dict[str, Tuple[np.memmap, int, int]] = {}
+
+    @staticmethod
+    def path(symbol: str, timeframe: str) -> str:
+        safe_symbol = re.sub(r'[^0-9A-Za-z._^=-]', '_', symbol)
+        return os.path.join(BAR_CACHE_DIR, f"{safe_symbol}_{timeframe}.bars")
+
+    @staticmethod
+    def _open(path: str) -> Optional[np.memmap]:
+        """ファイルをmemmapで開く（変更がなければ既存のマップを再利用）"""
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            BarCache._maps.pop(path, None)
+            return None
+
+        cached = BarCache._maps.get(path)
+        if cached and cached[1] == stat.st_ino and cached[2] == stat.st_size:
+            return cached[0]
+
+        buf = np.memmap(path, dtype=np.uint8, mode='r+')
+        header = buf[:_HEADER_DTYPE.itemsize].view(_HEADER_DTYPE)[0]
+        if header['magic'] != _MAGIC or header['version'] != _VERSION:
+            print(f"Invalid bar cache file: {path}")
+            return None
+
+        BarCache._maps[path] = (buf, stat.st_ino, stat.st_size)
+        return buf
+
+    @staticmethod
+    def _layout(buf: np.memmap) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """ヘッダーと各列（capacity件分）のビューを取得"""
+        header = buf[:_HEADER_DTYPE.itemsize].view(_HEADER_DTYPE)
+        capacity = int(header['capacity'][0])
+        columns = {}
+        for i, (name, dtype) in enumerate(COLUMNS):
+            offset = _HEADER_SIZE + i * capacity * 8
+            columns[name] = buf[offset:offset + capacity * 8].view(dtype)
+        return header, columns
+
+    @staticmethod
+    def read(symbol: str, timeframe: str) -> Optional[BarSeries]:
+        """キャッシュ済みの足をmemmap上のビューとして取得"""
+        buf = BarCache._open(BarCache.path(symbol, timeframe))
+        if buf is None:
+            return None
+
+        header, columns = BarCache._layout(buf)
+        length = int(header['length'][0])
+        return BarSeries(
+            columns['date'][:length].view('datetime64[ns]'),
+            columns['open'][:length],
+            columns['high'][:length],
+            columns['low'][:length],
+            columns['close'][:length],
+            columns['volume'][:length],
+        )
+
+    @staticmethod
+    def write(symbol: str, timeframe: str, bars) -> bool:
+        """
+        キャッシュファイルを作り直す（barsはBarSeriesまたはDataFrame）
+
+        Returns:
+            置き換えできなかった場合はFalse（既存のファイルは古いまま残る）
+        """
+        if isinstance(bars, pd.DataFrame):
+            bars = BarSeries.from_frame(bars)
+
+        with BarCache._lock:
+            return BarCache._write_file(BarCache.path(symbol, timeframe), bars)
+
+    @staticmethod
+    def _write_file(path: str, bars: BarSeries) -> bool:
+        length = len(bars)
+        capacity = max(_INITIAL_CAPACITY, 1 << int(length * 2 - 1).bit_length())
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        buf = np.memmap(
+            tmp_path, dtype=np.uint8, mode='w+',
+            shape=(_HEADER_SIZE + len(COLUMNS) * capacity * 8,)
+        )
+        buf[:_HEADER_DTYPE.itemsize].view(_HEADER_DTYPE)[0] = (_MAGIC, _VERSION, capacity, length)
+        header, columns = BarCache._layout(buf)
+        for name, dtype in COLUMNS:
+            values = getattr(bars, name)
+            columns[name][:length] = values.view(dtype) if name == 'date' else values
+        buf.flush()
+        # Windowsでの置き換えに備え、マップへの参照をすべて解放する
+        del buf, header, columns
+
+        BarCache._maps.pop(path, None)
+        try:
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # Windowsでは他のビューがマップ中のファイルを置き換えられない
+            print(f"Bar cache replace failed for {path}: {e}")
+            os.remove(tmp_path)
+            return False
+        return True
+
+    @staticmethod
+    def remove(symbol: str, timeframe: str) -> bool:
+        """キャッシュファイルを削除（削除できなかった場合はFalse）"""
+        path = BarCache.path(symbol, timeframe)
+        with BarCache._lock:
+            BarCache._maps.pop(path, None)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                # Windowsではマップ中のファイルを削除できない
+                print(f"Bar cache remove failed for {path}: {e}")
+                return False
+        return True
+
+    @staticmethod
+    def append(symbol: str, timeframe: str, df: pd.DataFrame) -> bool:
+        """
+        新しい足をキャッシュに追記
+
+        既存の足と日付が重なる場合はその位置から上書きする（最終足の確定値更新）。
+        キャッシュが存在しない、既存の先頭より古い足を含む、または容量不足で
+        作り直したファイルに置き換えられなかった場合はFalseを返す
+        （呼び出し側でDBの足から作り直す）。
+
+        重なる位置の上書きはマップ上で直接行うため、他のスレッドが read() で
+        受け取ったビューからは、書き込み中の足の値が一時的に新旧混在して見えることがある。
+        重なるのは同期し直した末尾の数本だけで、日付は変わらず値が確定値に
+        置き換わるだけなので、次の読み出しで整合した値になる。
+        """
+        if df is None or df.empty:
+            return True
+
+        new_bars = BarSeries.from_frame(df)
+        path = BarCache.path(symbol, timeframe)
+
+        with BarCache._lock:
+            buf = BarCache._open(path)
+            if buf is None:
+                return False
+
+            header, columns = BarCache._layout(buf)
+            length = int(header['length'][0])
+            capacity = int(header['capacity'][0])
+            dates = columns['date'][:length].view('datetime64[ns]')
+
+            position = int(np.searchsorted(dates, new_bars.date[0]))
+            if length == 0 or position == 0:
+                return False
+
+            end = position + len(new_bars)
+            if end > capacity:
+                # 容量不足: 既存部分と新しい足を結合して作り直す
+                existing = BarSeries(
+                    dates, *(columns[name][:length] for name, _ in COLUMNS[1:])
+                )._slice(0, position)
+                merged = BarSeries(*(
+                    np.concatenate([getattr(existing, name), getattr(new_bars, name)])
+                    for name, _ in COLUMNS
+                ))
+                return BarCache._write_file(path, merged)
+
+            for name, dtype in COLUMNS:
+                values = getattr(new_bars, name)
+                columns[name][position:end] = values.view(dtype) if name == 'date' else values
+            buf.flush()
+            # データを書き終えてから件数を更新する
+            header['length'][0] = end
+            buf.flush()
+            return True
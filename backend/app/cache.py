@@ -0,0 +1,284 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
+
+# プロセス内キャッシュの上限（バイト）。0で無効
+CACHE_MEMORY_MAX_BYTES = int(os.getenv("CACHE_MEMORY_MAX_BYTES", str(128 * 1024 * 1024)))
+# Redisから取得した値をプロセス内に保持する期間（秒）
+CACHE_MEMORY_REDIS_TTL = int(os.getenv("CACHE_MEMORY_REDIS_TTL", "60"))
+
+# Redis接続設定（REDIS_URL 未指定時は REDIS_HOST / REDIS_PORT から組み立てる）
+REDIS_ENABLED = os.getenv("REDIS_ENABLED", "true").lower() in ("1", "true", "yes")
+REDIS_URL = os.getenv("REDIS_URL") or (
+    f"redis://{os.getenv('REDIS_HOST', 'localhost')}:{os.getenv('REDIS_PORT', '6379')}/0"
+)
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "16"))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", "1"))
+# 接続できなかった・エラーになった後、再接続を試みるまでの間隔（秒）
+REDIS_RETRY_INTERVAL = float(os.getenv("REDIS_RETRY_INTERVAL", "30"))
+
+# 1エントリあたりのおおよその管理コスト（バイト）
+_ENTRY_OVERHEAD = 100
+
+Value = Union[bytes, str]
+
+
+class MemoryCache:
+    """
+    プロセス内のTTL付きLRUキャッシュ
+
+    値はシリアライズ済みのbytes/strで保持し、キーと値の大きさの合計が
+    max_bytes を超えると最も長く使われていないエントリから破棄する。
+    期限切れのエントリは参照時・破棄時に取り除く。
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> (値, 大きさ, 有効期限)
+        self._entries: "OrderedDict[str, Tuple[Value, int, float]]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Value]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if entry[2] <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: str, value: Value, ttl: float) -> None:
+        size = len(key) + len(value) + _ENTRY_OVERHEAD
+        if ttl <= 0 or size > self.max_bytes:
+            self.delete(key)
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + ttl)
+            self.bytes += size
+
+            now = time.monotonic()
+            while self.bytes > self.max_bytes:
+                oldest, (_, _, expires) = next(iter(self._entries.items()))
+                self._remove(oldest)
+                if expires <= now:
+                    self.expirations += 1
+                else:
+                    self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class RedisBackend:
+    """
+    Redisキャッシュ（接続プール付き）
+
+    接続できない・コマンドが失敗した場合は retry_interval 秒の間Redisを使わず、
+    その後の最初の呼び出しで再接続を試みる。失敗時は例外を送出せずにキャッシュなしとして振る舞う。
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_connections: int,
+        socket_timeout: float,
+        connect_timeout: float,
+        retry_interval: float
+    ):
+        self.url = url
+        self.max_connections = max_connections
+        self.socket_timeout = socket_timeout
+        self.connect_timeout = connect_timeout
+        self.retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._client = None
+        self._retry_at = 0.0
+        self.errors = 0
+
+    def client(self):
+        """接続済みのクライアント（利用できない場合はNone）"""
+        client = self._client
+        if client is not None or time.monotonic() < self._retry_at:
+            return client
+
+        with self._lock:
+            if self._client is not None or time.monotonic() < self._retry_at:
+                return self._client
+            try:
+                import redis
+            except ImportError:
+                self._retry_at = float("inf")
+                return None
+            try:
+                pool = redis.BlockingConnectionPool.from_url(
+                    self.url,
+                    max_connections=self.max_connections,
+                    timeout=self.connect_timeout,
+                    socket_timeout=self.socket_timeout,
+                    socket_connect_timeout=self.connect_timeout,
+                )
+                client = redis.Redis(connection_pool=pool)
+                client.ping()
+            except Exception as e:
+                self.errors += 1
+                self._retry_at = time.monotonic() + self.retry_interval
+                print(f"Redis unavailable ({e}), retrying in {self.retry_interval:.0f}s")
+                return None
+            self._client = client
+            print("Connected to Redis")
+            return client
+
+    def _fail(self, client, error: Exception) -> None:
+        """コマンド失敗時は接続を破棄し、retry_interval 後に再接続する"""
+        print(f"Redis error: {error}")
+        with self._lock:
+            self.errors += 1
+            if self._client is client:
+                self._client = None
+                self._retry_at = time.monotonic() + self.retry_interval
+                client.connection_pool.disconnect()
+
+    def get(self, key: str) -> Optional[bytes]:
+        client = self.client()
+        if client is None:
+            return None
+        try:
+            return client.get(key)
+        except Exception as e:
+            self._fail(client, e)
+            return None
+
+    def get_many(self, keys: List[str]) -> List[Optional[bytes]]:
+        """複数キーを1往復（MGET）で取得"""
+        client = self.client()
+        if client is None or not keys:
+            return [None] * len(keys)
+        try:
+            return client.mget(keys)
+        except Exception as e:
+            self._fail(client, e)
+            return [None] * len(keys)
+
+    def set(self, key: str, value: Value, ttl: int) -> None:
+        client = self.client()
+        if client is None:
+            return
+        try:
+            client.setex(key, ttl, value)
+        except Exception as e:
+            self._fail(client, e)
+
+    def set_many(self, items: Dict[str, Value], ttl: int) -> None:
+        """複数キーをパイプラインで1往復で保存（MSETは有効期限を指定できないためSETEXを束ねる）"""
+        client = self.client()
+        if client is None or not items:
+            return
+        try:
+            pipe = client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.setex(key, ttl, value)
+            pipe.execute()
+        except Exception as e:
+            self._fail(client, e)
+
+    def stats(self) -> dict:
+        return {
+            "connected": self._client is not None,
+            "errors": self.errors,
+        }
+
+
+memory_cache = MemoryCache(CACHE_MEMORY_MAX_BYTES)
+redis_backend = RedisBackend(
+    REDIS_URL,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+    connect_timeout=REDIS_CONNECT_TIMEOUT,
+    retry_interval=REDIS_RETRY_INTERVAL,
+)
+
+
+class ResponseCache:
+    """
+    レスポンスキャッシュ（プロセス内キャッシュ → Redis の2段構成）
+
+    Redisがない環境（デスクトップ版など）でもプロセス内キャッシュだけで動作する。
+    Redisから取得した値は CACHE_MEMORY_REDIS_TTL 秒だけプロセス内にも保持する。
+    """
+
+    @staticmethod
+    def get(key: str) -> Optional[Value]:
+        return ResponseCache.get_many([key])[key]
+
+    @staticmethod
+    def get_many(keys: List[str]) -> Dict[str, Optional[Value]]:
+        """複数キーを取得（プロセス内にないキーはRedisから1回のMGETでまとめて取得）"""
+        values: Dict[str, Optional[Value]] = {}
+        missing = []
+        for key in keys:
+            value = memory_cache.get(key) if memory_cache.max_bytes > 0 else None
+            values[key] = value
+            if value is None:
+                missing.append(key)
+
+        if missing and REDIS_ENABLED:
+            for key, value in zip(missing, redis_backend.get_many(missing)):
+                if value is not None:
+                    values[key] = value
+                    if memory_cache.max_bytes > 0:
+                        memory_cache.set(key, value, CACHE_MEMORY_REDIS_TTL)
+        return values
+
+    @staticmethod
+    def set(key: str, value: Value, ttl: int) -> None:
+        ResponseCache.set_many({key: value}, ttl)
+
+    @staticmethod
+    def set_many(items: Dict[str, Value], ttl: int) -> None:
+        if memory_cache.max_bytes > 0:
+            for key, value in items.items():
+                memory_cache.set(key, value, ttl)
+        if REDIS_ENABLED:
+            redis_backend.set_many(items, ttl)
+
+    @staticmethod
+    def stats() -> dict:
+        return {
+            "memory": memory_cache.stats(),
+            "redis": {"enabled": REDIS_ENABLED, **redis_backend.stats()},
+        }
@@ -1,16 +1,42 @@
-import yfinance as yf
+import os
+import threading
+import time
+from collections import OrderedDict
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
+from app.providers import get_provider
+from app.quote_cache import QuoteCache
+from app.singleflight import SingleFlight
+
+# 同時に実行中の同一リクエストは1回の上流呼び出しにまとめる
+_flights = {
+    "history": SingleFlight("history"),
+    "panel": SingleFlight("panel"),
+    "ohlc_panel": SingleFlight("ohlc_panel"),
+    "quote": SingleFlight("quote"),
+    "info": SingleFlight("info"),
+}
+
+# ticker.info の有効期間（秒）。企業情報と財務データは同じ取得結果を共有する
+INFO_CACHE_TTL = int(os.getenv("INFO_CACHE_TTL", "86400"))
+# ticker.info を保持する銘柄数（取得の古いものから破棄）
+INFO_CACHE_SIZE = int(os.getenv("INFO_CACHE_SIZE", "512"))
+
+_info_lock = threading.Lock()
+# symbol -> (取得時刻, info)。取得時刻の古い順
+_info_cache: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+_info_stats = {"hits": 0, "misses": 0}
 
 class DataFetcher:
-    """Yahoo Financeからデータ取得"""
+    """Yahoo Financeからデータ取得（取得元は MARKET_DATA_PROVIDER で切り替え可能）"""
     
     @staticmethod
     def fetch_stock_data(
         symbol: str,
         period: str = "1y",
-        interval: str = "1d"
+        interval: str = "1d",
+        start: Optional[datetime] = None
     ) -> Optional[pd.DataFrame]:
         """
         株価データ取得
@@ -19,10 +45,24 @@ class DataFetcher:
             symbol: 銘柄コード（例: '7203.T'）
             period: 期間（'1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', 'max'）
             interval: 間隔（'1d', '1wk', '1mo'）
+            start: 開始日（指定時はperiodより優先し、この日以降の足のみ取得）
         """
+        df = _flights["history"].do(
+            (symbol, period, interval, start),
+            DataFetcher._fetch_stock_data, symbol, period, interval, start
+        )
+        # 同時リクエスト間で結果を共有するため、呼び出し側にはコピーを返す
+        return df.copy() if df is not None else None
+
+    @staticmethod
+    def _fetch_stock_data(
+        symbol: str,
+        period: str,
+        interval: str,
+        start: Optional[datetime]
+    ) -> Optional[pd.DataFrame]:
         try:
-            ticker = yf.Ticker(symbol)
-            df = ticker.history(period=period, interval=interval)
+            df = get_provider().history(symbol, period=period, interval=interval, start=start)
             
             if df.empty:
                 return None
@@ -54,12 +94,132 @@ class DataFetcher:
             print(f"Error fetching data for {symbol}: {e}")
             return None
     
+    @staticmethod
+    def fetch_close_panel(
+        symbols: List[str],
+        period: str = "5d",
+        interval: str = "1d"
+    ) -> Optional[pd.DataFrame]:
+        """
+        複数銘柄の終値を1回のリクエストでまとめて取得
+
+        Args:
+            symbols: 銘柄コードのリスト（例: ['7203.T', '6758.T']）
+            period: 期間（'5d', '1mo', '1y' など）
+            interval: 間隔（'1d', '1wk', '1mo'）
+
+        Returns:
+            日付をインデックス、銘柄コードを列とする終値のDataFrame
+            （日付は全銘柄で揃え、データのない箇所はNaN）
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return None
+
+        panel = _flights["panel"].do(
+            (tuple(symbols), period, interval),
+            DataFetcher._fetch_close_panel, symbols, period, interval
+        )
+        return panel.copy() if panel is not None else None
+
+    @staticmethod
+    def _fetch_close_panel(
+        symbols: List[str],
+        period: str,
+        interval: str
+    ) -> Optional[pd.DataFrame]:
+        try:
+            df = get_provider().download(symbols, period=period, interval=interval)
+
+            if df is None or df.empty:
+                return None
+
+            if isinstance(df.columns, pd.MultiIndex):
+                close = df['Close']
+            else:
+                close = df[['Close']].rename(columns={'Close': symbols[0]})
+
+            close = close.reindex(columns=symbols)
+            close.index = pd.to_datetime(close.index)
+            if close.index.tz is not None:
+                close.index = close.index.tz_localize(None)
+            close.index.name = 'date'
+
+            close = close.dropna(how='all').sort_index()
+            print(f"Fetched close panel: {len(symbols)} symbols, {len(close)} rows")
+            return close
+        except Exception as e:
+            print(f"Error fetching close panel for {len(symbols)} symbols: {e}")
+            return None
+
+    @staticmethod
+    def fetch_ohlc_panel(
+        symbols: List[str],
+        period: str = "3mo",
+        interval: str = "1d"
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        複数銘柄の四本値・出来高を1回のリクエストでまとめて取得
+
+        Returns:
+            銘柄コード -> date, open, high, low, close, volume 列のDataFrame
+            （取得できなかった銘柄は含まない）
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+
+        frames = _flights["ohlc_panel"].do(
+            (tuple(symbols), period, interval),
+            DataFetcher._fetch_ohlc_panel, symbols, period, interval
+        )
+        return {symbol: df.copy() for symbol, df in frames.items()}
+
+    @staticmethod
+    def _fetch_ohlc_panel(
+        symbols: List[str],
+        period: str,
+        interval: str
+    ) -> Dict[str, pd.DataFrame]:
+        try:
+            df = get_provider().download(symbols, period=period, interval=interval)
+            if df is None or df.empty:
+                return {}
+
+            index = pd.to_datetime(df.index)
+            if index.tz is not None:
+                index = index.tz_localize(None)
+
+            frames = {}
+            for symbol in symbols:
+                if isinstance(df.columns, pd.MultiIndex):
+                    if symbol not in df.columns.get_level_values(1):
+                        continue
+                    bars = df.xs(symbol, axis=1, level=1)
+                else:
+                    bars = df
+                bars = pd.DataFrame({
+                    'date': index,
+                    'open': bars['Open'].to_numpy(),
+                    'high': bars['High'].to_numpy(),
+                    'low': bars['Low'].to_numpy(),
+                    'close': bars['Close'].to_numpy(),
+                    'volume': bars['Volume'].to_numpy(),
+                }).dropna(subset=['close']).sort_values('date').reset_index(drop=True)
+                if not bars.empty:
+                    frames[symbol] = bars
+
+            print(f"Fetched OHLC panel: {len(frames)}/{len(symbols)} symbols")
+            return frames
+        except Exception as e:
+            print(f"Error fetching OHLC panel for {len(symbols)} symbols: {e}")
+            return {}
+
     @staticmethod
     def get_latest_price(symbol: str) -> Optional[float]:
         """最新価格取得"""
         try:
-            ticker = yf.Ticker(symbol)
-            data = ticker.history(period="1d")
+            data = get_provider().history(symbol, period="1d")
             if not data.empty:
                 return float(data['Close'].iloc[-1])
             return None
@@ -72,12 +232,25 @@ class DataFetcher:
         """
         リアルタイム株価情報を取得
         取引時間中は現在価格、閉場時は最終価格を返す
+        （東証の立会時間に応じた有効期間でキャッシュする）
         """
-        try:
-            ticker = yf.Ticker(symbol)
+        # 立会時間外はキャッシュのみで応答する
+        cached = QuoteCache.get(symbol)
+        if cached is not None:
+            return cached
 
+        quote = _flights["quote"].do(symbol, DataFetcher._fetch_realtime_quote, symbol)
+        if quote is None:
+            return None
+
+        QuoteCache.put(symbol, quote)
+        return dict(quote)
+
+    @staticmethod
+    def _fetch_realtime_quote(symbol: str) -> Optional[dict]:
+        try:
             # historyから直近2営業日のデータを取得（最も確実な方法）
-            data = ticker.history(period="5d")
+            data = get_provider().history(symbol, period="5d")
             if data.empty or len(data) < 2:
                 print(f"[{symbol}] Insufficient history data")
                 return None
@@ -113,6 +286,59 @@ class DataFetcher:
             print(f"Error fetching realtime quote for {symbol}: {e}")
             return None
 
+    @staticmethod
+    def get_ticker_info(symbol: str, max_age: Optional[int] = None) -> dict:
+        """
+        yfinanceの ticker.info を取得
+
+        取得結果は max_age 秒（省略時は INFO_CACHE_TTL）の間キャッシュし、
+        企業情報と財務データの両方で使い回す。max_age=0 で強制的に再取得する。
+        同時に実行中の同一銘柄の取得はまとめて1回にする。
+        取得失敗時は例外をそのまま送出する。
+        """
+        max_age = INFO_CACHE_TTL if max_age is None else max_age
+        with _info_lock:
+            entry = _info_cache.get(symbol)
+            if entry and time.monotonic() - entry[0] < max_age:
+                _info_stats["hits"] += 1
+                return dict(entry[1])
+            _info_stats["misses"] += 1
+
+        info = _flights["info"].do(symbol, DataFetcher._fetch_ticker_info, symbol)
+        return dict(info)
+
+    @staticmethod
+    def _fetch_ticker_info(symbol: str) -> dict:
+        info = get_provider().info(symbol) or {}
+        if info:
+            now = time.monotonic()
+            with _info_lock:
+                _info_cache[symbol] = (now, dict(info))
+                _info_cache.move_to_end(symbol)
+                # 有効期間の切れたものと、件数の上限を超えた分を古い順に破棄
+                while _info_cache:
+                    fetched_at, _ = next(iter(_info_cache.values()))
+                    if now - fetched_at < INFO_CACHE_TTL and len(_info_cache) <= INFO_CACHE_SIZE:
+                        break
+                    _info_cache.popitem(last=False)
+        return info
+
+    @staticmethod
+    def info_cache_stats() -> Dict[str, int]:
+        with _info_lock:
+            return {"entries": len(_info_cache), **_info_stats}
+
+    @staticmethod
+    def data_source() -> str:
+        """保存時に記録する取得元名"""
+        provider = get_provider()
+        return "yfinance" if provider.name == "yahoo" else provider.name
+
+    @staticmethod
+    def singleflight_stats() -> Dict[str, Dict[str, int]]:
+        """上流呼び出しの種類ごとの実行数・まとめられた呼び出し数"""
+        return {name: flight.stats() for name, flight in _flights.items()}
+
     @staticmethod
     def get_company_info(symbol: str) -> Optional[dict]:
         """
@@ -125,53 +351,60 @@ class DataFetcher:
             企業情報の辞書、または取得失敗時はNone
         """
         try:
-            ticker = yf.Ticker(symbol)
-            info = ticker.info
+            return DataFetcher.parse_company_info(symbol, DataFetcher.get_ticker_info(symbol))
+        except Exception as e:
+            print(f"Error fetching company info for {symbol}: {e}")
+            return None
 
-            if not info:
-                print(f"[{symbol}] No company info available")
-                return None
+    @staticmethod
+    def parse_company_info(symbol: str, info: dict) -> Optional[dict]:
+        """
+        ticker.info から企業情報を抽出
 
-            # infoが空または無効なデータかチェック
-            # 最低限、long_nameかbusiness_summaryのどちらかが必要
-            if not info.get("longName") and not info.get("longBusinessSummary"):
-                print(f"[{symbol}] No valid company info available (empty or invalid data)")
-                print(f"[{symbol}] Available keys: {list(info.keys())[:10]}")  # デバッグ用
-                return None
+        Returns:
+            企業情報の辞書、または有効な情報がない場合はNone
+        """
+        if not info:
+            print(f"[{symbol}] No company info available")
+            return None
 
-            # デバッグ: すべてのキーを表示（日本語フィールドがあるか確認）
-            print(f"\n[{symbol}] Checking for Japanese fields:")
-            for key in sorted(info.keys()):
-                value = info.get(key)
-                # 文字列で日本語が含まれているか、name/address/descriptionを含むキーをチェック
-                if isinstance(value, str) and len(value) > 0:
-                    if 'name' in key.lower() or 'address' in key.lower() or 'description' in key.lower() or 'summary' in key.lower():
-                        print(f"  {key}: {value[:100]}...")
-
-            # 必要な情報を抽出
-            company_data = {
-                "symbol": symbol,
-                "long_name": info.get("longName"),
-                "industry": info.get("industry"),
-                "sector": info.get("sector"),
-                "business_summary": info.get("longBusinessSummary"),
-                "website": info.get("website"),
-                "full_time_employees": info.get("fullTimeEmployees"),
-                "city": info.get("city"),
-                "state": info.get("state"),
-                "country": info.get("country"),
-                "address": info.get("address1"),
-                "zip_code": info.get("zip"),
-                "phone": info.get("phone"),
-                "previous_close": info.get("previousClose"),
-                "market_cap": info.get("marketCap"),
-            }
+        # infoが空または無効なデータかチェック
+        # 最低限、long_nameかbusiness_summaryのどちらかが必要
+        if not info.get("longName") and not info.get("longBusinessSummary"):
+            print(f"[{symbol}] No valid company info available (empty or invalid data)")
+            print(f"[{symbol}] Available keys: {list(info.keys())[:10]}")  # デバッグ用
+            return None
 
-            print(f"[{symbol}] Company info fetched successfully")
-            print(f"[{symbol}] long_name: {company_data.get('long_name')}")
-            print(f"[{symbol}] industry: {company_data.get('industry')}")
-            return company_data
+        # デバッグ: すべてのキーを表示（日本語フィールドがあるか確認）
+        print(f"\n[{symbol}] Checking for Japanese fields:")
+        for key in sorted(info.keys()):
+            value = info.get(key)
+            # 文字列で日本語が含まれているか、name/address/descriptionを含むキーをチェック
+            if isinstance(value, str) and len(value) > 0:
+                if 'name' in key.lower() or 'address' in key.lower() or 'description' in key.lower() or 'summary' in key.lower():
+                    print(f"  {key}: {value[:100]}...")
 
-        except Exception as e:
-            print(f"Error fetching company info for {symbol}: {e}")
-            return None
+        # 必要な情報を抽出
+        company_data = {
+            "symbol": symbol,
+            "long_name": info.get("longName"),
+            "industry": info.get("industry"),
+            "sector": info.get("sector"),
+            "business_summary": info.get("longBusinessSummary"),
+            "website": info.get("website"),
+            "full_time_employees": info.get("fullTimeEmployees"),
+            "city": info.get("city"),
+            "state": info.get("state"),
+            "country": info.get("country"),
+            "address": info.get("address1"),
+            "zip_code": info.get("zip"),
+            "phone": info.get("phone"),
+            "previous_close": info.get("previousClose"),
+            "market_cap": info.get("marketCap"),
+            "data_source": DataFetcher.data_source(),
+        }
+
+        print(f"[{symbol}] Company info fetched successfully")
+        print(f"[{symbol}] long_name: {company_data.get('long_name')}")
+        print(f"[{symbol}] industry: {company_data.get('industry')}")
+        return company_data
@@ -1,5 +1,5 @@
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
@@ -13,13 +13,26 @@ DATABASE_URL = os.getenv(
 )
 
 engine = create_engine(DATABASE_URL)
+
+if DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragma(dbapi_connection, connection_record):
+        """WALモードにして、並行リクエストの読み書きが互いに待たないようにする"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.close()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 async def init_db():
     """データベース初期化"""
-    from app.models import Stock, Watchlist, WatchlistStock
+    from app.models import Stock, Watchlist, WatchlistStock, StockPrice
     Base.metadata.create_all(bind=engine)
+
+    # 既存DBの stock_prices にはインデックスが無いため個別に作成
+    for index in StockPrice.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+    drop_fundamentals_symbol_fk()
     
     # サンプルデータ挿入
     db = SessionLocal()
@@ -68,6 +81,26 @@ async def init_db():
     finally:
         db.close()
 
+def drop_fundamentals_symbol_fk():
+    """
+    既存DBの stock_fundamentals.symbol → stocks.symbol の外部キーを削除
+
+    全銘柄の財務データ（stocksに登録していない銘柄）を保存できるようにする。
+    SQLiteは外部キーを強制しないため対象外。
+    """
+    if engine.dialect.name == "sqlite":
+        return
+    from sqlalchemy import inspect, text
+
+    inspector = inspect(engine)
+    if not inspector.has_table("stock_fundamentals"):
+        return
+    for fk in inspector.get_foreign_keys("stock_fundamentals"):
+        if fk.get("referred_table") == "stocks" and fk.get("name"):
+            with engine.begin() as conn:
+                conn.execute(text(f'ALTER TABLE stock_fundamentals DROP CONSTRAINT "{fk["name"]}"'))
+            print(f"Dropped foreign key {fk['name']} on stock_fundamentals.symbol")
+
 def get_db():
     """データベースセッション取得"""
     db = SessionLocal()
@@ -0,0 +1,51 @@
+import numpy as np
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets で間引く点のインデックスを選ぶ
+
+    最初と最後の点は必ず残し、残りを threshold-2 個のバケットに分けて、
+    各バケットから「直前に選んだ点」と「次のバケットの平均点」で作る
+    三角形の面積が最大になる点を1つずつ選ぶ。
+
+    Args:
+        x: 昇順のx座標（日付をint64にしたものなど）
+        y: 値（NaNを含まないこと）
+        threshold: 残す点の数
+
+    Returns:
+        選んだ点のインデックス（昇順）
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+
+    # バケットの境界（先頭・末尾の点を除いた範囲を threshold-2 等分）
+    every = (n - 2) / (threshold - 2)
+    edges = (np.arange(threshold - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+    starts, ends = edges[:-1], edges[1:]
+
+    # 各バケットの平均点（次のバケットの平均として使う。最後は末尾の点）
+    counts = ends - starts
+    avg_x = np.append(np.add.reduceat(x[:n - 1], starts) / counts, x[-1])
+    avg_y = np.append(np.add.reduceat(y[:n - 1], starts) / counts, y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = starts[i], ends[i]
+        next_x, next_y = avg_x[i + 1], avg_y[i + 1]
+        area = np.abs(
+            (x[a] - next_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (next_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
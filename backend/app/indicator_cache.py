@@ -0,0 +1,65 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Tuple
+
+import numpy as np
+
+from app.bar_cache import BarSeries
+from app.indicator_engine import IndicatorEngine
+from app.indicators import IndicatorSpec
+
+# 保持する指標の件数（銘柄×時間軸×指標ごとに1件、古いものから破棄）
+INDICATOR_CACHE_SIZE = int(os.getenv("INDICATOR_CACHE_SIZE", "1024"))
+
+
+class IndicatorCache:
+    """
+    指標ごとの計算結果キャッシュ
+
+    キーは (銘柄, 時間軸, 指標指定, 足データの識別子)。識別子は本数・最初と
+    最後の日付・最後の終値で、足が追加・修正されると別キーになる。
+    その場合も IndicatorEngine が前回の計算結果から追加分だけを逐次計算する。
+    """
+
+    _lock = threading.Lock()
+    _entries: "OrderedDict[Hashable, Dict[str, np.ndarray]]" = OrderedDict()
+    hits = 0
+    misses = 0
+
+    @staticmethod
+    def _fingerprint(bars: BarSeries) -> Tuple:
+        if bars.empty:
+            return (0,)
+        return (len(bars), int(bars.date[0].view('int64')), int(bars.date[-1].view('int64')), float(bars.close[-1]))
+
+    @staticmethod
+    def get(symbol: str, timeframe: str, spec: IndicatorSpec, bars: BarSeries) -> Dict[str, np.ndarray]:
+        """指標を取得（キャッシュになければ計算して保存）"""
+        key = (symbol, timeframe, spec.key, IndicatorCache._fingerprint(bars))
+        with IndicatorCache._lock:
+            values = IndicatorCache._entries.get(key)
+            if values is not None:
+                IndicatorCache._entries.move_to_end(key)
+                IndicatorCache.hits += 1
+                return values
+            IndicatorCache.misses += 1
+
+        # 返る配列は書き込み不可（キャッシュ上で共有する）
+        values = IndicatorEngine.series(symbol, timeframe, spec, bars)
+
+        with IndicatorCache._lock:
+            IndicatorCache._entries[key] = values
+            IndicatorCache._entries.move_to_end(key)
+            while len(IndicatorCache._entries) > INDICATOR_CACHE_SIZE:
+                IndicatorCache._entries.popitem(last=False)
+        return values
+
+    @staticmethod
+    def stats() -> Dict[str, int]:
+        with IndicatorCache._lock:
+            return {
+                "entries": len(IndicatorCache._entries),
+                "hits": IndicatorCache.hits,
+                "misses": IndicatorCache.misses,
+            }
@@ -0,0 +1,639 @@
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.bar_cache import BarSeries
+from app.indicators import IndicatorCalculator, IndicatorSpec, parse_indicator_specs
+
+# 保持する系列の件数（銘柄×時間軸×指標ごとに1件、古いものから破棄）
+INDICATOR_ENGINE_SIZE = int(os.getenv("INDICATOR_ENGINE_SIZE", "1024"))
+# 追加された足がこの本数を超える場合は逐次更新せず全期間を再計算する（ベクトル演算の方が速い）
+INDICATOR_ENGINE_MAX_STEPS = int(os.getenv("INDICATOR_ENGINE_MAX_STEPS", "256"))
+# 逐次更新がこの回数に達するごとに全期間の再計算と照合する（0で無効）
+INDICATOR_ENGINE_CHECK_INTERVAL = int(os.getenv("INDICATOR_ENGINE_CHECK_INTERVAL", "1000"))
+# 逐次計算の状態の保存先（空文字で保存しない）
+INDICATOR_STATE_PATH = os.getenv("INDICATOR_STATE_PATH", "./cache/indicator_state.json")
+
+NAN = float("nan")
+
+
+def _float(value) -> float:
+    # JSONでnullになったNaNを戻す
+    return NAN if value is None else float(value)
+
+
+def _jsonable(value):
+    """
+    保存用にPythonの値へ変換（配列はリスト、NaNはnull）
+
+    orjsonがない環境の json モジュールは配列を扱えず、NaNを非標準の NaN と書き出すため、
+    どちらのエンコーダでも同じJSONになるよう先に変換しておく。
+    """
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, np.ndarray):
+        values = value.astype('float64')
+        column = values.astype(object)
+        column[np.isnan(values)] = None
+        return column.tolist()
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, (float, np.floating)):
+        return None if math.isnan(value) else float(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+class _Window:
+    """
+    直近 period 個の値の合計と二乗和（リングバッファ）
+
+    桁落ちを避けるため基準値 shift を引いた値で集計し、period 回の追加ごとに
+    バッファから合計を取り直して誤差の蓄積を防ぐ（償却O(1)）。
+    """
+
+    def __init__(self, period: int):
+        self.period = period
+        self.values = np.zeros(period, dtype='float64')
+        self.pos = 0
+        self.count = 0
+        self.shift = 0.0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self._pushes = 0
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.period
+
+    def push(self, x: float) -> None:
+        if self.count == 0:
+            self.shift = x
+        if self.full:
+            old = float(self.values[self.pos]) - self.shift
+            self.total -= old
+            self.total_sq -= old * old
+        else:
+            self.count += 1
+        self.values[self.pos] = x
+        self.pos = (self.pos + 1) % self.period
+        d = x - self.shift
+        self.total += d
+        self.total_sq += d * d
+
+        self._pushes += 1
+        if self._pushes >= self.period:
+            self._resum()
+
+    def replace_last(self, x: float) -> None:
+        """最後に追加した値を置き換える（同じ足の値が更新された場合）"""
+        last = (self.pos - 1) % self.period
+        old = float(self.values[last]) - self.shift
+        new = x - self.shift
+        self.values[last] = x
+        self.total += new - old
+        self.total_sq += new * new - old * old
+
+    def _resum(self) -> None:
+        values = self.ordered()
+        self.shift = float(values.mean()) if len(values) else 0.0
+        d = values - self.shift
+        self.total = float(d.sum())
+        self.total_sq = float((d * d).sum())
+        self._pushes = 0
+
+    def ordered(self) -> np.ndarray:
+        """保持している値（古い順）"""
+        if not self.full:
+            return self.values[:self.count].copy()
+        return np.concatenate([self.values[self.pos:], self.values[:self.pos]])
+
+    def mean(self) -> float:
+        return self.shift + self.total / self.count
+
+    def std(self) -> float:
+        """標本標準偏差（pandasのrolling().std()と同じく ddof=1）"""
+        if self.count < 2:
+            return NAN
+        var = (self.total_sq - self.total * self.total / self.count) / (self.count - 1)
+        return math.sqrt(max(var, 0.0))
+
+    def to_state(self) -> List[float]:
+        return self.ordered().tolist()
+
+    @classmethod
+    def from_values(cls, period: int, values) -> "_Window":
+        window = cls(period)
+        for x in list(values)[-period:]:
+            window.push(_float(x))
+        return window
+
+
+class _Ema:
+    """指数移動平均（pandasの ewm(span=period, adjust=False) と同じ漸化式）"""
+
+    def __init__(self, period: int, value: float = NAN, previous: float = NAN):
+        self.alpha = 2.0 / (period + 1)
+        self.value = value
+        # 最後の値を置き換えるための1本前の値
+        self.previous = previous
+
+    def push(self, x: float) -> None:
+        self.previous = self.value
+        self.value = self._next(self.previous, x)
+
+    def replace_last(self, x: float) -> None:
+        self.value = self._next(self.previous, x)
+
+    def _next(self, prev: float, x: float) -> float:
+        return x if math.isnan(prev) else prev + self.alpha * (x - prev)
+
+    def to_state(self) -> List[float]:
+        return [self.value, self.previous]
+
+
+class IncrementalIndicator:
+    """
+    1本の足の追加（または最後の足の更新）をO(1)で反映する指標の計算状態
+
+    IndicatorCalculator と同じ値を返す:
+    - sma, bb: 直近 period 本の合計・二乗和
+    - ema, macd: EMAの直前値
+    - rsi: 直近 period 本の上昇幅・下落幅の合計。IndicatorCalculatorと同じ単純移動平均のRSIで、
+      Wilderの平滑化（前回の平均を (period-1)/period 倍して加える方式）ではない
+    """
+
+    def __init__(self, spec: IndicatorSpec):
+        self.spec = spec
+        kind, params = spec.kind, spec.params
+        if kind in ("sma", "bb"):
+            self.window = _Window(params[0])
+        elif kind == "ema":
+            self.ema = _Ema(params[0])
+        elif kind == "rsi":
+            self.gains = _Window(params[0])
+            self.losses = _Window(params[0])
+            self.last_close = NAN
+            self.prev_close = NAN
+        elif kind == "macd":
+            self.fast = _Ema(params[0])
+            self.slow = _Ema(params[1])
+            self.signal = _Ema(params[2])
+        else:
+            raise ValueError(f"Unknown indicator: {kind}")
+
+    def update(self, close: float) -> Dict[str, float]:
+        """新しい足を追加"""
+        kind = self.spec.kind
+        if kind in ("sma", "bb"):
+            self.window.push(close)
+        elif kind == "ema":
+            self.ema.push(close)
+        elif kind == "rsi":
+            self.prev_close, self.last_close = self.last_close, close
+            gain, loss = self._gain_loss()
+            self.gains.push(gain)
+            self.losses.push(loss)
+        else:
+            self.fast.push(close)
+            self.slow.push(close)
+            self.signal.push(self.fast.value - self.slow.value)
+        return self.values()
+
+    def replace_last(self, close: float) -> Dict[str, float]:
+        """最後の足の終値を置き換える（日中の更新や週足・月足の途中の足）"""
+        kind = self.spec.kind
+        if kind in ("sma", "bb"):
+            self.window.replace_last(close)
+        elif kind == "ema":
+            self.ema.replace_last(close)
+        elif kind == "rsi":
+            self.last_close = close
+            gain, loss = self._gain_loss()
+            self.gains.replace_last(gain)
+            self.losses.replace_last(loss)
+        else:
+            self.fast.replace_last(close)
+            self.slow.replace_last(close)
+            self.signal.replace_last(self.fast.value - self.slow.value)
+        return self.values()
+
+    def _gain_loss(self):
+        # 最初の足は前日比がないため上昇幅・下落幅とも0として扱う（IndicatorCalculatorと同じ）
+        delta = self.last_close - self.prev_close
+        if math.isnan(delta):
+            return 0.0, 0.0
+        return max(delta, 0.0), max(-delta, 0.0)
+
+    def values(self) -> Dict[str, float]:
+        """現在の指標値（系列名はIndicatorCalculator.calculateと同じ）"""
+        kind = self.spec.kind
+        if kind == "sma":
+            return {"value": self.window.mean() if self.window.full else NAN}
+        if kind == "ema":
+            return {"value": self.ema.value}
+        if kind == "bb":
+            if not self.window.full:
+                return {"upper": NAN, "middle": NAN, "lower": NAN}
+            middle = self.window.mean()
+            width = self.window.std() * self.spec.params[1]
+            return {"upper": middle + width, "middle": middle, "lower": middle - width}
+        if kind == "rsi":
+            if not self.gains.full:
+                return {"value": NAN}
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rs = np.float64(self.gains.mean()) / np.float64(self.losses.mean())
+                return {"value": float(100 - 100 / (1 + rs))}
+        macd = self.fast.value - self.slow.value
+        return {"macd": macd, "signal": self.signal.value, "histogram": macd - self.signal.value}
+
+    @classmethod
+    def from_history(cls, spec: IndicatorSpec, closes: np.ndarray) -> "IncrementalIndicator":
+        """全期間の終値から状態を作る（ベクトル演算、EMAは全期間の計算結果の末尾を使う）"""
+        indicator = cls(spec)
+        closes = np.asarray(closes, dtype='float64')
+        kind, params = spec.kind, spec.params
+
+        def ema(values: np.ndarray, period: int) -> np.ndarray:
+            return pd.Series(values).ewm(span=period, adjust=False).mean().to_numpy()
+
+        def ema_state(series: np.ndarray, period: int) -> _Ema:
+            return _Ema(
+                period,
+                float(series[-1]) if len(series) else NAN,
+                float(series[-2]) if len(series) > 1 else NAN,
+            )
+
+        if kind in ("sma", "bb"):
+            indicator.window = _Window.from_values(params[0], closes)
+        elif kind == "ema":
+            indicator.ema = ema_state(ema(closes, params[0]), params[0])
+        elif kind == "rsi":
+            delta = np.diff(closes, prepend=np.nan)
+            delta[0] = 0.0
+            indicator.gains = _Window.from_values(params[0], np.maximum(delta, 0.0))
+            indicator.losses = _Window.from_values(params[0], np.maximum(-delta, 0.0))
+            indicator.last_close = float(closes[-1]) if len(closes) else NAN
+            indicator.prev_close = float(closes[-2]) if len(closes) > 1 else NAN
+        else:
+            fast = ema(closes, params[0])
+            slow = ema(closes, params[1])
+            indicator.fast = ema_state(fast, params[0])
+            indicator.slow = ema_state(slow, params[1])
+            indicator.signal = ema_state(ema(fast - slow, params[2]), params[2])
+        return indicator
+
+    def to_state(self) -> dict:
+        kind = self.spec.kind
+        if kind in ("sma", "bb"):
+            return {"window": self.window.to_state()}
+        if kind == "ema":
+            return {"ema": self.ema.to_state()}
+        if kind == "rsi":
+            return {
+                "gains": self.gains.to_state(),
+                "losses": self.losses.to_state(),
+                "closes": [self.prev_close, self.last_close],
+            }
+        return {"fast": self.fast.to_state(), "slow": self.slow.to_state(), "signal": self.signal.to_state()}
+
+    @classmethod
+    def from_state(cls, spec: IndicatorSpec, state: dict) -> "IncrementalIndicator":
+        indicator = cls(spec)
+        kind, params = spec.kind, spec.params
+        if kind in ("sma", "bb"):
+            indicator.window = _Window.from_values(params[0], state["window"])
+        elif kind == "ema":
+            indicator.ema = _Ema(params[0], *map(_float, state["ema"]))
+        elif kind == "rsi":
+            indicator.gains = _Window.from_values(params[0], state["gains"])
+            indicator.losses = _Window.from_values(params[0], state["losses"])
+            indicator.prev_close, indicator.last_close = map(_float, state["closes"])
+        else:
+            indicator.fast = _Ema(params[0], *map(_float, state["fast"]))
+            indicator.slow = _Ema(params[1], *map(_float, state["slow"]))
+            indicator.signal = _Ema(params[2], *map(_float, state["signal"]))
+        return indicator
+
+
+class _Series:
+    """1系列（銘柄×時間軸×指標）の計算状態と、これまでの計算結果"""
+
+    def __init__(
+        self,
+        indicator: IncrementalIndicator,
+        length: int,
+        first_date: int,
+        first_close: float,
+        last_date: int,
+        last_close: float,
+        buffers: Dict[str, np.ndarray]
+    ):
+        self.indicator = indicator
+        self.length = length
+        # 足の識別（日付はint64のナノ秒）
+        self.first_date = first_date
+        self.first_close = first_close
+        self.last_date = last_date
+        self.last_close = last_close
+        # 系列名 -> 計算結果（先頭 length 件が有効、末尾は追加用の空き）
+        self.buffers = buffers
+        # 前回の照合からの逐次更新の回数
+        self.steps = 0
+
+    @classmethod
+    def from_bars(cls, indicator: IncrementalIndicator, bars: BarSeries, buffers: Dict[str, np.ndarray]) -> "_Series":
+        return cls(
+            indicator,
+            len(bars),
+            int(bars.date[0].view('int64')),
+            float(bars.close[0]),
+            int(bars.date[-1].view('int64')),
+            float(bars.close[-1]),
+            buffers,
+        )
+
+    def extends(self, bars: BarSeries) -> bool:
+        """barsがこれまでの足の続き（最後の足の更新を含む）か"""
+        n = self.length
+        return (
+            0 < n <= len(bars)
+            and int(bars.date[0].view('int64')) == self.first_date
+            and float(bars.close[0]) == self.first_close
+            and int(bars.date[n - 1].view('int64')) == self.last_date
+        )
+
+    def write(self, index: int, values: Dict[str, float], copy: bool = False) -> None:
+        """index番目の値を書き込む（copy=Trueの場合は新しい配列に移してから）"""
+        for name, value in values.items():
+            buffer = self.buffers[name]
+            if copy or index >= len(buffer):
+                # 返却済みの配列（キャッシュ上のビュー）を書き換えないよう、
+                # 既存の足の値を変える場合と容量が足りない場合は新しい配列に移す
+                capacity = len(buffer) if index < len(buffer) else (index + 1) * 2
+                moved = np.full(capacity, np.nan)
+                moved[:index] = buffer[:index]
+                buffer = self.buffers[name] = moved
+            buffer[index] = value
+
+    def views(self) -> Dict[str, np.ndarray]:
+        result = {}
+        for name, buffer in self.buffers.items():
+            view = buffer[:self.length]
+            view.flags.writeable = False
+            result[name] = view
+        return result
+
+
+class IndicatorEngine:
+    """
+    逐次計算による指標エンジン
+
+    銘柄×時間軸×指標ごとに計算状態（移動合計・二乗和・EMAの直前値など）と
+    計算結果を保持し、足が追加された分だけをO(1)/本で計算する。
+    初回や過去の足が変わった場合（分割の調整など）は全期間をベクトル演算で計算し直す。
+    INDICATOR_ENGINE_CHECK_INTERVAL 回の逐次更新ごとに全期間の計算と照合し、
+    ずれていれば作り直す。
+    """
+
+    _lock = threading.Lock()
+    _entries: "OrderedDict[Hashable, _Series]" = OrderedDict()
+    stats_counts = {"incremental": 0, "steps": 0, "rebuilds": 0, "checks": 0, "mismatches": 0}
+
+    @staticmethod
+    def _key(symbol: str, timeframe: str, spec: IndicatorSpec) -> Hashable:
+        return (symbol, timeframe, spec.key)
+
+    @staticmethod
+    def _take(key: Hashable) -> Optional[_Series]:
+        # 計算中の系列は他のスレッドから触られないよう一旦取り出す
+        with IndicatorEngine._lock:
+            return IndicatorEngine._entries.pop(key, None)
+
+    @staticmethod
+    def _put(key: Hashable, entry: _Series) -> None:
+        with IndicatorEngine._lock:
+            IndicatorEngine._entries[key] = entry
+            IndicatorEngine._entries.move_to_end(key)
+            while len(IndicatorEngine._entries) > INDICATOR_ENGINE_SIZE:
+                IndicatorEngine._entries.popitem(last=False)
+
+    @staticmethod
+    def _count(name: str, n: int = 1) -> None:
+        with IndicatorEngine._lock:
+            IndicatorEngine.stats_counts[name] += n
+
+    @staticmethod
+    def series(symbol: str, timeframe: str, spec: IndicatorSpec, bars: BarSeries) -> Dict[str, np.ndarray]:
+        """
+        barsの全期間の指標値（書き込み不可の配列）
+
+        前回の足の続きであれば、最後の足の更新と追加された足だけを逐次計算する。
+        """
+        if bars.empty:
+            return {name: series.to_numpy(dtype='float64')
+                    for name, series in IndicatorCalculator.calculate(bars, spec).items()}
+
+        key = IndicatorEngine._key(symbol, timeframe, spec)
+        entry = IndicatorEngine._take(key)
+        n = len(bars)
+
+        if entry is None or not entry.extends(bars) or n - entry.length > INDICATOR_ENGINE_MAX_STEPS:
+            entry = IndicatorEngine._rebuild(spec, bars)
+        else:
+            IndicatorEngine._extend(entry, bars)
+            if INDICATOR_ENGINE_CHECK_INTERVAL and entry.steps >= INDICATOR_ENGINE_CHECK_INTERVAL:
+                if not IndicatorEngine._check(entry, bars):
+                    entry = IndicatorEngine._rebuild(spec, bars)
+                entry.steps = 0
+
+        IndicatorEngine._put(key, entry)
+        return entry.views()
+
+    @staticmethod
+    def _rebuild(spec: IndicatorSpec, bars: BarSeries) -> _Series:
+        """全期間をベクトル演算で計算し、末尾から逐次計算の状態を作る"""
+        IndicatorEngine._count("rebuilds")
+        buffers = {}
+        for name, series in IndicatorCalculator.calculate(bars, spec).items():
+            # 追加される足のための空きを確保しておく
+            buffer = np.full(len(bars) + 64, np.nan)
+            buffer[:len(bars)] = series.to_numpy(dtype='float64')
+            buffers[name] = buffer
+        indicator = IncrementalIndicator.from_history(spec, bars.close)
+        return _Series.from_bars(indicator, bars, buffers)
+
+    @staticmethod
+    def _extend(entry: _Series, bars: BarSeries) -> None:
+        """最後の足の更新と、追加された足を逐次計算"""
+        n = len(bars)
+        closes = bars.close
+        last = entry.length - 1
+        steps = n - entry.length
+        if float(closes[last]) != entry.last_close:
+            entry.write(last, entry.indicator.replace_last(float(closes[last])), copy=True)
+            steps += 1
+
+        for i in range(entry.length, n):
+            entry.write(i, entry.indicator.update(float(closes[i])))
+
+        IndicatorEngine._count("incremental")
+        IndicatorEngine._count("steps", steps)
+        entry.steps += steps
+        entry.length = n
+        entry.last_date = int(bars.date[-1].view('int64'))
+        entry.last_close = float(closes[-1])
+
+    @staticmethod
+    def _check(entry: _Series, bars: BarSeries) -> bool:
+        """逐次計算の結果を全期間の再計算と照合"""
+        IndicatorEngine._count("checks")
+        expected = IndicatorCalculator.calculate(bars, entry.indicator.spec)
+        scale = max(float(np.nanmax(np.abs(bars.close))), 1.0)
+        for name, series in expected.items():
+            actual = entry.buffers[name][:entry.length]
+            if not np.allclose(actual, series.to_numpy(dtype='float64'), rtol=1e-7, atol=1e-7 * scale, equal_nan=True):
+                IndicatorEngine._count("mismatches")
+                print(f"Indicator engine mismatch ({entry.indicator.spec.key}/{name}), rebuilding")
+                return False
+        return True
+
+    @staticmethod
+    def update(
+        symbol: str,
+        timeframe: str,
+        spec: IndicatorSpec,
+        date: np.datetime64,
+        close: float
+    ) -> Optional[Dict[str, float]]:
+        """
+        1本の足をO(1)で反映して最新の指標値を返す（ライブ更新用）
+
+        最後の足と同じ日付なら置き換え、新しい日付なら追加する。
+        計算状態がない場合や過去の日付の場合はNone（series()で作り直す）。
+        """
+        key = IndicatorEngine._key(symbol, timeframe, spec)
+        entry = IndicatorEngine._take(key)
+        if entry is None:
+            return None
+
+        date = int(np.datetime64(date, 'ns').view('int64'))
+        if date == entry.last_date:
+            values = entry.indicator.replace_last(close)
+            index, copy = entry.length - 1, True
+        elif date > entry.last_date:
+            values = entry.indicator.update(close)
+            index, copy = entry.length, False
+        else:
+            IndicatorEngine._put(key, entry)
+            return None
+
+        entry.write(index, values, copy=copy)
+        entry.length = index + 1
+        entry.last_date = date
+        entry.last_close = close
+        entry.steps += 1
+        IndicatorEngine._count("steps")
+        IndicatorEngine._put(key, entry)
+        return values
+
+    @staticmethod
+    def update_symbol(symbol: str, date: np.datetime64, close: float) -> Dict[str, Dict[str, float]]:
+        """
+        保持している銘柄の日足の全指標に現在値を反映する（株価のストリーミング配信用）
+
+        Returns:
+            指標指定 -> 系列名 -> 値（計算状態がない指標は含まない）
+        """
+        with IndicatorEngine._lock:
+            keys = [key for key in IndicatorEngine._entries if key[0] == symbol and key[1] == "1d"]
+
+        result = {}
+        for key in keys:
+            spec = parse_indicator_specs(key[2])[0]
+            values = IndicatorEngine.update(symbol, "1d", spec, date, close)
+            if values is not None:
+                result[key[2]] = values
+        return result
+
+    @staticmethod
+    def save(path: str = INDICATOR_STATE_PATH) -> int:
+        """計算状態と計算結果をファイルに保存（次回起動時は続きの足だけを逐次計算する）"""
+        if not path:
+            return 0
+        from app.responses import encode_json
+
+        with IndicatorEngine._lock:
+            entries = [
+                {
+                    "symbol": key[0],
+                    "timeframe": key[1],
+                    "spec": key[2],
+                    "length": entry.length,
+                    "first_date": entry.first_date,
+                    "first_close": _jsonable(entry.first_close),
+                    "last_date": entry.last_date,
+                    "last_close": _jsonable(entry.last_close),
+                    "state": _jsonable(entry.indicator.to_state()),
+                    "values": {
+                        name: _jsonable(buffer[:entry.length]) for name, buffer in entry.buffers.items()
+                    },
+                }
+                for key, entry in IndicatorEngine._entries.items()
+            ]
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(encode_json({"entries": entries}))
+        os.replace(tmp_path, path)
+        return len(entries)
+
+    @staticmethod
+    def load(path: str = INDICATOR_STATE_PATH) -> int:
+        """保存した計算状態を読み込む（読み込めない場合は何もしない）"""
+        if not path or not os.path.exists(path):
+            return 0
+        from app.responses import decode_json
+
+        try:
+            with open(path, 'rb') as f:
+                data = decode_json(f.read())
+            loaded = 0
+            for item in data.get("entries", []):
+                spec = parse_indicator_specs(item["spec"])[0]
+                length = item["length"]
+                buffers = {}
+                for name, values in item["values"].items():
+                    # NaNはJSONでnullになるため、float64への変換でNaNに戻す
+                    buffer = np.full(length + 64, np.nan)
+                    buffer[:length] = np.array(values, dtype='float64')
+                    buffers[name] = buffer
+                entry = _Series(
+                    IncrementalIndicator.from_state(spec, item["state"]),
+                    length,
+                    item["first_date"],
+                    _float(item["first_close"]),
+                    item["last_date"],
+                    _float(item["last_close"]),
+                    buffers,
+                )
+                IndicatorEngine._put(IndicatorEngine._key(item["symbol"], item["timeframe"], spec), entry)
+                loaded += 1
+            return loaded
+        except Exception as e:
+            print(f"Failed to load indicator state from {path}: {e}")
+            return 0
+
+    @staticmethod
+    def stats() -> Dict[str, int]:
+        with IndicatorEngine._lock:
+            return {"entries": len(IndicatorEngine._entries), **IndicatorEngine.stats_counts}
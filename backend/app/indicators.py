@@ -1,9 +1,98 @@
+import numpy as np
 import pandas as pd
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+# 指標の種類ごとの既定パラメータ（'sma:25' のように指定されたものが優先）
+INDICATOR_DEFAULTS: Dict[str, Tuple[float, ...]] = {
+    "sma": (25,),
+    "ema": (12,),
+    "bb": (20, 2.0),
+    "rsi": (14,),
+    "macd": (12, 26, 9),
+}
+MAX_INDICATOR_PERIOD = 1000
+
+
+class IndicatorSpec(NamedTuple):
+    """パラメータ付きの指標指定（例: bb:20:2 -> IndicatorSpec('bb', (20, 2.0))）"""
+    kind: str
+    params: Tuple[float, ...]
+
+    @property
+    def key(self) -> str:
+        """正規化した指定文字列（キャッシュキー・レスポンスのキーに使う）"""
+        return ":".join([self.kind] + [f"{p:g}" for p in self.params])
+
+    @property
+    def warmup(self) -> int:
+        """最初の有効な値（EMA系は初期値の影響が薄れた値）までに必要な足の数"""
+        if self.kind == "macd":
+            return int(self.params[1] + self.params[2])
+        return int(self.params[0])
+
+
+def parse_indicator_specs(text: str) -> List[IndicatorSpec]:
+    """
+    'sma:25,sma:200,bb:20:2,rsi:14,macd:12:26:9' 形式の指定をパース
+
+    省略したパラメータは INDICATOR_DEFAULTS で補う。重複は1つにまとめる。
+    不正な指定はValueErrorを送出する。
+    """
+    specs: Dict[str, IndicatorSpec] = {}
+    for item in filter(None, (part.strip().lower() for part in text.split(","))):
+        kind, *values = item.split(":")
+        defaults = INDICATOR_DEFAULTS.get(kind)
+        if defaults is None:
+            raise ValueError(f"Unknown indicator: {kind}")
+        if len(values) > len(defaults):
+            raise ValueError(f"Too many parameters for {kind}: {item}")
+        try:
+            values = [float(v) for v in values] + list(defaults[len(values):])
+        except ValueError:
+            raise ValueError(f"Invalid indicator parameters: {item}")
+
+        params = []
+        for i, value in enumerate(values):
+            # ボリンジャーバンドの標準偏差の倍率以外は期間（整数）
+            is_period = not (kind == "bb" and i == 1)
+            if not 0 < value <= MAX_INDICATOR_PERIOD or (is_period and not float(value).is_integer()):
+                raise ValueError(f"Invalid indicator parameters: {item}")
+            params.append(int(value) if is_period else float(value))
+
+        spec = IndicatorSpec(kind, tuple(params))
+        specs.setdefault(spec.key, spec)
+    return list(specs.values())
+
 
 class IndicatorCalculator:
-    """テクニカル指標計算"""
+    """
+    テクニカル指標計算
+
+    引数dfにはDataFrameのほか、列指向キャッシュのBarSeriesも渡せる
+    （'close' などの列アクセスでコピーなしのSeriesを返すため）。
+    """
     
+    @staticmethod
+    def calculate(df: pd.DataFrame, spec: IndicatorSpec) -> Dict[str, pd.Series]:
+        """
+        指定された指標を計算
+
+        Returns:
+            系列名 -> 値。単一系列の指標（sma, ema, rsi）は 'value' のみ、
+            bbは upper/middle/lower、macdは macd/signal/histogram
+        """
+        if spec.kind == "sma":
+            return {"value": IndicatorCalculator.calculate_sma(df, *spec.params)}
+        if spec.kind == "ema":
+            return {"value": IndicatorCalculator.calculate_ema(df, *spec.params)}
+        if spec.kind == "rsi":
+            return {"value": IndicatorCalculator.calculate_rsi(df, *spec.params)}
+        if spec.kind == "bb":
+            return IndicatorCalculator.calculate_bollinger_bands(df, *spec.params)
+        if spec.kind == "macd":
+            return IndicatorCalculator.calculate_macd(df, *spec.params)
+        raise ValueError(f"Unknown indicator: {spec.kind}")
+
     @staticmethod
     def calculate_sma(df: pd.DataFrame, period: int = 25) -> pd.Series:
         """単純移動平均 (SMA)"""
@@ -65,22 +154,103 @@ class IndicatorCalculator:
     @staticmethod
     def calculate_volume_profile(
         df: pd.DataFrame,
-        bins: int = 50
-    ) -> Dict[str, List]:
-        """価格帯別出来高分布"""
-        price_min = df['low'].min()
-        price_max = df['high'].max()
-        price_range = price_max - price_min
-        bin_size = price_range / bins
-        
-        volume_profile = {}
-        for i in range(bins):
-            price_level = price_min + (i * bin_size)
-            mask = (df['low'] <= price_level) & (df['high'] >= price_level)
-            volume = df.loc[mask, 'volume'].sum()
-            volume_profile[price_level] = volume
-        
-        return {
-            'prices': list(volume_profile.keys()),
-            'volumes': list(volume_profile.values())
+        bins: int = 50,
+        value_area: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        価格帯別出来高分布
+
+        各足の出来高を、その足の安値〜高値の範囲が重なる価格帯へ重なった幅に
+        比例して配分する（値幅のない足は終値を含む価格帯にすべて配分）。
+        価格帯の境界 e での累積配分量
+            F(e) = Σ 出来高/値幅 × clip(e - 安値, 0, 値幅)
+        を、安値・高値でソートした累積和から全境界まとめて求め、
+        隣り合う境界の差を各価格帯の出来高とする（O((足の数 + bins) log 足の数)）。
+
+        Args:
+            bins: 価格帯の数
+            value_area: 指定すると（例: 0.7）最大出来高の価格帯（POC）と、
+                POCから出来高の多い側へ広げて全体のこの割合を含む価格帯の範囲（バリューエリア）も返す
+
+        Returns:
+            prices: 各価格帯の下限, volumes: 各価格帯の出来高
+            （value_area指定時は poc, value_area_low, value_area_high も）
+        """
+        low = np.asarray(df['low'], dtype='float64')
+        high = np.asarray(df['high'], dtype='float64')
+        close = np.asarray(df['close'], dtype='float64')
+        volume = np.asarray(df['volume'], dtype='float64')
+        valid = ~(np.isnan(low) | np.isnan(high) | np.isnan(volume))
+        low, high, close, volume = low[valid], high[valid], close[valid], volume[valid]
+        if len(low) == 0:
+            return {'prices': [], 'volumes': []}
+
+        price_min = float(low.min())
+        price_max = float(high.max())
+        bin_size = (price_max - price_min) / bins
+        edges = price_min + np.arange(bins + 1) * bin_size
+
+        if bin_size == 0:
+            volumes = np.zeros(bins)
+            volumes[0] = volume.sum()
+        else:
+            span = high - low
+            ranged = span > 0
+
+            # 値幅のある足: 安値から傾き（出来高/値幅）で増え、高値で止まる区分線形関数の和。
+            # 株価が大きく値幅が小さいと 傾き×価格 が巨大になり桁落ちするため、最安値からの差で計算する
+            density = volume[ranged] / span[ranged]
+            offsets = edges - price_min
+            cumulative = (
+                IndicatorCalculator._ramp_sum(offsets, low[ranged] - price_min, density)
+                - IndicatorCalculator._ramp_sum(offsets, high[ranged] - price_min, density)
+            )
+            volumes = np.diff(cumulative)
+
+            # 値幅のない足: 終値（安値〜高値の範囲に収める）を含む価格帯に配分
+            point = np.clip(close[~ranged], low[~ranged], high[~ranged])
+            index = np.minimum(((point - price_min) / bin_size).astype(np.int64), bins - 1)
+            volumes += np.bincount(index, weights=volume[~ranged], minlength=bins)
+
+        volumes = np.maximum(volumes, 0.0)
+        result: Dict[str, Any] = {
+            'prices': edges[:-1].tolist(),
+            'volumes': np.round(volumes).astype(np.int64).tolist()
         }
+
+        if value_area is not None:
+            poc, lo, hi = IndicatorCalculator._value_area(volumes, value_area)
+            result['poc'] = float(edges[poc] + bin_size / 2)
+            result['value_area_low'] = float(edges[lo])
+            result['value_area_high'] = float(edges[hi + 1])
+        return result
+
+    @staticmethod
+    def _ramp_sum(points: np.ndarray, starts: np.ndarray, slopes: np.ndarray) -> np.ndarray:
+        """各点 p について Σ slope × max(p - start, 0) をソート済みの累積和で計算"""
+        order = np.argsort(starts, kind='stable')
+        starts = starts[order]
+        slopes = slopes[order]
+        slope_sum = np.concatenate([[0.0], np.cumsum(slopes)])
+        weighted_sum = np.concatenate([[0.0], np.cumsum(slopes * starts)])
+        # p より前に始まる足の数
+        count = np.searchsorted(starts, points, side='left')
+        return points * slope_sum[count] - weighted_sum[count]
+
+    @staticmethod
+    def _value_area(volumes: np.ndarray, ratio: float) -> Tuple[int, int, int]:
+        """POCと、POCから出来高の多い側へ広げて全体の ratio を含む価格帯の範囲（添字）"""
+        poc = int(np.argmax(volumes))
+        target = volumes.sum() * ratio
+        lo = hi = poc
+        total = volumes[poc]
+        while total < target and (lo > 0 or hi < len(volumes) - 1):
+            below = volumes[lo - 1] if lo > 0 else -1.0
+            above = volumes[hi + 1] if hi < len(volumes) - 1 else -1.0
+            if above >= below:
+                hi += 1
+                total += above
+            else:
+                lo -= 1
+                total += below
+        return poc, lo, hi
@@ -0,0 +1,200 @@
+import argparse
+import csv
+import json
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional, Set
+
+from app.data_fetcher import DataFetcher
+from app.database import SessionLocal, drop_fundamentals_symbol_fk, engine
+from app.fundamental_fetcher import FundamentalFetcher
+from app.models import StockFundamental
+from app.rate_limit import TokenBucket
+
+# 東証上場銘柄一覧
+JPX_STOCKS_CSV = os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'jpx_stocks.csv')
+
+# 同時に取得する銘柄数と、上流への呼び出しレート（件/秒）・バースト
+FUNDAMENTALS_JOB_WORKERS = int(os.getenv("FUNDAMENTALS_JOB_WORKERS", "4"))
+FUNDAMENTALS_JOB_RATE = float(os.getenv("FUNDAMENTALS_JOB_RATE", "2"))
+FUNDAMENTALS_JOB_BURST = float(os.getenv("FUNDAMENTALS_JOB_BURST", "4"))
+# 失敗時の再試行回数と待ち時間の基準（秒、試行ごとに2倍）
+FUNDAMENTALS_JOB_RETRIES = int(os.getenv("FUNDAMENTALS_JOB_RETRIES", "3"))
+FUNDAMENTALS_JOB_BACKOFF = float(os.getenv("FUNDAMENTALS_JOB_BACKOFF", "2"))
+# DBへまとめて書き込む件数
+FUNDAMENTALS_JOB_BATCH = int(os.getenv("FUNDAMENTALS_JOB_BATCH", "100"))
+# 処理済み銘柄を記録するファイル（中断後の再開用）
+FUNDAMENTALS_JOB_CHECKPOINT = os.getenv(
+    "FUNDAMENTALS_JOB_CHECKPOINT", "./cache/fundamentals_refresh.json"
+)
+
+
+def load_universe(csv_path: str = JPX_STOCKS_CSV) -> List[str]:
+    """銘柄マスターからYahoo Finance形式の銘柄コード一覧を作成"""
+    with open(csv_path, 'r', encoding='utf-8') as f:
+        codes = [row['code'].strip() for row in csv.DictReader(f)]
+    return [code if code.endswith('.T') else f"{code}.T" for code in codes if code]
+
+
+class FundamentalsRefreshJob:
+    """
+    全銘柄の財務データを一括更新するジョブ
+
+    - 同時実行数 workers のスレッドプールで取得
+    - 上流への呼び出しはトークンバケットで rate 件/秒に制限
+    - 失敗した銘柄は指数バックオフで retries 回まで再試行
+    - 結果は batch_size 件ごとに stock_fundamentals へまとめて書き込み、
+      書き込み済みの銘柄をチェックポイントに記録する。中断しても次回は
+      未処理の銘柄から再開し、全銘柄が終わるとチェックポイントを削除する。
+    """
+
+    def __init__(
+        self,
+        symbols: Iterable[str],
+        workers: int = FUNDAMENTALS_JOB_WORKERS,
+        rate: float = FUNDAMENTALS_JOB_RATE,
+        burst: float = FUNDAMENTALS_JOB_BURST,
+        retries: int = FUNDAMENTALS_JOB_RETRIES,
+        backoff: float = FUNDAMENTALS_JOB_BACKOFF,
+        batch_size: int = FUNDAMENTALS_JOB_BATCH,
+        checkpoint_path: Optional[str] = FUNDAMENTALS_JOB_CHECKPOINT
+    ):
+        self.symbols = list(dict.fromkeys(symbols))
+        self.workers = workers
+        self.bucket = TokenBucket(rate, burst)
+        self.retries = retries
+        self.backoff = backoff
+        self.batch_size = batch_size
+        self.checkpoint_path = checkpoint_path
+        self.stats = {"saved": 0, "empty": 0, "failed": 0, "skipped": 0}
+
+    def run(self) -> Dict[str, int]:
+        done = self._load_checkpoint()
+        pending = [symbol for symbol in self.symbols if symbol not in done]
+        self.stats["skipped"] = len(self.symbols) - len(pending)
+
+        print(
+            f"Fundamentals refresh: {len(pending)} symbols "
+            f"({self.stats['skipped']} already done), "
+            f"estimated {len(pending) / self.bucket.rate / 60:.1f} min"
+        )
+
+        rows: List[dict] = []
+        finished: List[str] = []
+        started = time.monotonic()
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="fundamentals")
+        try:
+            futures = {executor.submit(self._fetch, symbol): symbol for symbol in pending}
+            for i, future in enumerate(as_completed(futures), 1):
+                symbol = futures[future]
+                try:
+                    data = future.result()
+                except Exception as e:
+                    self.stats["failed"] += 1
+                    print(f"[{symbol}] Giving up after {self.retries + 1} attempts: {e}")
+                    continue
+
+                if data is None:
+                    self.stats["empty"] += 1
+                else:
+                    rows.append(data)
+                finished.append(symbol)
+
+                if len(finished) >= self.batch_size:
+                    self._flush(rows, finished, done)
+                    rows, finished = [], []
+                    elapsed = time.monotonic() - started
+                    print(f"  {i}/{len(pending)} processed ({i / elapsed:.2f}/s)")
+        finally:
+            # 中断時も取得済みの分は保存してから終了する
+            executor.shutdown(wait=True, cancel_futures=True)
+            self._flush(rows, finished, done)
+
+        if self.stats["failed"] == 0:
+            self._clear_checkpoint()
+
+        print(f"Fundamentals refresh finished: {self.stats}")
+        return self.stats
+
+    def _fetch(self, symbol: str) -> Optional[dict]:
+        """1銘柄の財務データを取得（データがない銘柄はNone、失敗時は例外）"""
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            try:
+                info = DataFetcher.get_ticker_info(symbol)
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                wait = self.backoff * (2 ** attempt) + random.uniform(0, self.backoff)
+                print(f"[{symbol}] Fetch failed ({e}), retrying in {wait:.1f}s")
+                time.sleep(wait)
+                continue
+
+            if not info:
+                return None
+            return FundamentalFetcher.parse_fundamental_data(symbol, info)
+
+    def _flush(self, rows: List[dict], finished: List[str], done: Set[str]) -> None:
+        """取得結果をまとめて書き込み、チェックポイントを更新（書き込みに失敗したバッチは記録しない）"""
+        if rows:
+            db = SessionLocal()
+            try:
+                db.bulk_insert_mappings(StockFundamental, rows)
+                db.commit()
+            except Exception as e:
+                # 書き込めなかったバッチは飛ばし、チェックポイントに記録せず次回に再取得する
+                db.rollback()
+                self.stats["failed"] += len(finished)
+                print(f"Failed to save {len(rows)} fundamentals, skipping batch: {e}")
+                return
+            finally:
+                db.close()
+            self.stats["saved"] += len(rows)
+
+        if finished:
+            done.update(finished)
+            self._save_checkpoint(done)
+
+    def _load_checkpoint(self) -> Set[str]:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return set()
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            return set(json.load(f).get("done", []))
+
+    def _save_checkpoint(self, done: Set[str]) -> None:
+        if not self.checkpoint_path:
+            return
+        directory = os.path.dirname(self.checkpoint_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"done": sorted(done)}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _clear_checkpoint(self) -> None:
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+
+if __name__ == "__main__":
+    # 使い方: python -m app.jobs.fundamentals_refresh [--restart] [--limit N] [SYMBOL ...]
+    parser = argparse.ArgumentParser(description="全銘柄の財務データを一括更新")
+    parser.add_argument("symbols", nargs="*", help="対象銘柄（省略時は jpx_stocks.csv の全銘柄）")
+    parser.add_argument("--restart", action="store_true", help="チェックポイントを破棄して最初から実行")
+    parser.add_argument("--limit", type=int, help="先頭から指定件数のみ処理")
+    args = parser.parse_args()
+
+    StockFundamental.__table__.create(bind=engine, checkfirst=True)
+    drop_fundamentals_symbol_fk()
+
+    symbols = [s if s.endswith('.T') else f"{s}.T" for s in args.symbols] or load_universe()
+    if args.limit:
+        symbols = symbols[:args.limit]
+
+    job = FundamentalsRefreshJob(symbols)
+    if args.restart:
+        job._clear_checkpoint()
+    job.run()
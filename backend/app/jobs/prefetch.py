@@ -0,0 +1,146 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from app.async_fetch import fetch_with_db, run_db
+from app.database import SessionLocal
+from app.market_hours import last_close, market_phase, next_close, now_jst
+
+# 大引け後の先読みを行うか
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() in ("1", "true", "yes")
+# 大引けから先読み開始までの待ち時間（秒）。終値が確定してから取得する
+PREFETCH_DELAY = int(os.getenv("PREFETCH_DELAY", "1800"))
+# 同時に先読みする銘柄数
+PREFETCH_CONCURRENCY = int(os.getenv("PREFETCH_CONCURRENCY", "4"))
+# 先読みする時間軸
+PREFETCH_TIMEFRAMES = [
+    tf.strip() for tf in os.getenv("PREFETCH_TIMEFRAMES", "1d,1wk,1mo").split(",") if tf.strip()
+]
+# 1銘柄・1時間軸あたりのタイムアウト（秒）。初回は全期間のバックフィルを含む
+PREFETCH_TIMEOUT = float(os.getenv("PREFETCH_TIMEOUT", "120"))
+
+
+def prefetch_symbols(db) -> List[str]:
+    """ウォッチリストと購入履歴に含まれる銘柄"""
+    from app.models import Stock, StockPurchase, WatchlistStock
+
+    stock_ids = db.query(WatchlistStock.stock_id).union(db.query(StockPurchase.stock_id))
+    rows = db.query(Stock.symbol).filter(Stock.id.in_(stock_ids)).order_by(Stock.symbol).all()
+    return [row.symbol for row in rows]
+
+
+def _load_symbols() -> List[str]:
+    db = SessionLocal()
+    try:
+        return prefetch_symbols(db)
+    finally:
+        db.close()
+
+
+class PrefetchScheduler:
+    """
+    大引け後にウォッチリスト・保有銘柄のチャートを先読みするスケジューラ
+
+    大引けから PREFETCH_DELAY 秒後に、対象銘柄の日足の同期・株価・
+    テクニカル指標を含むチャートデータを PREFETCH_TIMEFRAMES の各時間軸で
+    生成し、各キャッシュを温めておく。同時実行数は PREFETCH_CONCURRENCY。
+    立会時間外に起動した場合は、直近の大引け分を起動直後に実行する。
+    """
+
+    def __init__(
+        self,
+        delay: int = PREFETCH_DELAY,
+        concurrency: int = PREFETCH_CONCURRENCY,
+        timeframes: Optional[List[str]] = None
+    ):
+        self.delay = timedelta(seconds=delay)
+        self.concurrency = max(concurrency, 1)
+        self.timeframes = timeframes or PREFETCH_TIMEFRAMES
+        self._task: Optional[asyncio.Task] = None
+        # 先読み済みの大引け時刻
+        self._last_close_done: Optional[datetime] = None
+        self.last_run: dict = {}
+
+    def next_run(self, now: Optional[datetime] = None) -> datetime:
+        """次に先読みを行う時刻"""
+        now = now or now_jst()
+        close = last_close(now)
+        # 直近の大引け分が未実行なら、立会時間外であればすぐに実行する
+        if self._last_close_done != close and market_phase(now) in ("pre_open", "closed"):
+            return max(now, close + self.delay)
+        return next_close(now) + self.delay
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            run_at = self.next_run()
+            wait = (run_at - now_jst()).total_seconds()
+            if wait > 0:
+                print(f"Next prefetch at {run_at.isoformat()}")
+                await asyncio.sleep(wait)
+
+            close = last_close(now_jst())
+            try:
+                await self.run_once()
+            except Exception as e:
+                print(f"Prefetch error: {e}")
+            self._last_close_done = close
+
+    async def run_once(self) -> dict:
+        """対象銘柄をすべて先読み"""
+        from app.routers.chart import build_chart_response
+
+        started = time.monotonic()
+        symbols = await run_db(_load_symbols)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        failed = []
+
+        async def prefetch(symbol: str) -> None:
+            async with semaphore:
+                for timeframe in self.timeframes:
+                    try:
+                        # 確定前の値でキャッシュされたレスポンスを置き換えるため、キャッシュを参照しない
+                        await fetch_with_db(
+                            build_chart_response, symbol, timeframe, refresh=True,
+                            timeout=PREFETCH_TIMEOUT
+                        )
+                    except Exception as e:
+                        print(f"[{symbol}] Prefetch failed ({timeframe}): {e}")
+                        failed.append(symbol)
+                        return
+
+        print(f"Prefetching {len(symbols)} symbols ({', '.join(self.timeframes)})")
+        await asyncio.gather(*(prefetch(symbol) for symbol in symbols))
+
+        self.last_run = {
+            "finished_at": now_jst().isoformat(),
+            "symbols": len(symbols),
+            "failed": failed,
+            "seconds": round(time.monotonic() - started, 2),
+        }
+        print(f"Prefetch finished: {self.last_run}")
+        return self.last_run
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._task is not None,
+            "next_run": self.next_run().isoformat() if self._task is not None else None,
+            "last_run": self.last_run,
+        }
+
+
+scheduler = PrefetchScheduler()
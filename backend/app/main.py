@@ -1,6 +1,8 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import chart, watchlist, stock, search, purchase, fundamental, company, portfolio
+from fastapi.responses import JSONResponse
+from app.async_fetch import FetchTimeoutError
+from app.routers import chart, watchlist, stock, search, purchase, fundamental, company, portfolio, stream, quotes
 from app.database import init_db
 
 app = FastAPI(
@@ -27,12 +29,37 @@ app.include_router(purchase.router, prefix="/api/purchases", tags=["purchases"])
 app.include_router(fundamental.router, prefix="/api/fundamentals", tags=["fundamentals"])
 app.include_router(company.router, prefix="/api/company", tags=["company"])
 app.include_router(portfolio.router, prefix="/api/portfolio", tags=["portfolio"])
+app.include_router(stream.router, prefix="/api/stream", tags=["stream"])
+app.include_router(quotes.router, prefix="/api/quotes", tags=["quotes"])
+
+@app.exception_handler(FetchTimeoutError)
+async def fetch_timeout_handler(request: Request, exc: FetchTimeoutError):
+    """上流（Yahoo Finance）の応答待ちタイムアウトは504で返す"""
+    return JSONResponse(status_code=504, content={"detail": str(exc)})
 
 @app.on_event("startup")
 async def startup_event():
     """アプリ起動時の初期化"""
     await init_db()
 
+    # 前回保存した指標の逐次計算の状態を読み込む
+    from app.indicator_engine import IndicatorEngine
+    IndicatorEngine.load()
+
+    # 大引け後にウォッチリスト・保有銘柄のチャートを先読み
+    from app.jobs.prefetch import PREFETCH_ENABLED, scheduler
+    if PREFETCH_ENABLED:
+        scheduler.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    from app.jobs.prefetch import scheduler
+    from app.quote_stream import poller
+    from app.indicator_engine import IndicatorEngine
+    await scheduler.stop()
+    await poller.stop()
+    IndicatorEngine.save()
+
 @app.get("/")
 async def root():
     return {"message": "日本株チャートAPI v1.0"}
@@ -40,3 +67,30 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "ok"}
+
+@app.get("/stats")
+async def get_stats():
+    """上流呼び出しの統計（同時リクエストのまとめ込み件数など）"""
+    from app.data_fetcher import DataFetcher
+    from app.price_store import PriceStore
+    from app.quote_cache import QuoteCache
+    from app.jobs.prefetch import scheduler
+    from app.indicator_cache import IndicatorCache
+    from app.indicator_engine import IndicatorEngine
+    from app.cache import ResponseCache
+    from app.quote_stream import poller
+    from app.sparkline import SparklineStore
+    return {
+        "singleflight": {
+            **DataFetcher.singleflight_stats(),
+            "price_sync": PriceStore.singleflight_stats(),
+        },
+        "quote_cache": QuoteCache.stats(),
+        "info_cache": DataFetcher.info_cache_stats(),
+        "indicator_cache": IndicatorCache.stats(),
+        "indicator_engine": IndicatorEngine.stats(),
+        "response_cache": ResponseCache.stats(),
+        "prefetch": scheduler.stats(),
+        "quote_stream": poller.stats(),
+        "sparklines": SparklineStore.stats(),
+    }
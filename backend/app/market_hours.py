@@ -0,0 +1,126 @@
+import os
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional, Set
+
+# 日本時間（夏時間なし）
+JST = timezone(timedelta(hours=9), "JST")
+
+# 東証の立会時間（2024年11月以降の大引け15:30）
+MORNING_OPEN = time(9, 0)
+MORNING_CLOSE = time(11, 30)
+AFTERNOON_OPEN = time(12, 30)
+AFTERNOON_CLOSE = time(15, 30)
+
+# 東証の時間帯で動く指数
+TSE_INDICES = {"^N225", "^TOPX"}
+
+# 追加の休場日（YYYY-MM-DD をカンマ区切り、臨時休場など）
+MARKET_HOLIDAYS: Set[date] = {
+    date.fromisoformat(d.strip())
+    for d in os.getenv("MARKET_HOLIDAYS", "").split(",")
+    if d.strip()
+}
+
+try:
+    import jpholiday
+except ImportError:
+    jpholiday = None
+
+
+def now_jst() -> datetime:
+    return datetime.now(JST)
+
+
+def is_tse_symbol(symbol: str) -> bool:
+    """東証の取引時間に従う銘柄か（為替・海外指数は対象外）"""
+    return symbol.endswith(".T") or symbol in TSE_INDICES
+
+
+def is_trading_day(day: date) -> bool:
+    """
+    東証の営業日か
+
+    土日・年末年始（12/31〜1/3）・MARKET_HOLIDAYSは休場。
+    祝日はjpholidayがインストールされていれば判定する。
+    """
+    if day.weekday() >= 5:
+        return False
+    if (day.month == 12 and day.day == 31) or (day.month == 1 and day.day <= 3):
+        return False
+    if day in MARKET_HOLIDAYS:
+        return False
+    if jpholiday is not None and jpholiday.is_holiday(day):
+        return False
+    return True
+
+
+def _at(day: date, t: time) -> datetime:
+    return datetime.combine(day, t, tzinfo=JST)
+
+
+def market_phase(now: Optional[datetime] = None) -> str:
+    """
+    現在の市場の状態
+
+    Returns:
+        'morning'（前場）, 'lunch'（昼休み）, 'afternoon'（後場）,
+        'pre_open'（営業日の寄り付き前）, 'closed'（大引け後・休場日）
+    """
+    now = (now or now_jst()).astimezone(JST)
+    if not is_trading_day(now.date()):
+        return "closed"
+
+    t = now.time()
+    if t < MORNING_OPEN:
+        return "pre_open"
+    if t < MORNING_CLOSE:
+        return "morning"
+    if t < AFTERNOON_OPEN:
+        return "lunch"
+    if t < AFTERNOON_CLOSE:
+        return "afternoon"
+    return "closed"
+
+
+def is_session_open(now: Optional[datetime] = None) -> bool:
+    """立会時間中か（昼休みを除く）"""
+    return market_phase(now) in ("morning", "afternoon")
+
+
+def next_open(now: Optional[datetime] = None) -> datetime:
+    """次の立会開始時刻（前場の寄り付き、昼休み中は後場の開始）"""
+    now = (now or now_jst()).astimezone(JST)
+    phase = market_phase(now)
+    if phase == "pre_open":
+        return _at(now.date(), MORNING_OPEN)
+    if phase == "lunch":
+        return _at(now.date(), AFTERNOON_OPEN)
+    if phase in ("morning", "afternoon"):
+        return now
+
+    day = now.date() + timedelta(days=1)
+    while not is_trading_day(day):
+        day += timedelta(days=1)
+    return _at(day, MORNING_OPEN)
+
+
+def last_close(now: Optional[datetime] = None) -> datetime:
+    """直近の大引け時刻（現在が大引け後ならその日の大引け）"""
+    now = (now or now_jst()).astimezone(JST)
+    day = now.date()
+    if not (is_trading_day(day) and now.time() >= AFTERNOON_CLOSE):
+        day -= timedelta(days=1)
+        while not is_trading_day(day):
+            day -= timedelta(days=1)
+    return _at(day, AFTERNOON_CLOSE)
+
+
+def next_close(now: Optional[datetime] = None) -> datetime:
+    """次の大引け時刻（現在が立会日の大引け前ならその日の大引け）"""
+    now = (now or now_jst()).astimezone(JST)
+    day = now.date()
+    if not (is_trading_day(day) and now.time() < AFTERNOON_CLOSE):
+        day += timedelta(days=1)
+        while not is_trading_day(day):
+            day += timedelta(days=1)
+    return _at(day, AFTERNOON_CLOSE)
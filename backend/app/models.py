@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DECIMAL, BigInteger, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DECIMAL, Float, BigInteger, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 from datetime import datetime
@@ -15,7 +15,11 @@ class Stock(Base):
 
     prices = relationship("StockPrice", back_populates="stock")
     purchases = relationship("StockPurchase", back_populates="stock")
-    fundamentals = relationship("StockFundamental", back_populates="stock")
+    fundamentals = relationship(
+        "StockFundamental",
+        primaryjoin="Stock.symbol == foreign(StockFundamental.symbol)",
+        back_populates="stock"
+    )
 
 class StockPrice(Base):
     __tablename__ = "stock_prices"
@@ -23,14 +27,26 @@ class StockPrice(Base):
     id = Column(Integer, primary_key=True)
     symbol = Column(String(20), ForeignKey("stocks.symbol"), nullable=False)
     date = Column(DateTime, nullable=False)
-    open = Column(DECIMAL(12, 2))
-    high = Column(DECIMAL(12, 2))
-    low = Column(DECIMAL(12, 2))
-    close = Column(DECIMAL(12, 2))
+    # 為替（USDJPY=Xなど）は小数3桁以上で気配値が付くため、丸めずに浮動小数点で保存する
+    open = Column(Float)
+    high = Column(Float)
+    low = Column(Float)
+    close = Column(Float)
     volume = Column(BigInteger)
     
     stock = relationship("Stock", back_populates="prices")
 
+    __table_args__ = (
+        Index("ix_stock_prices_symbol_date", "symbol", "date", unique=True),
+    )
+
+class StockPriceSync(Base):
+    __tablename__ = "stock_price_sync"
+
+    symbol = Column(String(20), primary_key=True)
+    covered_from = Column(DateTime)  # この日付以降の日足はすべて stock_prices に保存済み
+    last_synced_at = Column(DateTime)  # 最後に上流（Yahoo）へ問い合わせた日時
+
 class Watchlist(Base):
     __tablename__ = "watchlists"
 
@@ -63,7 +79,8 @@ class StockFundamental(Base):
     __tablename__ = "stock_fundamentals"
 
     id = Column(Integer, primary_key=True, index=True)
-    symbol = Column(String(20), ForeignKey("stocks.symbol"), nullable=False, index=True)
+    # 全銘柄の一括更新（stocksに登録していない銘柄）も保存するため外部キーにしない
+    symbol = Column(String(20), nullable=False, index=True)
     date = Column(DateTime, nullable=False, index=True)
 
     # 基本財務指標
@@ -86,7 +103,11 @@ class StockFundamental(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # リレーション
-    stock = relationship("Stock", back_populates="fundamentals")
+    stock = relationship(
+        "Stock",
+        primaryjoin="Stock.symbol == foreign(StockFundamental.symbol)",
+        back_populates="fundamentals"
+    )
 
 class CompanyInfo(Base):
     __tablename__ = "company_info"
@@ -0,0 +1,293 @@
+import math
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app.bar_cache import BarCache, BarSeries
+from app.models import StockPrice, StockPriceSync
+from app.resample import bucket_start, resample_bars
+from app.singleflight import SingleFlight
+from app.sparkline import SparklineStore
+
+# 同一銘柄の上流問い合わせ間隔（秒）。この間隔内はDBの足のみで応答する
+PRICE_SYNC_INTERVAL = int(os.getenv("PRICE_SYNC_INTERVAL", "300"))
+
+# period='max' の開始日として扱う日付
+HISTORY_EPOCH = datetime(1900, 1, 1)
+
+PRICE_COLUMNS = ['date', 'open', 'high', 'low', 'close', 'volume']
+
+# 同一銘柄の同時同期は1回にまとめる（後続はリーダーの同期結果を共有）
+_sync_flight = SingleFlight("price_sync")
+
+
+def period_start(period: str, now: Optional[datetime] = None) -> datetime:
+    """
+    yfinance形式のperiodを開始日に変換
+
+    Args:
+        period: 期間（'1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max'）
+    """
+    now = now or datetime.utcnow()
+    today = datetime(now.year, now.month, now.day)
+
+    if period == 'max':
+        return HISTORY_EPOCH
+    if period == 'ytd':
+        return datetime(now.year, 1, 1)
+    if period.endswith('mo'):
+        return (today - pd.DateOffset(months=int(period[:-2]))).to_pydatetime()
+    if period.endswith('y'):
+        return (today - pd.DateOffset(years=int(period[:-1]))).to_pydatetime()
+    if period.endswith('d'):
+        return today - timedelta(days=int(period[:-1]))
+    raise ValueError(f"Unsupported period: {period}")
+
+
+def warmup_start(start: datetime, timeframe: str, bars: int) -> datetime:
+    """
+    startより前に指標の助走期間としてbars本の足が含まれる日
+
+    日足は営業日の比率（年245日程度）と祝日のゆとりを見込んで暦日に換算する。
+    """
+    if bars <= 0 or start <= HISTORY_EPOCH:
+        return start
+    if timeframe == "1wk":
+        days = (bars + 1) * 7
+    elif timeframe == "1mo":
+        days = (bars + 1) * 31
+    else:
+        days = int(bars * 1.5) + 10
+    return max(start - timedelta(days=days), HISTORY_EPOCH)
+
+
+class PriceStore:
+    """
+    stock_prices テーブルを使った日足の永続ストア
+
+    一度取得した足はすべて保存し、以降は最終保存日以降の差分のみを
+    Yahoo Financeから取得する。
+    """
+
+    @staticmethod
+    def sync(
+        db: Session,
+        symbol: str,
+        period: str = "2y",
+        start: Optional[datetime] = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        保存済みの日足を上流と同期
+
+        - 開始日（startまたはperiodから算出）以降が未取得の場合はその範囲を取得（バックフィル）
+        - それ以外は最終保存日の1本前以降の足のみ取得（最終足は確定値で置き換え）
+        - 上流の株価は分割・配当を調整済みのため、1本前の確定足の終値が保存済みの値と
+          異なる場合は過去の足の調整が変わったとみなし、保存済みの全期間を取得し直す
+
+        Returns:
+            新たに保存（または置き換え）した足、上流に問い合わせなかった場合はNone
+        """
+        from app.data_fetcher import DataFetcher
+
+        now = datetime.utcnow()
+        start = start or period_start(period, now)
+        state = db.get(StockPriceSync, symbol)
+
+        latest = db.query(StockPrice.date, StockPrice.close).filter(
+            StockPrice.symbol == symbol
+        ).order_by(StockPrice.date.desc()).limit(2).all()
+        last_date = latest[0].date if latest else None
+
+        needs_backfill = (
+            state is None
+            or state.covered_from is None
+            or last_date is None
+            or start < state.covered_from
+        )
+
+        if not needs_backfill and state.last_synced_at and \
+                now - state.last_synced_at < timedelta(seconds=PRICE_SYNC_INTERVAL):
+            return None
+
+        if needs_backfill:
+            df = PriceStore._fetch_since(symbol, start)
+        else:
+            # 確定済みの1本前の足から取得し、保存済みの終値と照合する
+            check = latest[-1]
+            print(f"[{symbol}] Fetching daily bars since {check.date:%Y-%m-%d}")
+            df = DataFetcher.fetch_stock_data(symbol, interval="1d", start=check.date)
+            if PriceStore._adjustment_changed(df, check.date, float(check.close)):
+                print(f"[{symbol}] Price adjustment changed, re-backfilling stored history")
+                df = PriceStore._fetch_since(symbol, state.covered_from)
+                if df is not None and not df.empty:
+                    # 調整前の基準の足を残さないよう、保存済みの足をすべて置き換える
+                    db.query(StockPrice).filter(
+                        StockPrice.symbol == symbol
+                    ).delete(synchronize_session=False)
+
+        if df is not None and not df.empty:
+            df = PriceStore._replace_from(db, symbol, df)
+
+        if state is None:
+            state = StockPriceSync(symbol=symbol)
+            db.add(state)
+        if needs_backfill and df is not None:
+            if last_date is None or state.covered_from is None:
+                # 保存済みの足がなかった場合（銘柄の削除後など）は、以前の取得範囲を引き継がない
+                state.covered_from = start
+            else:
+                state.covered_from = min(start, state.covered_from)
+        state.last_synced_at = now
+        db.commit()
+        return df
+
+    @staticmethod
+    def _fetch_since(symbol: str, start: datetime) -> Optional[pd.DataFrame]:
+        from app.data_fetcher import DataFetcher
+
+        if start <= HISTORY_EPOCH:
+            print(f"[{symbol}] Backfilling full daily history")
+            return DataFetcher.fetch_stock_data(symbol, period="max", interval="1d")
+        print(f"[{symbol}] Backfilling daily bars since {start:%Y-%m-%d}")
+        return DataFetcher.fetch_stock_data(symbol, interval="1d", start=start)
+
+    @staticmethod
+    def _adjustment_changed(df: Optional[pd.DataFrame], date: datetime, stored_close: float) -> bool:
+        """取得した足のうち date の終値が保存済みの終値と異なるか（分割・配当による再調整）"""
+        if df is None or df.empty:
+            return False
+        row = df.loc[df['date'] == pd.Timestamp(date), 'close']
+        if row.empty or pd.isna(row.iloc[0]):
+            return False
+        return not math.isclose(float(row.iloc[0]), stored_close, rel_tol=1e-4, abs_tol=1e-6)
+
+    @staticmethod
+    def delete(db: Session, symbol: str) -> None:
+        """
+        銘柄の保存済みの日足・同期状態・日足キャッシュを削除（コミットは呼び出し側で行う）
+
+        同期状態を残すと、次回の同期で以前の取得範囲が保存済みとみなされてしまう。
+        """
+        db.query(StockPrice).filter(StockPrice.symbol == symbol).delete(synchronize_session=False)
+        db.query(StockPriceSync).filter(StockPriceSync.symbol == symbol).delete(synchronize_session=False)
+        BarCache.remove(symbol, "1d")
+
+    @staticmethod
+    def singleflight_stats() -> dict:
+        return _sync_flight.stats()
+
+    @staticmethod
+    def _replace_from(db: Session, symbol: str, df: pd.DataFrame) -> pd.DataFrame:
+        """dfの先頭日以降の保存済み足を削除し、dfの足で置き換える"""
+        df = df.dropna(subset=['open', 'high', 'low', 'close']).copy()
+        if df.empty:
+            return df
+
+        first_date = df['date'].iloc[0].to_pydatetime()
+        db.query(StockPrice).filter(
+            StockPrice.symbol == symbol,
+            StockPrice.date >= first_date
+        ).delete(synchronize_session=False)
+
+        rows = [
+            {
+                "symbol": symbol,
+                "date": date.to_pydatetime(),
+                "open": float(open_),
+                "high": float(high),
+                "low": float(low),
+                "close": float(close),
+                "volume": int(volume) if pd.notna(volume) else 0,
+            }
+            for date, open_, high, low, close, volume in zip(
+                df['date'], df['open'], df['high'], df['low'], df['close'], df['volume']
+            )
+        ]
+        db.bulk_insert_mappings(StockPrice, rows)
+        return df
+
+    @staticmethod
+    def load(
+        db: Session,
+        symbol: str,
+        start: Optional[datetime] = None
+    ) -> Optional[pd.DataFrame]:
+        """保存済みの日足をDataFrameで取得（fetch_stock_dataと同じカラム構成）"""
+        query = db.query(
+            StockPrice.date,
+            StockPrice.open,
+            StockPrice.high,
+            StockPrice.low,
+            StockPrice.close,
+            StockPrice.volume
+        ).filter(StockPrice.symbol == symbol)
+
+        if start is not None:
+            query = query.filter(StockPrice.date >= start)
+
+        rows = query.order_by(StockPrice.date).all()
+        if not rows:
+            return None
+
+        df = pd.DataFrame(rows, columns=PRICE_COLUMNS)
+        df['date'] = pd.to_datetime(df['date'])
+        for col in ['open', 'high', 'low', 'close']:
+            df[col] = df[col].astype(float)
+        df['volume'] = df['volume'].fillna(0).astype('int64')
+        return df
+
+    @staticmethod
+    def get_history(
+        db: Session,
+        symbol: str,
+        start: datetime,
+        timeframe: str = "1d"
+    ) -> Optional[BarSeries]:
+        """
+        startの日以降が揃うよう日足を差分同期し、保存済みの全期間の足を列指向で返す
+
+        差分同期した日足はメモリマップドキャッシュへ追記し、キャッシュ上のビューを使う。
+        週足・月足は同じ日足キャッシュからローカルで生成するため、
+        時間軸や表示期間を切り替えても上流への問い合わせは発生しない。
+        返す足は期間によらず同じため、指標の計算結果も期間をまたいで共有できる。
+
+        Args:
+            symbol: 銘柄コード（例: '7203.T'）
+            start: 必要な最初の日
+            timeframe: 時間軸（'1d', '1wk', '1mo'）
+        """
+        # 先頭の週・月が欠けないよう、同期範囲をその週・月の初日まで広げる。
+        # 同期範囲は時間軸によらず同じにして、日足・週足・月足で1回の取得を共有する
+        sync_start = min(bucket_start(start, "1wk"), bucket_start(start, "1mo"))
+
+        delta = None
+        try:
+            delta = _sync_flight.do(
+                (symbol, sync_start), PriceStore.sync, db, symbol, start=sync_start
+            )
+        except Exception as e:
+            db.rollback()
+            print(f"Error syncing prices for {symbol}: {e}")
+
+        refreshed = delta is not None and not delta.empty
+        bars = BarCache.read(symbol, "1d")
+        if bars is None or not BarCache.append(symbol, "1d", delta):
+            df = PriceStore.load(db, symbol)
+            if df is None:
+                return None
+            # 置き換えできなかった場合（Windowsでマップ中など）は古いファイルを使わずDBの足を返す
+            bars = BarCache.read(symbol, "1d") if BarCache.write(symbol, "1d", df) else None
+            if bars is None:
+                bars = BarSeries.from_frame(df)
+            refreshed = True
+        elif refreshed:
+            bars = BarCache.read(symbol, "1d")
+
+        # 日足が更新されたらスパークラインも作り直す
+        if refreshed:
+            SparklineStore.update(symbol, bars.close)
+
+        return resample_bars(bars, timeframe)
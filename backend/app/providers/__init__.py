@@ -0,0 +1,38 @@
+# Market data providers
+import os
+from functools import lru_cache
+
+from app.providers.base import MarketDataProvider
+
+# 取得元: 'yahoo'（既定）または 'local'（フィクスチャ／合成データ）
+MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "yahoo")
+MARKET_DATA_FIXTURES = os.getenv(
+    "MARKET_DATA_FIXTURES",
+    os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'fixtures')
+)
+# localの呼び出しごとの待ち時間（例: '0.3' または 'history=0.35,info=0.9'）
+MARKET_DATA_LATENCY = os.getenv("MARKET_DATA_LATENCY", "")
+# localの合成データの最終日（YYYY-MM-DD、未指定なら当日）
+MARKET_DATA_END_DATE = os.getenv("MARKET_DATA_END_DATE")
+
+
+@lru_cache(maxsize=1)
+def get_provider() -> MarketDataProvider:
+    """設定に応じた取得元を返す"""
+    if MARKET_DATA_PROVIDER == "local":
+        from app.providers.local import LocalProvider, _parse_latency
+        print(f"Using local market data provider (fixtures: {MARKET_DATA_FIXTURES})")
+        return LocalProvider(
+            fixtures_dir=MARKET_DATA_FIXTURES,
+            latency=_parse_latency(MARKET_DATA_LATENCY),
+            end_date=MARKET_DATA_END_DATE
+        )
+
+    if MARKET_DATA_PROVIDER != "yahoo":
+        print(f"Unknown MARKET_DATA_PROVIDER '{MARKET_DATA_PROVIDER}', using yahoo")
+
+    from app.providers.yahoo import YahooProvider
+    return YahooProvider()
+
+
+__all__ = ['MarketDataProvider', 'get_provider']
@@ -0,0 +1,41 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Optional
+
+import pandas as pd
+
+
+class MarketDataProvider(ABC):
+    """
+    株価・企業情報の取得元
+
+    戻り値はyfinanceと同じ形式に揃える:
+    - history: 日時インデックス（Date）、Open/High/Low/Close/Volume列のDataFrame
+    - download: (価格種別, 銘柄) のMultiIndex列を持つDataFrame
+    - info: ticker.info と同じキーを持つ辞書
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def history(
+        self,
+        symbol: str,
+        period: str = "1y",
+        interval: str = "1d",
+        start: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        """1銘柄の足データ（startを指定した場合はperiodより優先）"""
+
+    @abstractmethod
+    def download(
+        self,
+        symbols: List[str],
+        period: str = "5d",
+        interval: str = "1d"
+    ) -> pd.DataFrame:
+        """複数銘柄の足データを1回でまとめて取得"""
+
+    @abstractmethod
+    def info(self, symbol: str) -> dict:
+        """企業情報・財務指標"""
@@ -0,0 +1,224 @@
+import json
+import os
+import re
+import sys
+import time
+import zlib
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.providers.base import MarketDataProvider
+
+# 合成データの開始日
+SYNTHETIC_START = "2000-01-03"
+
+_OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def _fixture_name(symbol: str) -> str:
+    return re.sub(r'[^0-9A-Za-z._^=-]', '_', symbol)
+
+
+def _parse_latency(value: str) -> Dict[str, float]:
+    """
+    遅延設定をパース
+
+    '0.3' のような単一値、または 'history=0.35,info=0.9,download=0.6' の形式
+    """
+    latency = {}
+    for part in filter(None, (p.strip() for p in value.split(','))):
+        if '=' in part:
+            method, seconds = part.split('=', 1)
+            latency[method.strip()] = float(seconds)
+        else:
+            latency['default'] = float(part)
+    return latency
+
+
+@lru_cache(maxsize=256)
+def _synthetic_daily(symbol: str, end: str) -> pd.DataFrame:
+    """
+    銘柄コードから決定的に生成した日足（同じ銘柄なら過去の足は常に同じ値）
+
+    乱数は1日1行で順に生成するため、終了日が延びても既存の足は変わらない。
+    """
+    dates = pd.bdate_range(SYNTHETIC_START, end, tz="Asia/Tokyo", name="Date")
+    seed = zlib.crc32(symbol.encode())
+    rng = np.random.default_rng(seed)
+    noise = rng.standard_normal((len(dates), 5))
+
+    base = 300 + seed % 9700
+    close = base * np.exp(np.cumsum(0.015 * noise[:, 0]))
+    prev_close = np.concatenate([[base], close[:-1]])
+    open_ = prev_close * (1 + 0.006 * noise[:, 1])
+    high = np.maximum(open_, close) * (1 + np.abs(0.008 * noise[:, 2]))
+    low = np.minimum(open_, close) * (1 - np.abs(0.008 * noise[:, 3]))
+    volume = np.exp(13 + 0.5 * noise[:, 4]).astype('int64')
+
+    return pd.DataFrame(
+        {'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume},
+        index=dates
+    )
+
+
+class LocalProvider(MarketDataProvider):
+    """
+    ネットワークを使わない決定的な取得元（ベンチマーク・負荷試験用）
+
+    fixtures_dir に記録済みのファイルがあればそれを返し、なければ銘柄コードから
+    合成したデータを返す。
+    - {symbol}.csv: 日足（Date, Open, High, Low, Close, Volume）
+    - {symbol}_info.json: ticker.info の辞書
+
+    latencyで呼び出しごとの待ち時間（秒）を指定すると、本番の応答時間を再現できる。
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        fixtures_dir: Optional[str] = None,
+        latency: Optional[Dict[str, float]] = None,
+        end_date: Optional[str] = None
+    ):
+        self.fixtures_dir = fixtures_dir
+        self.latency = latency or {}
+        self.end_date = end_date
+
+    def _sleep(self, method: str) -> None:
+        seconds = self.latency.get(method, self.latency.get('default', 0.0))
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def _fixture_path(self, symbol: str, suffix: str) -> Optional[str]:
+        if not self.fixtures_dir:
+            return None
+        path = os.path.join(self.fixtures_dir, f"{_fixture_name(symbol)}{suffix}")
+        return path if os.path.exists(path) else None
+
+    def _daily(self, symbol: str) -> pd.DataFrame:
+        path = self._fixture_path(symbol, ".csv")
+        if path:
+            df = pd.read_csv(path, index_col='Date')
+            df.index = pd.to_datetime(df.index, utc=True).tz_convert("Asia/Tokyo")
+            df.index.name = 'Date'
+            return df[_OHLCV]
+
+        end = self.end_date or datetime.now().strftime('%Y-%m-%d')
+        return _synthetic_daily(symbol, end)
+
+    def history(
+        self,
+        symbol: str,
+        period: str = "1y",
+        interval: str = "1d",
+        start: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        from app.price_store import period_start
+
+        self._sleep('history')
+        df = self._daily(symbol)
+
+        if start is None and period.endswith('d'):
+            # yfinanceと同様に 'Nd' は直近N営業日
+            df = df.tail(int(period[:-1]))
+        else:
+            start = start if start is not None else period_start(period)
+            df = df[df.index.tz_localize(None) >= pd.Timestamp(start)]
+
+        if interval == '1wk':
+            df = self._resample(df, 'W-MON')
+        elif interval == '1mo':
+            df = self._resample(df, 'MS')
+
+        return df.copy()
+
+    @staticmethod
+    def _resample(df: pd.DataFrame, rule: str) -> pd.DataFrame:
+        return df.resample(rule, label='left', closed='left').agg({
+            'Open': 'first',
+            'High': 'max',
+            'Low': 'min',
+            'Close': 'last',
+            'Volume': 'sum',
+        }).dropna(subset=['Close'])
+
+    def download(
+        self,
+        symbols: List[str],
+        period: str = "5d",
+        interval: str = "1d"
+    ) -> pd.DataFrame:
+        self._sleep('download')
+        frames = {
+            symbol: self.history(symbol, period=period, interval=interval)
+            for symbol in symbols
+        }
+        return pd.concat(frames, axis=1).swaplevel(0, 1, axis=1).sort_index(axis=1)
+
+    def info(self, symbol: str) -> dict:
+        self._sleep('info')
+        path = self._fixture_path(symbol, "_info.json")
+        if path:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+
+        seed = zlib.crc32(symbol.encode())
+        close = float(self._daily(symbol)['Close'].iloc[-1])
+        shares = 10_000_000 * (1 + seed % 500)
+        eps = close / (8 + seed % 25)
+        bps = close / (0.6 + (seed % 30) / 10)
+        return {
+            "symbol": symbol,
+            "longName": f"Synthetic {symbol}",
+            "longBusinessSummary": f"Deterministic synthetic company for {symbol}.",
+            "industry": "Synthetic",
+            "sector": "Synthetic",
+            "website": "https://example.com",
+            "fullTimeEmployees": 100 + seed % 100000,
+            "city": "Tokyo",
+            "country": "Japan",
+            "previousClose": close,
+            "marketCap": int(close * shares),
+            "trailingPE": close / eps,
+            "priceToBook": close / bps,
+            "epsTrailingTwelveMonths": eps,
+            "bookValue": bps,
+            "returnOnEquity": eps / bps,
+            "dividendYield": round((seed % 500) / 100, 2),
+            "totalRevenue": int(eps * shares * 12),
+            "operatingIncome": int(eps * shares * 1.5),
+            "netIncomeToCommon": int(eps * shares),
+        }
+
+
+def record_fixtures(symbols: List[str], fixtures_dir: str) -> None:
+    """Yahoo Financeから日足（全期間）とinfoを取得してフィクスチャとして保存"""
+    from app.providers.yahoo import YahooProvider
+
+    provider = YahooProvider()
+    os.makedirs(fixtures_dir, exist_ok=True)
+
+    for symbol in symbols:
+        name = _fixture_name(symbol)
+        df = provider.history(symbol, period="max", interval="1d")
+        if df.empty:
+            print(f"[{symbol}] No history available, skipped")
+            continue
+        df[_OHLCV].to_csv(os.path.join(fixtures_dir, f"{name}.csv"), index_label='Date')
+
+        with open(os.path.join(fixtures_dir, f"{name}_info.json"), 'w', encoding='utf-8') as f:
+            json.dump(provider.info(symbol), f, ensure_ascii=False, default=str)
+
+        print(f"[{symbol}] Recorded {len(df)} bars")
+
+
+if __name__ == "__main__":
+    # 使い方: python -m app.providers.local 7203.T 6758.T ...
+    from app.providers import MARKET_DATA_FIXTURES
+
+    record_fixtures(sys.argv[1:], MARKET_DATA_FIXTURES)
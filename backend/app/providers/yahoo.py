@@ -0,0 +1,44 @@
+from datetime import datetime
+from typing import List, Optional
+
+import pandas as pd
+import yfinance as yf
+
+from app.providers.base import MarketDataProvider
+
+
+class YahooProvider(MarketDataProvider):
+    """Yahoo Finance（yfinance）から取得"""
+
+    name = "yahoo"
+
+    def history(
+        self,
+        symbol: str,
+        period: str = "1y",
+        interval: str = "1d",
+        start: Optional[datetime] = None
+    ) -> pd.DataFrame:
+        ticker = yf.Ticker(symbol)
+        if start is not None:
+            return ticker.history(start=start.strftime('%Y-%m-%d'), interval=interval)
+        return ticker.history(period=period, interval=interval)
+
+    def download(
+        self,
+        symbols: List[str],
+        period: str = "5d",
+        interval: str = "1d"
+    ) -> pd.DataFrame:
+        return yf.download(
+            symbols,
+            period=period,
+            interval=interval,
+            group_by='column',
+            auto_adjust=True,
+            progress=False,
+            threads=True
+        )
+
+    def info(self, symbol: str) -> dict:
+        return yf.Ticker(symbol).info
@@ -0,0 +1,78 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from app.market_hours import (
+    JST, MORNING_CLOSE, is_tse_symbol, last_close, market_phase, next_open, now_jst
+)
+
+# 立会時間中のキャッシュ有効期間（秒）
+QUOTE_TTL_OPEN = int(os.getenv("QUOTE_TTL_OPEN", "60"))
+# 大引け・前引け直後は終値の確定を待つため、この時間（秒）は立会中と同じ扱いにする
+QUOTE_CLOSE_GRACE = int(os.getenv("QUOTE_CLOSE_GRACE", "1200"))
+
+
+class QuoteCache:
+    """
+    東証の立会時間を考慮した株価キャッシュ
+
+    - 立会時間中: QUOTE_TTL_OPEN 秒
+    - 昼休み: 後場の開始まで
+    - 寄り付き前・大引け後・休場日: 次の寄り付きまで（上流への問い合わせなし）
+    - 為替・海外指数など東証以外: 常に QUOTE_TTL_OPEN 秒
+    """
+
+    _lock = threading.Lock()
+    # symbol -> (quote, 有効期限)
+    _entries: Dict[str, Tuple[dict, datetime]] = {}
+    hits = 0
+    misses = 0
+
+    @staticmethod
+    def expires_at(symbol: str, now: Optional[datetime] = None) -> datetime:
+        """いま取得した株価の有効期限"""
+        now = (now or now_jst()).astimezone(JST)
+        short = now + timedelta(seconds=QUOTE_TTL_OPEN)
+        if not is_tse_symbol(symbol):
+            return short
+
+        phase = market_phase(now)
+        if phase in ("morning", "afternoon"):
+            return short
+
+        # 前引け・大引け直後は終値が反映されるまで短い有効期間のまま
+        if phase == "lunch":
+            session_end = datetime.combine(now.date(), MORNING_CLOSE, tzinfo=JST)
+        else:
+            session_end = last_close(now)
+        if now - session_end < timedelta(seconds=QUOTE_CLOSE_GRACE):
+            return short
+
+        return next_open(now)
+
+    @staticmethod
+    def get(symbol: str, now: Optional[datetime] = None) -> Optional[dict]:
+        now = now or now_jst()
+        with QuoteCache._lock:
+            entry = QuoteCache._entries.get(symbol)
+            if entry and entry[1] > now:
+                QuoteCache.hits += 1
+                return dict(entry[0])
+            QuoteCache.misses += 1
+            return None
+
+    @staticmethod
+    def put(symbol: str, quote: dict, now: Optional[datetime] = None) -> None:
+        expires = QuoteCache.expires_at(symbol, now)
+        with QuoteCache._lock:
+            QuoteCache._entries[symbol] = (dict(quote), expires)
+
+    @staticmethod
+    def stats() -> Dict[str, int]:
+        with QuoteCache._lock:
+            return {
+                "entries": len(QuoteCache._entries),
+                "hits": QuoteCache.hits,
+                "misses": QuoteCache.misses,
+            }
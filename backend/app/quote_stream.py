@@ -0,0 +1,194 @@
+import asyncio
+import math
+import os
+from typing import Dict, Iterable, Optional, Set
+
+import numpy as np
+
+from app.async_fetch import fetch
+from app.symbols import to_yahoo_symbol
+
+# 購読中の銘柄を問い合わせる間隔（秒）。
+# 上流への実際の問い合わせは QuoteCache の有効期間（立会中は QUOTE_TTL_OPEN 秒）ごと
+STREAM_POLL_INTERVAL = float(os.getenv("STREAM_POLL_INTERVAL", "15"))
+# 1クライアントが購読できる銘柄数
+STREAM_MAX_SYMBOLS = int(os.getenv("STREAM_MAX_SYMBOLS", "100"))
+
+# 変化の判定に使う項目
+_QUOTE_FIELDS = ("current_price", "previous_close", "market_time")
+
+
+class QuoteSubscriber:
+    """
+    ストリーミング接続1件分の購読状態
+
+    配信待ちの株価は銘柄ごとに最新の1件だけを保持するため、
+    クライアントの受信が遅れても古い株価が溜まらない。
+    """
+
+    def __init__(self):
+        self.symbols: Set[str] = set()
+        self._pending: Dict[str, dict] = {}
+        self._event = asyncio.Event()
+
+    def push(self, symbol: str, quote: dict) -> None:
+        self._pending[symbol] = quote
+        self._event.set()
+
+    async def next(self) -> Dict[str, dict]:
+        """配信待ちの株価をまとめて取得（なければ届くまで待つ）"""
+        await self._event.wait()
+        self._event.clear()
+        quotes, self._pending = self._pending, {}
+        return quotes
+
+
+class QuotePoller:
+    """
+    購読中の銘柄の株価を共有して問い合わせるポーラー
+
+    接続数によらず、購読中の銘柄ごとに interval 秒に1回だけ株価を取得し、
+    前回から変化した株価だけをその銘柄の購読者へ配信する。
+    購読者がいる間だけバックグラウンドで動作する。
+    """
+
+    def __init__(self, interval: float = STREAM_POLL_INTERVAL):
+        self.interval = interval
+        self._subscribers: Dict[str, Set[QuoteSubscriber]] = {}
+        self._latest: Dict[str, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self.polls = 0
+        self.fetches = 0
+        self.pushes = 0
+
+    def subscribe(self, subscriber: QuoteSubscriber, symbols: Iterable[str]) -> None:
+        """
+        銘柄を購読に追加
+
+        購読数が STREAM_MAX_SYMBOLS を超える場合は何も登録せずに ValueError を送出する。
+        """
+        new_symbols = [s for s in dict.fromkeys(symbols) if s not in subscriber.symbols]
+        if len(subscriber.symbols) + len(new_symbols) > STREAM_MAX_SYMBOLS:
+            raise ValueError(f"Too many symbols (max {STREAM_MAX_SYMBOLS})")
+
+        added = False
+        for symbol in new_symbols:
+            subscriber.symbols.add(symbol)
+            if symbol not in self._subscribers:
+                added = True
+            self._subscribers.setdefault(symbol, set()).add(subscriber)
+            # 取得済みの株価があればすぐに配信する
+            if symbol in self._latest:
+                subscriber.push(symbol, self._latest[symbol])
+        self._ensure_running()
+        # 新しい銘柄は次の周期を待たずに取得する
+        if added and self._wake is not None:
+            self._wake.set()
+
+    def unsubscribe(self, subscriber: QuoteSubscriber, symbols: Optional[Iterable[str]] = None) -> None:
+        """購読を解除（symbols省略時はすべて）"""
+        for symbol in list(subscriber.symbols if symbols is None else symbols):
+            subscriber.symbols.discard(symbol)
+            subscribers = self._subscribers.get(symbol)
+            if subscribers is None:
+                continue
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[symbol]
+                self._latest.pop(symbol, None)
+
+    def _ensure_running(self) -> None:
+        if self._subscribers and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        self._wake = asyncio.Event()
+        while self._subscribers:
+            self._wake.clear()
+            try:
+                await self.poll_once()
+            except Exception as e:
+                print(f"Quote stream error: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+        self._task = None
+
+    async def poll_once(self) -> None:
+        """購読中の全銘柄を1回ずつ取得し、変化した株価を配信"""
+        from app.data_fetcher import DataFetcher
+
+        symbols = list(self._subscribers)
+        self.polls += 1
+        self.fetches += len(symbols)
+        results = await asyncio.gather(
+            *(fetch(DataFetcher.get_realtime_quote, to_yahoo_symbol(symbol)) for symbol in symbols),
+            return_exceptions=True
+        )
+
+        for symbol, quote in zip(symbols, results):
+            if isinstance(quote, Exception):
+                print(f"[{symbol}] Quote stream fetch failed: {quote}")
+                continue
+            if quote is None or symbol not in self._subscribers:
+                continue
+
+            previous = self._latest.get(symbol)
+            if previous is not None and all(
+                previous.get(field) == quote.get(field) for field in _QUOTE_FIELDS
+            ):
+                continue
+
+            quote = self._with_indicators(symbol, quote)
+            self._latest[symbol] = quote
+            for subscriber in self._subscribers[symbol]:
+                subscriber.push(symbol, quote)
+                self.pushes += 1
+
+    @staticmethod
+    def _with_indicators(symbol: str, quote: dict) -> dict:
+        """
+        表示中のチャートの日足の指標に現在値を反映し、最新の指標値を株価に添える
+
+        指標エンジンに計算状態がある指標だけを1本分（O(1)）更新する。
+        値は {"indicators": {"sma:25": {"value": ...}, ...}}（未確定の値はnull）。
+        """
+        from app.indicator_engine import IndicatorEngine
+
+        market_time = quote.get("market_time")
+        if not market_time:
+            return quote
+        updated = IndicatorEngine.update_symbol(
+            to_yahoo_symbol(symbol), np.datetime64(market_time[:10], 'D'), float(quote["current_price"])
+        )
+        if not updated:
+            return quote
+        indicators = {
+            key: {name: None if math.isnan(value) else value for name, value in values.items()}
+            for key, values in updated.items()
+        }
+        return {**quote, "indicators": indicators}
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "symbols": len(self._subscribers),
+            "subscribers": len({s for subs in self._subscribers.values() for s in subs}),
+            "polls": self.polls,
+            "fetches": self.fetches,
+            "pushes": self.pushes,
+        }
+
+
+poller = QuotePoller()
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.bar_cache import BarSeries
+
+
+def bucket_start(date: datetime, timeframe: str) -> datetime:
+    """
+    日付が属する週足・月足の期間の開始日
+
+    - 1wk: その週の月曜日（東証の取引週は月〜金）
+    - 1mo: その月の1日
+    """
+    day = datetime(date.year, date.month, date.day)
+    if timeframe == "1wk":
+        return day - timedelta(days=day.weekday())
+    if timeframe == "1mo":
+        return day.replace(day=1)
+    return day
+
+
+def resample_bars(bars: BarSeries, timeframe: str) -> BarSeries:
+    """
+    日足から週足・月足を生成
+
+    週は月曜〜金曜、月は月末までを1本にまとめる。各足の日付は期間内の
+    最初の取引日とし、始値は最初の取引日の始値、終値は最後の取引日の終値、
+    高値・安値・出来高は期間内の最大・最小・合計。
+
+    Args:
+        bars: 日付昇順の日足
+        timeframe: 時間軸（'1d', '1wk', '1mo'）
+    """
+    if timeframe == "1d" or bars.empty:
+        return bars
+
+    days = bars.date.astype('datetime64[D]')
+    if timeframe == "1wk":
+        # 1970-01-01は木曜日のため、3日ずらして月曜始まりの週番号にする
+        keys = (days.view('int64') + 3) // 7
+    elif timeframe == "1mo":
+        keys = days.astype('datetime64[M]').view('int64')
+    else:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+    ends = np.concatenate((starts[1:], [len(keys)])) - 1
+
+    return BarSeries(
+        bars.date[starts],
+        bars.open[starts],
+        np.maximum.reduceat(bars.high, starts),
+        np.minimum.reduceat(bars.low, starts),
+        bars.close[ends],
+        np.add.reduceat(bars.volume, starts),
+    )
@@ -0,0 +1,182 @@
+import gzip
+import hashlib
+import json
+import os
+from typing import Any, Optional, Tuple, Union
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# この大きさ（バイト）以上のレスポンスを圧縮する
+RESPONSE_COMPRESS_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESS_MIN_SIZE", "1024"))
+# 圧縮レベル（CPU負荷を抑えるため中程度）
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "5"))
+RESPONSE_BROTLI_QUALITY = int(os.getenv("RESPONSE_BROTLI_QUALITY", "4"))
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+
+def _json_default(value: Any) -> Any:
+    # numpyのスカラー（np.int64など）は .item() でPythonの数値に変換
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_json(content: Any) -> bytes:
+    """JSONにエンコード（orjsonがあれば使う）"""
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY, default=_json_default)
+    return json.dumps(
+        content, ensure_ascii=False, separators=(",", ":"), default=_json_default
+    ).encode("utf-8")
+
+
+def decode_json(data: Union[bytes, str]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _accepts(header: str, token: str) -> bool:
+    """Accept系ヘッダーに指定の値が含まれるか（q=0 は除く）"""
+    for part in header.lower().split(","):
+        value, _, params = part.strip().partition(";")
+        if value.strip() == token:
+            return params.replace(" ", "") not in ("q=0", "q=0.0")
+    return False
+
+
+def _wants_msgpack(request: Request) -> bool:
+    accept = request.headers.get("accept", "")
+    return msgpack is not None and any(_accepts(accept, t) for t in MSGPACK_MEDIA_TYPES)
+
+
+def make_etag(*parts: Any) -> str:
+    """値から強いETag（引用符付き）を生成"""
+    digest = hashlib.blake2b(
+        "\x1f".join(str(part) for part in parts).encode("utf-8"), digest_size=12
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def body_etag(body: bytes) -> str:
+    """シリアライズ済みの本文から強いETagを生成"""
+    return f'"{hashlib.blake2b(body, digest_size=12).hexdigest()}"'
+
+
+def _representation_etag(request: Request, etag: str) -> str:
+    """
+    表現ごとのETag（強いETagは表現ごとに一意である必要がある）
+
+    MessagePackで返す場合と、Accept-Encoding で圧縮を選ぶ場合はそれぞれ接尾辞を付ける
+    （圧縮方式はヘッダーだけで決めるため、304の判定時にも同じ値になる）。
+    """
+    suffix = ""
+    if _wants_msgpack(request):
+        suffix += "-msgpack"
+    encoding = _negotiate_encoding(request)
+    if encoding is not None:
+        suffix += f"-{encoding}"
+    return f'{etag[:-1]}{suffix}"' if suffix else etag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match が指定のETagに一致するか"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in tags
+
+
+def not_modified(etag: str, headers: Optional[dict] = None) -> Response:
+    """304 Not Modified（本文なし）"""
+    return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
+
+
+def series_not_modified(request: Request, etag: Optional[str]) -> Optional[Response]:
+    """系列データのETagが If-None-Match に一致すれば304を返す"""
+    if etag is None:
+        return None
+    etag = _representation_etag(request, etag)
+    if etag_matches(request, etag):
+        return not_modified(etag, {"Vary": "Accept, Accept-Encoding"})
+    return None
+
+
+def _negotiate_encoding(request: Request) -> Optional[str]:
+    """Accept-Encoding から圧縮方式を選ぶ（brotliはインストール時のみ）"""
+    accept_encoding = request.headers.get("accept-encoding", "")
+    if brotli is not None and _accepts(accept_encoding, "br"):
+        return "br"
+    if _accepts(accept_encoding, "gzip"):
+        return "gzip"
+    return None
+
+
+def _encode_series(content: Any, use_msgpack: bool, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """
+    本文をシリアライズして圧縮（CPUを使うためワーカースレッドで実行）
+
+    Returns:
+        (本文, Content-Encoding)。RESPONSE_COMPRESS_MIN_SIZE 未満は圧縮しない
+    """
+    if isinstance(content, bytes):
+        # エンコード済みのJSON本文（キャッシュ済みのレスポンス）はそのまま使う
+        body = msgpack.packb(decode_json(content), default=_json_default) if use_msgpack else content
+    elif use_msgpack:
+        body = msgpack.packb(content, default=_json_default)
+    else:
+        body = encode_json(content)
+
+    if encoding is None or len(body) < RESPONSE_COMPRESS_MIN_SIZE:
+        return body, None
+    if encoding == "br":
+        return brotli.compress(body, quality=RESPONSE_BROTLI_QUALITY), encoding
+    return gzip.compress(body, compresslevel=RESPONSE_GZIP_LEVEL), encoding
+
+
+async def series_response(request: Request, content: Any, etag: Optional[str] = None) -> Response:
+    """
+    系列データ（チャート・ポートフォリオ推移）のレスポンスを生成
+
+    content はシリアライズ前の値、またはエンコード済みのJSON本文（bytes）。
+    - Accept に application/msgpack（または x-msgpack）があり msgpack が
+      インストールされていれば MessagePack、それ以外は JSON
+    - RESPONSE_COMPRESS_MIN_SIZE 以上なら Accept-Encoding に応じて
+      brotli（インストール時のみ）または gzip で圧縮
+    - etag を指定すると ETag ヘッダーを付ける（MessagePack・圧縮方式ごとに別の値）
+
+    シリアライズと圧縮は大きな本文ではイベントループを止めるため、スレッドプールで実行する。
+    """
+    body, encoding = await run_in_threadpool(
+        _encode_series, content, _wants_msgpack(request), _negotiate_encoding(request)
+    )
+
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if etag is not None:
+        headers["ETag"] = _representation_etag(request, etag)
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+
+    media_type = "application/msgpack" if _wants_msgpack(request) else "application/json"
+    return Response(content=body, media_type=media_type, headers=headers)
@@ -1,35 +1,50 @@
-from functools import lru_cache
-import json
+from datetime import datetime
+from typing import Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+import numpy as np
+from fastapi import APIRouter, HTTPException, Query, Request
 from sqlalchemy.orm import Session
 
-from app.database import get_db
+from app.async_fetch import fetch_with_db, run_db
+from app.bar_cache import BarSeries
+from app.cache import ResponseCache
+from app.indicators import parse_indicator_specs
+from app.responses import (
+    body_etag, encode_json, series_not_modified, series_response
+)
+from app.symbols import to_yahoo_symbol
 
 router = APIRouter()
 
+# indicators省略時に計算する指標と、レスポンスでのキー名（従来形式）
+LEGACY_INDICATORS = {
+    "sma:25": "sma25",
+    "sma:50": "sma50",
+    "sma:75": "sma75",
+    "sma:100": "sma100",
+    "sma:200": "sma200",
+    "ema:12": "ema",
+    "bb:20:2": "bollinger",
+}
+DEFAULT_INDICATORS = ",".join(LEGACY_INDICATORS)
+
+DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
+# 桁数を制限し、日付の範囲を超える期間（9999999d など）を受け付けない
+PERIOD_PATTERN = r"^(\d{1,4}(d|mo|y)|ytd|max)$"
 
-@lru_cache(maxsize=1)
-def get_redis_client():
-    try:
-        import redis
-        redis_client = redis.Redis(
-            host='localhost',
-            port=6379,
-            db=0,
-            decode_responses=True,
-            socket_connect_timeout=1,
-        )
-        redis_client.ping()
-        return redis_client
-    except Exception:
-        return None
 
 @router.get("/{symbol}")
 async def get_chart_data(
+    request: Request,
     symbol: str,
     timeframe: str = Query("1d", pattern="^(1d|1wk|1mo)$"),
-    db: Session = Depends(get_db)
+    format: str = Query("records", pattern="^(records|columnar)$"),
+    indicators: Optional[str] = Query(None, max_length=500),
+    since: Optional[str] = Query(None, pattern=DATE_PATTERN),
+    max_points: Optional[int] = Query(None, ge=10, le=10000),
+    period: str = Query("2y", pattern=PERIOD_PATTERN),
+    start: Optional[str] = Query(None, pattern=DATE_PATTERN),
+    end: Optional[str] = Query(None, pattern=DATE_PATTERN)
 ):
     """
     チャートデータ取得
@@ -37,170 +52,388 @@ async def get_chart_data(
     Args:
         symbol: 銘柄コード（例: 7203 または 7203.T または ^N225 または USDJPY=X）
         timeframe: 時間軸（1d=日足、1wk=週足、1mo=月足）
+        format: レスポンス形式
+            records=足・指標ごとの辞書のリスト（従来形式）
+            columnar=共通の time 配列と系列ごとの数値配列（指標の欠損はnull）
+        indicators: 計算する指標（例: sma:25,sma:200,bb:20:2,rsi:14,macd:12:26:9）
+            指定時は "indicators" に指定文字列をキーとして格納する。
+            省略時は従来の指標（SMA25/50/75/100/200, EMA12, ボリンジャーバンド）を従来のキー名で返す。
+            空文字の場合は指標を計算しない。
+        since: 差分取得の起点（クライアントが持つ最後の足の日付 YYYY-MM-DD）
+            指定時はその足（確定前の値が更新されている可能性があるため）以降の足と、
+            同じ足に対応する指標の値のみを返す。
+        max_points: 返す足の最大数。超える場合は終値をもとにLTTBで間引き、
+            選んだ足と同じ位置の指標値を返す（指標は間引く前の全データで計算）。
+        period: 表示期間（例: 3mo, 1y, 2y, 10y, ytd, max）。startの指定がない場合に使う
+        start: 表示開始日（YYYY-MM-DD、periodより優先）
+        end: 表示終了日（YYYY-MM-DD、その日を含む足まで。省略時は最新まで）
+            表示期間より前の足も指標の助走期間として使うため、SMA200なども
+            最初の足から値がある（上場直後などで履歴が足りない場合を除く）。
+
+    ETag（キャッシュ済みレスポンスの本文のハッシュ）を返し、If-None-Match が
+    一致すれば304を返す（since指定時を除く）。
     """
-    # 指数（^で始まる）、為替（=Xで終わる）、またはすでに.Tがある場合はそのまま、それ以外は.T接尾辞を追加
-    if symbol.startswith('^') or symbol.endswith('.T') or symbol.endswith('=X'):
-        yahoo_symbol = symbol
-    else:
-        yahoo_symbol = f"{symbol}.T"
+    if indicators is not None:
+        try:
+            parse_indicator_specs(indicators)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-    from app.data_fetcher import DataFetcher
-    from app.indicators import IndicatorCalculator
-    import pandas as pd
+    if since is not None:
+        _parse_date(since, "since")
+    _parse_window(period, start, end)
+
+    # キャッシュ済みのレスポンスと同じETagなら、本文を生成せずに304を返す
+    # （差分取得はキャッシュしないためETagなし）
+    etag_key = None
+    if since is None:
+        cache_key = chart_cache_key(
+            symbol, timeframe, format, indicators, max_points, period, start, end
+        )
+        etag_key = f"{cache_key}:etag"
+        etag = await run_db(_cached_etag, etag_key)
+        not_modified = series_not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
+
+    body = await fetch_with_db(
+        build_chart_response, symbol, timeframe, format, indicators, since, max_points,
+        period, start, end
+    )
+
+    etag = None
+    if etag_key is not None:
+        etag = await run_db(_cached_etag, etag_key) or body_etag(body)
+        not_modified = series_not_modified(request, etag)
+        if not_modified is not None:
+            return not_modified
 
-    redis_client = get_redis_client()
+    # エンコード済みのJSON本文をそのまま返す
+    # （Accept に応じてMessagePack、大きいレスポンスは圧縮）
+    return await series_response(request, body, etag)
+
+def chart_cache_key(
+    symbol: str,
+    timeframe: str,
+    format: str = "records",
+    indicators: Optional[str] = None,
+    max_points: Optional[int] = None,
+    period: str = "2y",
+    start: Optional[str] = None,
+    end: Optional[str] = None
+) -> str:
+    """チャートレスポンスのキャッシュキー"""
     cache_key = f"chart:{symbol}:{timeframe}"
+    if format != "records":
+        cache_key = f"{cache_key}:{format}"
+    if indicators is not None:
+        specs = parse_indicator_specs(indicators)
+        cache_key = f"{cache_key}:{','.join(spec.key for spec in specs)}"
+    if max_points is not None:
+        cache_key = f"{cache_key}:max{max_points}"
+    if start is not None:
+        cache_key = f"{cache_key}:{start}~{end or ''}"
+    elif period != "2y" or end is not None:
+        cache_key = f"{cache_key}:{period}~{end or ''}"
+    return cache_key
 
-    # キャッシュチェック
-    if redis_client:
+def _parse_date(value: str, name: str) -> datetime:
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: {value}")
+
+def _parse_window(
+    period: str,
+    start: Optional[str],
+    end: Optional[str]
+) -> Tuple[datetime, Optional[datetime]]:
+    """表示期間を (開始日, 終了日) に変換（終了日はNoneなら最新まで）"""
+    from app.price_store import period_start
+
+    if start:
+        start_date = _parse_date(start, "start")
+    else:
         try:
-            cached_data = redis_client.get(cache_key)
-            if cached_data:
-                return json.loads(cached_data)
-        except Exception as e:
-            print(f"Redis error: {e}")
+            start_date = period_start(period)
+        except (ValueError, OverflowError):
+            # 9999y など西暦1年より前になる期間
+            raise HTTPException(status_code=400, detail=f"Invalid period: {period}")
+    end_date = _parse_date(end, "end") if end else None
+    if end_date is not None and end_date < start_date:
+        raise HTTPException(status_code=400, detail="end must not be earlier than start")
+    return start_date, end_date
+
+def _window_slice(bars: BarSeries, timeframe: str, start: datetime, end: Optional[datetime]) -> slice:
+    """表示期間に含まれる足の範囲（先頭は開始日を含む週・月の足から）"""
+    from app.resample import bucket_start
+
+    first = np.datetime64(bucket_start(start, timeframe), 'ns')
+    i0 = int(np.searchsorted(bars.date, first))
+    i1 = len(bars)
+    if end is not None:
+        i1 = int(np.searchsorted(bars.date, np.datetime64(end, 'ns'), side='right'))
+    return slice(i0, i1)
+
+def _cached_etag(etag_key: str) -> Optional[str]:
+    etag = ResponseCache.get(etag_key)
+    if isinstance(etag, bytes):
+        etag = etag.decode("ascii")
+    return etag
+
+def build_chart_response(
+    db: Session,
+    symbol: str,
+    timeframe: str,
+    format: str = "records",
+    indicators: Optional[str] = None,
+    since: Optional[str] = None,
+    max_points: Optional[int] = None,
+    period: str = "2y",
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    refresh: bool = False
+) -> bytes:
+    """
+    チャートデータを構築してJSON本文を返す（DB・上流アクセスを含むためワーカースレッドで実行）
+
+    キャッシュ済みの場合は保存されている本文をデコードせずにそのまま返す。
+    refresh=True の場合はキャッシュを参照せずに作り直し、本文とETagを上書きする
+    （大引け後の先読みで、確定前の値で作られたレスポンスを置き換える）。
+    """
+    yahoo_symbol = to_yahoo_symbol(symbol)
+
+    from app.data_fetcher import DataFetcher
+
+    specs = parse_indicator_specs(DEFAULT_INDICATORS if indicators is None else indicators)
+
+    cache_key = chart_cache_key(
+        symbol, timeframe, format, indicators, max_points, period, start, end
+    )
+
+    # 差分取得は応答が小さく内容も都度変わるため、レスポンス全体はキャッシュしない
+    use_cache = since is None
+
+    # キャッシュチェック（プロセス内キャッシュ → Redis）
+    if use_cache and not refresh:
+        cached_data = ResponseCache.get(cache_key)
+        if cached_data:
+            return cached_data
     
-    # データ取得
-    df = DataFetcher.fetch_stock_data(yahoo_symbol, period="2y", interval=timeframe)
+    # データ取得（日足をローカルストアから差分同期し、列指向キャッシュ上のビューを使う。
+    # 週足・月足は同じ日足からローカルで生成する）。
+    # 表示期間の前に指標の助走期間分の足も揃え、保存済みの全期間の足を受け取る
+    from app.price_store import PriceStore, warmup_start
+    window_start, window_end = _parse_window(period, start, end)
+    warmup = max((spec.warmup for spec in specs), default=0)
+    bars = PriceStore.get_history(
+        db, yahoo_symbol, warmup_start(window_start, timeframe, warmup), timeframe
+    )
     
-    if df is None or df.empty:
+    if bars is None or bars.empty:
         raise HTTPException(status_code=404, detail=f"Data not found for {symbol}")
     
-    # 日付でソート（昇順）
-    df = df.sort_values('date').reset_index(drop=True)
-    
-    # データフォーマット
-    chart_data = []
-    for _, row in df.iterrows():
-        chart_data.append({
-            "time": row['date'].strftime('%Y-%m-%d'),
-            "open": float(row['open']),
-            "high": float(row['high']),
-            "low": float(row['low']),
-            "close": float(row['close']),
-            "volume": int(row['volume'])
-        })
-    
-    # テクニカル指標計算
-    sma25_data = []
-    sma50_data = []
-    sma75_data = []
-    sma100_data = []
-    sma200_data = []
-    ema_data = []
-    bb_data = {"upper": [], "middle": [], "lower": []}
-    
-    # SMA25計算
-    sma25 = IndicatorCalculator.calculate_sma(df, period=25)
-    for date, value in zip(df['date'], sma25):
-        if pd.notna(value):
-            sma25_data.append({
-                "time": date.strftime('%Y-%m-%d'),
-                "value": float(value)
-            })
-    
-    # SMA50計算
-    sma50 = IndicatorCalculator.calculate_sma(df, period=50)
-    for date, value in zip(df['date'], sma50):
-        if pd.notna(value):
-            sma50_data.append({
-                "time": date.strftime('%Y-%m-%d'),
-                "value": float(value)
-            })
-    
-    # SMA75計算
-    sma75 = IndicatorCalculator.calculate_sma(df, period=75)
-    for date, value in zip(df['date'], sma75):
-        if pd.notna(value):
-            sma75_data.append({
-                "time": date.strftime('%Y-%m-%d'),
-                "value": float(value)
-            })
-
-    # SMA100計算
-    sma100 = IndicatorCalculator.calculate_sma(df, period=100)
-    for date, value in zip(df['date'], sma100):
-        if pd.notna(value):
-            sma100_data.append({
-                "time": date.strftime('%Y-%m-%d'),
-                "value": float(value)
-            })
-
-    # SMA200計算
-    sma200 = IndicatorCalculator.calculate_sma(df, period=200)
-    for date, value in zip(df['date'], sma200):
-        if pd.notna(value):
-            sma200_data.append({
-                "time": date.strftime('%Y-%m-%d'),
-                "value": float(value)
-            })
-
-    # EMA計算
-    ema = IndicatorCalculator.calculate_ema(df, period=12)
-    for date, value in zip(df['date'], ema):
-        if pd.notna(value):
-            ema_data.append({
-                "time": date.strftime('%Y-%m-%d'),
-                "value": float(value)
-            })
-    
-    # ボリンジャーバンド計算
-    bb = IndicatorCalculator.calculate_bollinger_bands(df, period=20)
-    for date, upper, middle, lower in zip(df['date'], bb['upper'], bb['middle'], bb['lower']):
-        if pd.notna(upper):
-            bb_data['upper'].append({
-                "time": date.strftime('%Y-%m-%d'),
-                "value": float(upper)
-            })
-            bb_data['middle'].append({
-                "time": date.strftime('%Y-%m-%d'),
-                "value": float(middle)
-            })
-            bb_data['lower'].append({
-                "time": date.strftime('%Y-%m-%d'),
-                "value": float(lower)
-            })
-    
-    # リアルタイム株価を取得
-    realtime_quote = DataFetcher.get_realtime_quote(yahoo_symbol)
+    # テクニカル指標計算（指定された指標のみ、指標ごとにキャッシュ）。
+    # 表示期間によらず同じ足で計算するため、期間が重なるリクエスト間で計算結果を共有できる
+    from app.indicator_cache import IndicatorCache
+    values = {spec.key: IndicatorCache.get(yahoo_symbol, timeframe, spec, bars) for spec in specs}
 
-    response = {
-        "symbol": symbol,
-        "data": chart_data,
-        "sma25": sma25_data,
-        "sma50": sma50_data,
-        "sma75": sma75_data,
-        "sma100": sma100_data,
-        "sma200": sma200_data,
-        "ema": ema_data,
-        "bollinger": bb_data,
-        "quote": realtime_quote
+    # 表示期間の足と指標を切り出す
+    window = _window_slice(bars, timeframe, window_start, window_end)
+    bars = bars._slice(window.start, window.stop)
+    values = {
+        key: {name: line[window] for name, line in lines.items()}
+        for key, lines in values.items()
     }
+    if bars.empty:
+        raise HTTPException(status_code=404, detail=f"No data in the requested range for {symbol}")
+
+    if since is not None:
+        # 指標は全期間で計算済みの値から、返す足に対応する末尾だけを切り出す
+        total = len(bars)
+        bars = bars.slice_from(since)
+        offset = total - len(bars)
+        values = {
+            key: {name: line[offset:] for name, line in lines.items()}
+            for key, lines in values.items()
+        }
+
+    if max_points is not None and len(bars) > max_points:
+        # 終値の形を保つ足をLTTBで選び、指標も同じ足の値に揃える（共通のtime配列を保つ）
+        from app.downsample import lttb_indices
+        indices = lttb_indices(bars.date.view('int64'), bars.close, max_points)
+        bars = bars.take(indices)
+        values = {
+            key: {name: line[indices] for name, line in lines.items()}
+            for key, lines in values.items()
+        }
+
+    # 日付文字列は一度だけ生成して各系列で共有
+    times = bars.time_strings()
+
+    if format == "columnar":
+        response = {
+            "symbol": symbol,
+            "format": "columnar",
+            "time": times,
+            "data": {
+                "open": bars.open.tolist(),
+                "high": bars.high.tolist(),
+                "low": bars.low.tolist(),
+                "close": bars.close.tolist(),
+                "volume": bars.volume.tolist(),
+            },
+        }
+        formatted = {key: _format_columnar(lines) for key, lines in values.items()}
+    else:
+        # 互換形式: 1本ごとの辞書のリスト（指標は値のある足のみ）
+        chart_data = [
+            {
+                "time": time,
+                "open": open_,
+                "high": high,
+                "low": low,
+                "close": close,
+                "volume": volume
+            }
+            for time, open_, high, low, close, volume in zip(
+                times,
+                bars.open.tolist(),
+                bars.high.tolist(),
+                bars.low.tolist(),
+                bars.close.tolist(),
+                bars.volume.tolist()
+            )
+        ]
+        response = {
+            "symbol": symbol,
+            "data": chart_data,
+        }
+        formatted = {key: _format_records(times, lines) for key, lines in values.items()}
+
+    if since is not None:
+        response["since"] = since
+
+    if indicators is None:
+        # 指定がない場合は従来どおりのキー名でトップレベルに置く
+        response.update({LEGACY_INDICATORS[key]: value for key, value in formatted.items()})
+    else:
+        response["indicators"] = formatted
+
+    # リアルタイム株価を取得
+    response["quote"] = DataFetcher.get_realtime_quote(yahoo_symbol)
+
+    # 数値・文字列のみで構成されるため、jsonable_encoderを通さずに直接シリアライズする
+    body = encode_json(response)
+    if use_cache:
+        # 本文とETagを同じ有効期間で保存（ETagは本文のハッシュ）
+        ResponseCache.set_many(
+            {cache_key: body, f"{cache_key}:etag": body_etag(body)},
+            _cache_ttl(yahoo_symbol)
+        )
     
-    if redis_client:
-        try:
-            redis_client.setex(cache_key, 300, json.dumps(response))
-        except Exception as e:
-            print(f"Redis cache error: {e}")
-    
-    return response
+    return body
+
+def _format_columnar(lines: dict):
+    """指標を列指向形式に変換（単一系列は配列、複数系列は系列名 -> 配列）"""
+    if list(lines) == ["value"]:
+        return _column(lines["value"])
+    return {name: _column(values) for name, values in lines.items()}
+
+def _format_records(times: list, lines: dict):
+    """指標を互換形式に変換（複数系列は最初の系列に値がある足で揃える）"""
+    if list(lines) == ["value"]:
+        return _points(times, lines["value"])
+    valid = ~np.isnan(next(iter(lines.values())))
+    return {name: _points(times, values, valid) for name, values in lines.items()}
+
+def _column(values: np.ndarray) -> list:
+    """列指向形式の数値配列（NaNはnull、小数点以下4桁に丸める）"""
+    values = np.round(np.asarray(values, dtype='float64'), 4)
+    missing = np.isnan(values)
+    if not missing.any():
+        return values.tolist()
+    column = values.astype(object)
+    column[missing] = None
+    return column.tolist()
+
+def _points(times: list, values: np.ndarray, valid: Optional[np.ndarray] = None) -> list:
+    """互換形式の指標データ（{"time", "value"} のリスト、NaNの足は除く）"""
+    if valid is None:
+        valid = ~np.isnan(values)
+    indices = np.flatnonzero(valid)
+    return [
+        {"time": times[i], "value": value}
+        for i, value in zip(indices.tolist(), values[indices].tolist())
+    ]
+
+def _cache_ttl(yahoo_symbol: str, now: Optional[datetime] = None) -> int:
+    """
+    チャートデータのキャッシュ有効期間（秒）
+
+    立会時間中は300秒。大引け後は次の寄り付きまでデータが変わらないため、
+    株価キャッシュと同じく次の寄り付きまで保持する（大引け後の先読み結果を翌朝まで使う）。
+    ただし大引け後の先読み（終値の確定待ち）より前に作ったレスポンスは先読みの時刻までとする。
+    """
+    from datetime import timedelta
+
+    from app.jobs.prefetch import PREFETCH_DELAY
+    from app.market_hours import last_close, now_jst
+    from app.quote_cache import QuoteCache
+
+    now = now or now_jst()
+    expires = QuoteCache.expires_at(yahoo_symbol, now)
+    settled = last_close(now) + timedelta(seconds=PREFETCH_DELAY)
+    if now < settled < expires:
+        expires = settled
+    return max(300, int((expires - now).total_seconds()))
 
 @router.get("/{symbol}/volume-profile")
 async def get_volume_profile(
     symbol: str,
     timeframe: str = Query("1d", pattern="^(1d|1wk|1mo)$"),
-    bins: int = Query(50, ge=10, le=100)
+    bins: int = Query(50, ge=10, le=100),
+    period: str = Query("1y", pattern=PERIOD_PATTERN),
+    start: Optional[str] = Query(None, pattern=DATE_PATTERN),
+    end: Optional[str] = Query(None, pattern=DATE_PATTERN),
+    value_area: Optional[float] = Query(None, gt=0, lt=1)
 ):
-    """価格帯別出来高分布取得"""
-    from app.data_fetcher import DataFetcher
+    """
+    価格帯別出来高分布取得
+
+    period / start / end はチャートと同じ（保存済みの足から期間を切り出す）。
+    各足の出来高は安値〜高値の範囲が重なる価格帯へ按分する。
+    value_area（例: 0.7）を指定すると poc / value_area_low / value_area_high も返す。
+    """
+    window_start, window_end = _parse_window(period, start, end)
+    return await fetch_with_db(
+        build_volume_profile, symbol, timeframe, bins, window_start, window_end, value_area
+    )
+
+def build_volume_profile(
+    db: Session,
+    symbol: str,
+    timeframe: str,
+    bins: int,
+    start: datetime,
+    end: Optional[datetime],
+    value_area: Optional[float] = None
+) -> dict:
+    """価格帯別出来高分布を構築（ワーカースレッドで実行）"""
     from app.indicators import IndicatorCalculator
+    from app.price_store import PriceStore
+
+    yahoo_symbol = to_yahoo_symbol(symbol)
 
-    df = DataFetcher.fetch_stock_data(symbol, period="1y", interval=timeframe)
+    bars = PriceStore.get_history(db, yahoo_symbol, start, timeframe)
+    if bars is not None:
+        window = _window_slice(bars, timeframe, start, end)
+        bars = bars._slice(window.start, window.stop)
     
-    if df is None or df.empty:
+    if bars is None or bars.empty:
         raise HTTPException(status_code=404, detail=f"Data not found for {symbol}")
     
-    volume_profile = IndicatorCalculator.calculate_volume_profile(df, bins=bins)
+    volume_profile = IndicatorCalculator.calculate_volume_profile(bars, bins=bins, value_area=value_area)
     
     return {
         "symbol": symbol,
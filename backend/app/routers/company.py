@@ -1,7 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
+from app.async_fetch import fetch_with_db, run_db
 from app.database import get_db
 from app.models import CompanyInfo
+from app.responses import etag_matches, make_etag, not_modified
+from app.symbols import to_yahoo_symbol
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
@@ -33,98 +36,86 @@ class CompanyInfoResponse(BaseModel):
         from_attributes = True
 
 @router.get("/{symbol}", response_model=CompanyInfoResponse)
-async def get_company_info(symbol: str, db: Session = Depends(get_db)):
+async def get_company_info(
+    symbol: str,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
     """
     企業情報を取得
 
     DBにデータがある場合はDBから取得、
     ない場合はyfinanceから取得してDBに保存
+
+    ETag はレコードの updated_at から生成し、If-None-Match が一致すれば304を返す。
     """
-    # 指数（^で始まる）、為替（=Xで終わる）、またはすでに.Tがある場合はそのまま、それ以外は.T接尾辞を追加
-    if symbol.startswith('^') or symbol.endswith('.T') or symbol.endswith('=X'):
-        yahoo_symbol = symbol
-    else:
-        yahoo_symbol = f"{symbol}.T"
+    yahoo_symbol = to_yahoo_symbol(symbol)
 
     # DBから検索（元のsymbolで）
-    company_info = db.query(CompanyInfo).filter(CompanyInfo.symbol == symbol).first()
+    company_info = await run_db(_find_company_info, db, symbol)
 
     if company_info:
         print(f"[{symbol}] Company info found in DB")
+        etag = _company_etag(company_info)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
         return company_info
 
     # DBにない場合はyfinanceから取得（yahoo_symbolで）
-    from app.data_fetcher import DataFetcher
+    # 同じ取得結果から財務データも保存される
+    from app.services.info_service import InfoService
 
     print(f"[{symbol}] Fetching company info from yfinance as {yahoo_symbol}")
-    company_data = DataFetcher.get_company_info(yahoo_symbol)
+    company_info, _ = await fetch_with_db(InfoService.refresh, symbol, yahoo_symbol)
 
-    if not company_data:
+    if not company_info:
         raise HTTPException(status_code=404, detail="Company info not found")
 
-    # DBに保存（元のsymbolで保存）
-    company_data["symbol"] = symbol
-    new_company_info = CompanyInfo(**company_data)
-    db.add(new_company_info)
-    db.commit()
-    db.refresh(new_company_info)
-
     print(f"[{symbol}] Company info saved to DB")
-    return new_company_info
+    response.headers["ETag"] = _company_etag(company_info)
+    return company_info
 
 @router.post("/{symbol}/refresh", response_model=CompanyInfoResponse)
-async def refresh_company_info(symbol: str, db: Session = Depends(get_db)):
+async def refresh_company_info(symbol: str, response: Response, db: Session = Depends(get_db)):
     """
-    企業情報を強制的に再取得してDBを更新
+    企業情報を強制的に再取得してDBを更新（財務データも同時に更新）
     """
-    # 指数（^で始まる）、為替（=Xで終わる）、またはすでに.Tがある場合はそのまま、それ以外は.T接尾辞を追加
-    if symbol.startswith('^') or symbol.endswith('.T') or symbol.endswith('=X'):
-        yahoo_symbol = symbol
-    else:
-        yahoo_symbol = f"{symbol}.T"
+    yahoo_symbol = to_yahoo_symbol(symbol)
 
-    from app.data_fetcher import DataFetcher
+    from app.services.info_service import InfoService
 
     print(f"[{symbol}] Refreshing company info from yfinance as {yahoo_symbol}")
-    company_data = DataFetcher.get_company_info(yahoo_symbol)
+    company_info, _ = await fetch_with_db(InfoService.refresh, symbol, yahoo_symbol, force=True)
 
-    if not company_data:
+    if not company_info:
         raise HTTPException(status_code=404, detail="Company info not found")
 
-    # 元のsymbolに戻す
-    company_data["symbol"] = symbol
-
-    # 既存データを検索
-    company_info = db.query(CompanyInfo).filter(CompanyInfo.symbol == symbol).first()
-
-    if company_info:
-        # 更新
-        for key, value in company_data.items():
-            if key != "symbol":  # symbolは更新しない
-                setattr(company_info, key, value)
-        company_info.updated_at = datetime.utcnow()
-    else:
-        # 新規作成
-        company_info = CompanyInfo(**company_data)
-        db.add(company_info)
-
-    db.commit()
-    db.refresh(company_info)
-
     print(f"[{symbol}] Company info refreshed")
+    response.headers["ETag"] = _company_etag(company_info)
     return company_info
 
+def _company_etag(company_info: CompanyInfo) -> str:
+    return make_etag("company", company_info.id, company_info.updated_at.isoformat())
+
+def _find_company_info(db: Session, symbol: str) -> Optional[CompanyInfo]:
+    return db.query(CompanyInfo).filter(CompanyInfo.symbol == symbol).first()
+
 @router.delete("/{symbol}")
 async def delete_company_info(symbol: str, db: Session = Depends(get_db)):
     """
     企業情報を削除
     """
-    company_info = db.query(CompanyInfo).filter(CompanyInfo.symbol == symbol).first()
+    company_info = await run_db(_find_company_info, db, symbol)
 
     if not company_info:
         raise HTTPException(status_code=404, detail="Company info not found")
 
-    db.delete(company_info)
-    db.commit()
+    def delete():
+        db.delete(company_info)
+        db.commit()
+
+    await run_db(delete)
 
     return {"message": "Company info deleted"}
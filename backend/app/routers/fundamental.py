@@ -1,7 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
+from app.async_fetch import fetch_with_db, run_db
+from app.data_fetcher import INFO_CACHE_TTL
 from app.database import get_db
 from app.models import StockFundamental
+from app.responses import etag_matches, make_etag, not_modified
+from app.symbols import to_yahoo_symbol
 from pydantic import BaseModel
 from datetime import datetime, timedelta
 from typing import Optional
@@ -29,24 +33,30 @@ class FundamentalResponse(BaseModel):
 
 
 @router.get("/{symbol}", response_model=FundamentalResponse)
-async def get_fundamental_data(symbol: str, db: Session = Depends(get_db)):
+async def get_fundamental_data(
+    symbol: str,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db)
+):
     """
     単一銘柄の財務データを取得
-    - DBで24時間以内のデータを検索
-    - なければyfinanceから取得してDB保存
+    - DBで INFO_CACHE_TTL 秒（既定24時間）以内のデータを検索
+    - なければyfinanceから取得してDB保存（同じ取得結果から企業情報も更新）
+    - ETag は保存したレコードから生成し、If-None-Match が一致すれば304を返す
     """
-    # Yahoo Finance形式に変換（既に.Tが付いている場合はそのまま）
-    yahoo_symbol = symbol if symbol.endswith('.T') else f"{symbol}.T"
+    # Yahoo Finance形式に変換（企業情報と同じ変換）
+    yahoo_symbol = to_yahoo_symbol(symbol)
 
-    # DBから最新データを取得（24時間以内）
-    cutoff_time = datetime.utcnow() - timedelta(hours=24)
-    existing = db.query(StockFundamental).filter(
-        StockFundamental.symbol == symbol,
-        StockFundamental.date >= cutoff_time
-    ).order_by(StockFundamental.date.desc()).first()
+    # DBから最新データを取得（INFO_CACHE_TTL 以内）
+    existing = await run_db(_find_recent_fundamental, db, symbol)
 
     if existing:
         # キャッシュされたデータを返す
+        etag = _fundamental_etag(existing)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response.headers["ETag"] = etag
         return FundamentalResponse(
             symbol=existing.symbol,
             date=existing.date.isoformat(),
@@ -64,33 +74,14 @@ async def get_fundamental_data(symbol: str, db: Session = Depends(get_db)):
         )
 
     # yfinanceから新規取得
-    from app.fundamental_fetcher import FundamentalFetcher
+    from app.services.info_service import InfoService
 
-    data = FundamentalFetcher.fetch_fundamental_data(yahoo_symbol)
+    _, fundamental = await fetch_with_db(InfoService.refresh, symbol, yahoo_symbol)
 
-    if not data:
+    if not fundamental:
         raise HTTPException(status_code=404, detail="Financial data not available for this symbol")
 
-    # DBに保存
-    fundamental = StockFundamental(
-        symbol=symbol,  # 元のシンボルで保存
-        date=data['date'],
-        market_cap=data['market_cap'],
-        per=data['per'],
-        pbr=data['pbr'],
-        eps=data['eps'],
-        bps=data['bps'],
-        roe=data['roe'],
-        dividend_yield=data['dividend_yield'],
-        revenue=data['revenue'],
-        operating_income=data['operating_income'],
-        net_income=data['net_income'],
-        data_source=data['data_source']
-    )
-
-    db.add(fundamental)
-    db.commit()
-    db.refresh(fundamental)
+    response.headers["ETag"] = _fundamental_etag(fundamental)
 
     return FundamentalResponse(
         symbol=fundamental.symbol,
@@ -107,3 +98,17 @@ async def get_fundamental_data(symbol: str, db: Session = Depends(get_db)):
         net_income=fundamental.net_income,
         data_source=fundamental.data_source
     )
+
+
+def _fundamental_etag(fundamental: StockFundamental) -> str:
+    # 財務データは取得のたびに新しいレコードを追加するため、IDと取得日時で一意になる
+    return make_etag("fundamental", fundamental.id, fundamental.date.isoformat())
+
+
+def _find_recent_fundamental(db: Session, symbol: str) -> Optional[StockFundamental]:
+    """INFO_CACHE_TTL 以内に取得した最新の財務データを検索"""
+    cutoff_time = datetime.utcnow() - timedelta(seconds=INFO_CACHE_TTL)
+    return db.query(StockFundamental).filter(
+        StockFundamental.symbol == symbol,
+        StockFundamental.date >= cutoff_time
+    ).order_by(StockFundamental.date.desc()).first()
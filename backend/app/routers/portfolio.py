@@ -1,12 +1,12 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database import get_db
+from fastapi import APIRouter, Request
+from app.async_fetch import fetch_with_db
+from app.responses import series_response
 from app.services.portfolio_service import PortfolioService
 
 router = APIRouter()
 
 @router.get("/summary")
-async def get_portfolio_summary(db: Session = Depends(get_db)):
+async def get_portfolio_summary():
     """
     ポートフォリオ集計データ取得
 
@@ -14,16 +14,16 @@ async def get_portfolio_summary(db: Session = Depends(get_db)):
     - summary: 総評価額、総取得金額、総損益、損益率、年間配当金合計
     - holdings: 銘柄ごとの詳細データ
     """
-    result = PortfolioService.calculate_holdings(db)
+    result = await fetch_with_db(PortfolioService.calculate_holdings)
     return result
 
 @router.get("/history")
-async def get_portfolio_history(period: str = "1w", db: Session = Depends(get_db)):
+async def get_portfolio_history(request: Request, period: str = "1w"):
     """
     ポートフォリオ評価額の推移データ取得
 
     - period: "1w" | "1mo" | "3mo" | "6mo" | "1y"
     - history: [{date, total_value}, ...]
     """
-    result = PortfolioService.calculate_portfolio_history(db, period=period)
-    return result
+    result = await fetch_with_db(PortfolioService.calculate_portfolio_history, period=period)
+    return await series_response(request, result)
@@ -0,0 +1,34 @@
+import os
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.async_fetch import fetch
+from app.services.summary_service import SummaryService
+
+router = APIRouter()
+
+# 1回のリクエストで指定できる銘柄数
+SUMMARY_MAX_SYMBOLS = int(os.getenv("SUMMARY_MAX_SYMBOLS", "200"))
+
+
+@router.get("/summary")
+async def get_quote_summaries(symbols: str = Query(..., min_length=1)):
+    """
+    複数銘柄のサマリーを一括取得（ウォッチリストのサイドバー用）
+
+    Args:
+        symbols: 銘柄コード（カンマ区切り、例: 7203,6758,^N225）
+
+    Returns:
+        {"summaries": {銘柄: {price, previous_close, change, change_percent,
+                              open, day_high, day_low, date, sparkline} | null}}
+        キャッシュにない銘柄は1回の一括ダウンロードでまとめて取得する。
+    """
+    requested = [s.strip() for s in symbols.split(",") if s.strip()]
+    if not requested:
+        raise HTTPException(status_code=400, detail="No symbols specified")
+    if len(requested) > SUMMARY_MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"Too many symbols (max {SUMMARY_MAX_SYMBOLS})")
+
+    summaries = await fetch(SummaryService.get_many, requested)
+    return {"summaries": summaries}
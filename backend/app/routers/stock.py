@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.models import Stock, Watchlist, WatchlistStock, StockPrice, StockPurchase, StockFundamental, CompanyInfo
+from app.models import Stock, Watchlist, WatchlistStock, StockPurchase, StockFundamental, CompanyInfo
 from app.routers.search import convert_sector_code
 from pydantic import BaseModel
 from typing import List
@@ -130,7 +130,9 @@ async def delete_stock(stock_id: int, db: Session = Depends(get_db)):
     # 関連レコードを先に削除（外部キー制約を回避）
     db.query(WatchlistStock).filter(WatchlistStock.stock_id == stock_id).delete()
     db.query(StockPurchase).filter(StockPurchase.stock_id == stock_id).delete()
-    db.query(StockPrice).filter(StockPrice.symbol == symbol).delete()
+    # 日足は同期状態・日足キャッシュとまとめて削除する（再登録時に全期間を取得し直す）
+    from app.price_store import PriceStore
+    PriceStore.delete(db, symbol)
     db.query(StockFundamental).filter(StockFundamental.symbol == symbol).delete()
     db.query(CompanyInfo).filter(CompanyInfo.symbol == symbol).delete()
 
@@ -0,0 +1,64 @@
+import asyncio
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from app.quote_stream import QuoteSubscriber, poller
+
+router = APIRouter()
+
+
+@router.websocket("/quotes")
+async def stream_quotes(websocket: WebSocket):
+    """
+    株価のストリーミング配信（WebSocket）
+
+    接続時のクエリ symbols（カンマ区切り）、または以下のメッセージで購読する銘柄を指定する。
+        {"action": "subscribe", "symbols": ["7203", "6758"]}
+        {"action": "unsubscribe", "symbols": ["6758"]}
+    変化した株価だけを以下の形式で配信する（購読直後は取得済みの最新値も送る）。
+        {"type": "quotes", "quotes": {"7203": {"current_price": ..., "change": ..., ...}}}
+    チャートで表示中の日足の指標があれば、現在値を反映した値を "indicators" に添える。
+    株価の取得は全接続で共有し、銘柄ごとに STREAM_POLL_INTERVAL 秒に1回だけ行う。
+    """
+    await websocket.accept()
+    subscriber = QuoteSubscriber()
+
+    async def send_quotes() -> None:
+        while True:
+            quotes = await subscriber.next()
+            await websocket.send_json({"type": "quotes", "quotes": quotes})
+
+    sender = asyncio.create_task(send_quotes())
+    try:
+        initial = websocket.query_params.get("symbols")
+        if initial:
+            try:
+                poller.subscribe(subscriber, [s.strip() for s in initial.split(",") if s.strip()])
+            except ValueError as e:
+                await websocket.close(code=1008, reason=str(e))
+                return
+
+        while True:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                # JSONとして解釈できないメッセージは接続を切らずにエラーを返す
+                message = None
+            if not isinstance(message, dict) or message.get("action") not in ("subscribe", "unsubscribe") \
+                    or not isinstance(message.get("symbols"), list):
+                await websocket.send_json({"type": "error", "detail": "Invalid message"})
+                continue
+
+            symbols = [str(s).strip() for s in message["symbols"] if str(s).strip()]
+            if message["action"] == "unsubscribe":
+                poller.unsubscribe(subscriber, symbols)
+                continue
+            try:
+                poller.subscribe(subscriber, symbols)
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        poller.unsubscribe(subscriber)
@@ -4,7 +4,7 @@ from sqlalchemy import select
 from app.database import get_db
 from app.models import Watchlist, Stock, WatchlistStock
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 router = APIRouter()
 
@@ -19,6 +19,8 @@ class StockResponse(BaseModel):
     market: str
     sector: str | None = ""
     user_category: str | None = ""
+    # 直近の終値のスパークライン（日足が未取得の銘柄はnull）
+    sparkline: Optional[List[float]] = None
 
     # 後方互換性のためのプロパティ
     @property
@@ -37,6 +39,8 @@ class WatchlistResponse(BaseModel):
 @router.get("/", response_model=List[WatchlistResponse])
 async def get_watchlists(db: Session = Depends(get_db)):
     """全ウォッチリスト取得"""
+    from app.sparkline import SparklineStore
+
     watchlists = db.query(Watchlist).all()
     
     result = []
@@ -54,9 +58,17 @@ async def get_watchlists(db: Session = Depends(get_db)):
             "id": wl.id,
             "name": wl.name,
             "color": wl.color,
-            "stocks": stocks
+            "stocks": [StockResponse.model_validate(stock) for stock in stocks]
         })
     
+    # 事前計算済みのスパークラインを埋め込む
+    sparklines = SparklineStore.get_many(
+        stock.symbol for wl in result for stock in wl["stocks"]
+    )
+    for wl in result:
+        for stock in wl["stocks"]:
+            stock.sparkline = sparklines[stock.symbol]
+    
     return result
 
 @router.post("/", status_code=201)
@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy.orm import Session
+from app.data_fetcher import DataFetcher
+from app.fundamental_fetcher import FundamentalFetcher
+from app.models import CompanyInfo, StockFundamental
+
+
+class InfoService:
+    """
+    ticker.info 1回の取得から企業情報（company_info）と財務データ
+    （stock_fundamentals）の両方を更新する
+    """
+
+    @staticmethod
+    def refresh(
+        db: Session,
+        symbol: str,
+        yahoo_symbol: str,
+        force: bool = False
+    ) -> Tuple[Optional[CompanyInfo], Optional[StockFundamental]]:
+        """
+        ticker.info を取得して両テーブルに保存
+
+        Args:
+            symbol: DBに保存する銘柄コード（リクエストされた元のsymbol）
+            yahoo_symbol: Yahoo Finance形式の銘柄コード
+            force: Trueの場合はキャッシュを使わずに再取得
+
+        Returns:
+            (企業情報, 財務データ)。取得できなかった場合や無効な銘柄の場合は (None, None)
+        """
+        try:
+            info = DataFetcher.get_ticker_info(yahoo_symbol, max_age=0 if force else None)
+        except Exception as e:
+            print(f"Error fetching ticker info for {yahoo_symbol}: {e}")
+            return None, None
+
+        if not info:
+            print(f"[{symbol}] No ticker info available")
+            return None, None
+
+        # 企業名も概要もない ticker.info は無効な銘柄への応答なので、どちらのテーブルにも保存しない
+        company_data = DataFetcher.parse_company_info(yahoo_symbol, info)
+        if not company_data:
+            return None, None
+
+        company_info = InfoService._save_company_info(db, symbol, company_data)
+        fundamental = InfoService._save_fundamental(
+            db, symbol, FundamentalFetcher.parse_fundamental_data(yahoo_symbol, info)
+        )
+
+        db.commit()
+        db.refresh(company_info)
+        db.refresh(fundamental)
+        return company_info, fundamental
+
+    @staticmethod
+    def _save_company_info(db: Session, symbol: str, company_data: dict) -> CompanyInfo:
+        """企業情報を保存（既存データがあれば更新）"""
+        # 元のsymbolに戻す
+        company_data["symbol"] = symbol
+
+        company_info = db.query(CompanyInfo).filter(CompanyInfo.symbol == symbol).first()
+
+        if company_info:
+            for key, value in company_data.items():
+                if key != "symbol":  # symbolは更新しない
+                    setattr(company_info, key, value)
+            company_info.updated_at = datetime.utcnow()
+        else:
+            company_info = CompanyInfo(**company_data)
+            db.add(company_info)
+
+        return company_info
+
+    @staticmethod
+    def _save_fundamental(db: Session, symbol: str, data: dict) -> StockFundamental:
+        """財務データを保存"""
+        data["symbol"] = symbol  # 元のシンボルで保存
+        fundamental = StockFundamental(**data)
+        db.add(fundamental)
+        return fundamental
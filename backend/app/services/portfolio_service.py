@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import func
 from app.models import StockPurchase, Stock, StockFundamental
 from typing import Dict
+import pandas as pd
 
 class PortfolioService:
     @staticmethod
@@ -40,21 +41,37 @@ class PortfolioService:
         total_annual_dividend = 0.0
         from app.data_fetcher import DataFetcher
 
+        # 銘柄情報を取得
+        stocks = {
+            stock.id: stock
+            for stock in db.query(Stock).filter(
+                Stock.id.in_([group.stock_id for group in purchase_groups])
+            ).all()
+        }
+
+        # 全保有銘柄の現在価格を1回のリクエストでまとめて取得
+        latest_prices = {}
+        panel = DataFetcher.fetch_close_panel([stock.symbol for stock in stocks.values()], period="5d")
+        if panel is not None:
+            for symbol in panel.columns:
+                closes = panel[symbol].dropna()
+                if not closes.empty:
+                    latest_prices[symbol] = float(closes.iloc[-1])
+
         for group in purchase_groups:
             stock_id = group.stock_id
             total_quantity = int(group.total_quantity)
             group_total_cost = float(group.total_cost)
 
-            # 銘柄情報を取得
-            stock = db.query(Stock).filter(Stock.id == stock_id).first()
+            stock = stocks.get(stock_id)
             if not stock:
                 continue
 
             # 平均取得価格
             average_price = group_total_cost / total_quantity if total_quantity > 0 else 0.0
 
-            # 現在価格を取得
-            current_price = DataFetcher.get_latest_price(stock.symbol)
+            # 現在価格
+            current_price = latest_prices.get(stock.symbol)
             if current_price is None:
                 # 価格取得失敗時は購入価格を使用（デバッグ用）
                 print(f"Warning: Failed to get price for {stock.symbol}, using purchase price")
@@ -162,41 +179,24 @@ class PortfolioService:
         if not stock_map:
             return {"history": []}
 
-        # 各銘柄の価格履歴を取得
-        all_dates = set()
-        price_data = {}  # symbol -> {date_str -> price}
-
-        for symbol in stock_map:
-            df = DataFetcher.fetch_stock_data(symbol, period=yf_period, interval="1d")
-            if df is not None and not df.empty:
-                if tail_n is not None:
-                    df = df.tail(tail_n)
-                price_data[symbol] = {}
-                for _, row in df.iterrows():
-                    date_val = row['date']
-                    if hasattr(date_val, 'strftime'):
-                        date_str = date_val.strftime('%Y-%m-%d')
-                    else:
-                        date_str = str(date_val)[:10]
-                    price_data[symbol][date_str] = float(row['close'])
-                    all_dates.add(date_str)
-
-        if not all_dates:
+        # 全銘柄の終値を1回のリクエストでまとめて取得（日付で揃えたパネル）
+        panel = DataFetcher.fetch_close_panel(list(stock_map.keys()), period=yf_period, interval="1d")
+        if panel is None or panel.empty:
             return {"history": []}
 
-        # 各日付のポートフォリオ合計評価額を計算
-        history = []
-        for date in sorted(all_dates):
-            total_value = 0.0
-            has_data = False
-            for symbol, quantity in stock_map.items():
-                if symbol in price_data and date in price_data[symbol]:
-                    total_value += price_data[symbol][date] * quantity
-                    has_data = True
-            if has_data:
-                history.append({
-                    "date": date,
-                    "total_value": round(total_value, 2)
-                })
+        if tail_n is not None:
+            panel = panel.tail(tail_n)
+
+        # 各日付のポートフォリオ合計評価額を計算（その日に価格のある銘柄のみ合算）
+        quantities = pd.Series(stock_map, dtype=float)
+        totals = panel.mul(quantities, axis=1).sum(axis=1, min_count=1).dropna()
+
+        history = [
+            {
+                "date": date.strftime('%Y-%m-%d'),
+                "total_value": round(float(total_value), 2)
+            }
+            for date, total_value in totals.items()
+        ]
 
         return {"history": history}
@@ -0,0 +1,123 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.bar_cache import BarCache
+from app.cache import ResponseCache
+from app.data_fetcher import DataFetcher
+from app.quote_cache import QuoteCache
+from app.responses import decode_json, encode_json
+from app.sparkline import SPARKLINE_WINDOW, make_sparkline
+from app.symbols import to_yahoo_symbol
+
+
+class SummaryService:
+    """
+    ウォッチリスト表示用の銘柄サマリー（現在値・前日比・日中の値幅・スパークライン）
+
+    1. レスポンスキャッシュ（1回のMGET）
+    2. 株価キャッシュと保存済みの日足（上流への問い合わせなし）
+    3. 残りの銘柄は1回の一括ダウンロードでまとめて取得
+    の順に解決し、組み立てた結果は株価キャッシュと同じ有効期間で保存する。
+    """
+
+    @staticmethod
+    def get_many(symbols: List[str]) -> Dict[str, Optional[dict]]:
+        """銘柄ごとのサマリー（取得できなかった銘柄はNone）"""
+        yahoo_symbols = {symbol: to_yahoo_symbol(symbol) for symbol in dict.fromkeys(symbols)}
+        keys = {symbol: f"summary:{yahoo}" for symbol, yahoo in yahoo_symbols.items()}
+
+        summaries: Dict[str, Optional[dict]] = {}
+        cached = ResponseCache.get_many(list(keys.values()))
+        for symbol, key in keys.items():
+            if cached[key] is not None:
+                summaries[symbol] = decode_json(cached[key])
+
+        built: Dict[str, dict] = {}
+        missing = []
+        for symbol, yahoo in yahoo_symbols.items():
+            if symbol in summaries:
+                continue
+            summary = SummaryService._from_local(yahoo)
+            if summary is None:
+                missing.append(symbol)
+            else:
+                built[symbol] = summary
+
+        if missing:
+            period = f"{SPARKLINE_WINDOW // 20 + 1}mo"
+            frames = DataFetcher.fetch_ohlc_panel([yahoo_symbols[s] for s in missing], period=period)
+            for symbol in missing:
+                df = frames.get(yahoo_symbols[symbol])
+                if df is None or len(df) < 2:
+                    continue
+                built[symbol] = SummaryService._build(
+                    df['date'].to_numpy(), df['open'].to_numpy(), df['high'].to_numpy(),
+                    df['low'].to_numpy(), df['close'].to_numpy(), None
+                )
+
+        for symbol, summary in built.items():
+            summaries[symbol] = summary
+            ResponseCache.set(
+                keys[symbol], encode_json(summary), SummaryService._cache_ttl(yahoo_symbols[symbol])
+            )
+
+        return {symbol: summaries.get(symbol) for symbol in yahoo_symbols}
+
+    @staticmethod
+    def _from_local(yahoo_symbol: str) -> Optional[dict]:
+        """株価キャッシュと保存済みの日足から組み立てる（どちらかがなければNone）"""
+        quote = QuoteCache.get(yahoo_symbol)
+        if quote is None:
+            return None
+        bars = BarCache.read(yahoo_symbol, "1d")
+        if bars is None or len(bars) < 2:
+            return None
+
+        # 日足が株価より古い場合は日中の値幅がわからない
+        market_time = quote.get("market_time") or ""
+        if str(bars.date[-1])[:10] < market_time[:10]:
+            return None
+
+        bars = bars.tail(SPARKLINE_WINDOW)
+        return SummaryService._build(bars.date, bars.open, bars.high, bars.low, bars.close, quote)
+
+    @staticmethod
+    def _build(
+        dates: np.ndarray,
+        opens: np.ndarray,
+        highs: np.ndarray,
+        lows: np.ndarray,
+        closes: np.ndarray,
+        quote: Optional[dict]
+    ) -> dict:
+        closes = np.array(closes[-SPARKLINE_WINDOW:], dtype='float64')
+        if quote is not None:
+            price = float(quote["current_price"])
+            previous_close = float(quote["previous_close"])
+            # 最新の足は株価キャッシュの現在値に合わせる
+            closes[-1] = price
+        else:
+            price = float(closes[-1])
+            previous_close = float(closes[-2])
+
+        change = price - previous_close
+        return {
+            "date": str(np.datetime64(dates[-1], 'D')),
+            "price": round(price, 2),
+            "previous_close": round(previous_close, 2),
+            "change": round(change, 2),
+            "change_percent": round(change / previous_close * 100, 2) if previous_close else None,
+            "open": round(float(opens[-1]), 2),
+            "day_high": round(max(float(highs[-1]), price), 2),
+            "day_low": round(min(float(lows[-1]), price), 2),
+            "sparkline": make_sparkline(closes),
+        }
+
+    @staticmethod
+    def _cache_ttl(yahoo_symbol: str) -> int:
+        """株価キャッシュと同じ有効期間（秒）"""
+        from app.market_hours import now_jst
+
+        remaining = (QuoteCache.expires_at(yahoo_symbol) - now_jst()).total_seconds()
+        return max(1, int(remaining))
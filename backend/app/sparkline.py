@@ -0,0 +1,104 @@
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from app.downsample import lttb_indices
+
+# スパークラインに使う直近の終値の本数と、間引いた後の点数
+SPARKLINE_WINDOW = int(os.getenv("SPARKLINE_WINDOW", "60"))
+SPARKLINE_POINTS = int(os.getenv("SPARKLINE_POINTS", "32"))
+
+
+def sparkline_values(closes: np.ndarray, points: int = SPARKLINE_POINTS) -> np.ndarray:
+    """直近 SPARKLINE_WINDOW 本の終値を points 点以下に間引く"""
+    closes = np.asarray(closes, dtype='float64')[-SPARKLINE_WINDOW:]
+    closes = closes[~np.isnan(closes)]
+    if len(closes) > points:
+        closes = closes[lttb_indices(np.arange(len(closes)), closes, points)]
+    return closes
+
+
+def make_sparkline(closes: np.ndarray, points: int = SPARKLINE_POINTS) -> List[float]:
+    """直近 SPARKLINE_WINDOW 本の終値を points 点に間引いたスパークライン"""
+    return np.round(sparkline_values(closes, points), 2).tolist()
+
+
+class SparklineStore:
+    """
+    銘柄ごとのスパークラインの保存先
+
+    全銘柄分を1つの float32 の2次元配列（銘柄数 × SPARKLINE_POINTS）にまとめて保持し、
+    銘柄コードから行番号を引く。日足を同期したときに PriceStore から更新され、
+    未登録の銘柄は参照時に日足キャッシュ（BarCache）から作成する。
+    """
+
+    _lock = threading.Lock()
+    _rows: Dict[str, int] = {}
+    _values = np.empty((0, SPARKLINE_POINTS), dtype='float32')
+    _lengths = np.empty(0, dtype='int16')
+    updates = 0
+
+    @staticmethod
+    def update(symbol: str, closes: np.ndarray) -> None:
+        """日足の終値からスパークラインを作り直す"""
+        values = sparkline_values(closes)
+        with SparklineStore._lock:
+            row = SparklineStore._rows.get(symbol)
+            if row is None:
+                row = len(SparklineStore._rows)
+                if row >= len(SparklineStore._values):
+                    SparklineStore._grow(max(64, row * 2))
+                SparklineStore._rows[symbol] = row
+            SparklineStore._values[row, :len(values)] = values
+            SparklineStore._lengths[row] = len(values)
+            SparklineStore.updates += 1
+
+    @staticmethod
+    def _grow(capacity: int) -> None:
+        values = np.full((capacity, SPARKLINE_POINTS), np.nan, dtype='float32')
+        lengths = np.zeros(capacity, dtype='int16')
+        size = len(SparklineStore._values)
+        values[:size] = SparklineStore._values
+        lengths[:size] = SparklineStore._lengths
+        SparklineStore._values = values
+        SparklineStore._lengths = lengths
+
+    @staticmethod
+    def get(symbol: str) -> Optional[List[float]]:
+        return SparklineStore.get_many([symbol])[symbol]
+
+    @staticmethod
+    def get_many(symbols: Iterable[str]) -> Dict[str, Optional[List[float]]]:
+        """複数銘柄のスパークライン（日足がない銘柄はNone）"""
+        from app.bar_cache import BarCache
+
+        symbols = list(dict.fromkeys(symbols))
+        with SparklineStore._lock:
+            missing = [symbol for symbol in symbols if symbol not in SparklineStore._rows]
+
+        for symbol in missing:
+            bars = BarCache.read(symbol, "1d")
+            if bars is not None and not bars.empty:
+                SparklineStore.update(symbol, bars.close)
+
+        result: Dict[str, Optional[List[float]]] = {}
+        with SparklineStore._lock:
+            for symbol in symbols:
+                row = SparklineStore._rows.get(symbol)
+                if row is None:
+                    result[symbol] = None
+                    continue
+                values = SparklineStore._values[row, :SparklineStore._lengths[row]]
+                result[symbol] = np.round(values.astype('float64'), 2).tolist()
+        return result
+
+    @staticmethod
+    def stats() -> Dict[str, int]:
+        with SparklineStore._lock:
+            return {
+                "symbols": len(SparklineStore._rows),
+                "bytes": int(SparklineStore._values.nbytes + SparklineStore._lengths.nbytes),
+                "updates": SparklineStore.updates,
+            }
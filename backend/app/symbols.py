@@ -0,0 +1,10 @@
+def to_yahoo_symbol(symbol: str) -> str:
+    """
+    リクエストされた銘柄コードをYahoo Finance形式に変換
+
+    指数（^で始まる）、為替（=Xで終わる）、またはすでに.Tがある場合はそのまま、
+    それ以外は東証銘柄として.T接尾辞を追加する。
+    """
+    if symbol.startswith('^') or symbol.endswith('.T') or symbol.endswith('=X'):
+        return symbol
+    return f"{symbol}.T"
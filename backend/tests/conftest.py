@@ -0,0 +1,78 @@
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# app のモジュールは import 時に環境変数を読むため、先に設定する
+_TMP_DIR = tempfile.mkdtemp(prefix="stock-backend-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_TMP_DIR, 'test.db')}")
+os.environ.setdefault("BAR_CACHE_DIR", os.path.join(_TMP_DIR, "bars"))
+os.environ.setdefault("MARKET_DATA_PROVIDER", "local")
+os.environ.setdefault("PREFETCH_ENABLED", "false")
+os.environ.setdefault("REDIS_ENABLED", "false")
+os.environ.setdefault("INDICATOR_STATE_PATH", "")
+
+
+def make_frame(n: int, start: str = "2024-01-01", seed: int = 0, price: float = 1000.0) -> pd.DataFrame:
+    """営業日ごとのランダムウォークの日足"""
+    rng = np.random.default_rng(seed)
+    close = price + rng.normal(0, price * 0.01, n).cumsum()
+    spread = np.abs(rng.normal(0, price * 0.005, n))
+    return pd.DataFrame({
+        "date": pd.bdate_range(start, periods=n),
+        "open": close + rng.normal(0, price * 0.002, n),
+        "high": close + spread,
+        "low": close - spread,
+        "close": close,
+        "volume": rng.integers(1_000, 100_000, n).astype("float64"),
+    })
+
+
+@pytest.fixture
+def bar_cache_dir(tmp_path, monkeypatch):
+    """BarCache の保存先をテストごとの一時ディレクトリにする"""
+    import app.bar_cache
+
+    monkeypatch.setattr(app.bar_cache, "BAR_CACHE_DIR", str(tmp_path))
+    app.bar_cache.BarCache._maps.clear()
+    yield tmp_path
+    app.bar_cache.BarCache._maps.clear()
+
+
+@pytest.fixture
+def indicator_engine():
+    """IndicatorEngine の保持している系列と統計をテストごとに空にする"""
+    from app.indicator_engine import IndicatorEngine
+
+    IndicatorEngine._entries.clear()
+    counts = dict.fromkeys(IndicatorEngine.stats_counts, 0)
+    IndicatorEngine.stats_counts.update(counts)
+    yield IndicatorEngine
+    IndicatorEngine._entries.clear()
+    IndicatorEngine.stats_counts.update(counts)
+
+
+@pytest.fixture
+def db():
+    """空のテーブルを作り直したDBセッション"""
+    import app.models  # noqa: F401  テーブル定義を登録する
+    from app.database import Base, SessionLocal, engine
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client(db):
+    """空のDBで起動したアプリのテストクライアント"""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
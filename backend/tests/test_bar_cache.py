@@ -0,0 +1,78 @@
+import os
+
+import numpy as np
+
+from app.bar_cache import BarCache, BarSeries
+from conftest import make_frame
+
+
+def assert_bars_equal(bars, df):
+    expected = BarSeries.from_frame(df)
+    assert len(bars) == len(expected)
+    for name in ("date", "open", "high", "low", "close", "volume"):
+        np.testing.assert_array_equal(getattr(bars, name), getattr(expected, name))
+
+
+def test_write_and_read(bar_cache_dir):
+    df = make_frame(100)
+    assert BarCache.write("7203.T", "1d", df)
+    assert_bars_equal(BarCache.read("7203.T", "1d"), df)
+    assert BarCache.read("6758.T", "1d") is None
+
+
+def test_append_new_bars(bar_cache_dir):
+    df = make_frame(120)
+    BarCache.write("7203.T", "1d", df.iloc[:100])
+    assert BarCache.append("7203.T", "1d", df.iloc[100:])
+    assert_bars_equal(BarCache.read("7203.T", "1d"), df)
+
+
+def test_append_overwrites_overlapping_bars(bar_cache_dir):
+    df = make_frame(120)
+    BarCache.write("7203.T", "1d", df.iloc[:100])
+
+    # 最後の2本の確定値を含めて同期し直した場合
+    resynced = df.iloc[98:].copy()
+    resynced["close"] += 1.0
+    assert BarCache.append("7203.T", "1d", resynced)
+
+    expected = df.copy()
+    expected.loc[98:, "close"] += 1.0
+    assert_bars_equal(BarCache.read("7203.T", "1d"), expected)
+
+
+def test_append_rejects_missing_file_and_older_bars(bar_cache_dir):
+    df = make_frame(120)
+    assert not BarCache.append("7203.T", "1d", df)
+
+    BarCache.write("7203.T", "1d", df.iloc[10:])
+    assert not BarCache.append("7203.T", "1d", df.iloc[:20])
+    # 何も追加しない場合は成功扱い
+    assert BarCache.append("7203.T", "1d", df.iloc[:0])
+
+
+def test_append_beyond_capacity_rewrites_file(bar_cache_dir):
+    df = make_frame(3000)
+    BarCache.write("7203.T", "1d", df.iloc[:1000])
+    path = BarCache.path("7203.T", "1d")
+    size = os.path.getsize(path)
+
+    assert BarCache.append("7203.T", "1d", df.iloc[1000:])
+    assert os.path.getsize(path) > size
+    assert_bars_equal(BarCache.read("7203.T", "1d"), df)
+
+
+def test_failed_replace_keeps_old_file(bar_cache_dir, monkeypatch):
+    df = make_frame(3000)
+    BarCache.write("7203.T", "1d", df.iloc[:1000])
+
+    def fail(src, dst):
+        raise PermissionError("file is mapped")
+
+    with monkeypatch.context() as m:
+        m.setattr(os, "replace", fail)
+        assert not BarCache.write("7203.T", "1d", df)
+        assert not BarCache.append("7203.T", "1d", df.iloc[1000:])
+
+    assert_bars_equal(BarCache.read("7203.T", "1d"), df.iloc[:1000])
+    assert not [name for name in os.listdir(bar_cache_dir) if name.endswith(".tmp")]
@@ -0,0 +1,177 @@
+import pytest
+
+from app import cache
+from app.cache import _ENTRY_OVERHEAD, MemoryCache, ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def entry_size(key: str, value: bytes) -> int:
+    return len(key) + len(value) + _ENTRY_OVERHEAD
+
+
+def test_memory_cache_expires_entries(clock):
+    memory = MemoryCache(10_000)
+    memory.set("a", b"1", 60)
+
+    clock.now += 59
+    assert memory.get("a") == b"1"
+    clock.now += 1
+    assert memory.get("a") is None
+    assert memory.stats()["expirations"] == 1
+    assert memory.bytes == 0
+
+
+def test_memory_cache_evicts_least_recently_used(clock):
+    value = b"x" * 100
+    memory = MemoryCache(entry_size("a", value) * 3)
+    for key in ("a", "b", "c"):
+        memory.set(key, value, 60)
+
+    # "a" を参照したので、次に追加すると "b" が破棄される
+    assert memory.get("a") == value
+    memory.set("d", value, 60)
+    assert memory.get("b") is None
+    assert [memory.get(key) for key in ("a", "c", "d")] == [value] * 3
+    assert memory.stats()["evictions"] == 1
+    assert memory.bytes == entry_size("a", value) * 3
+
+
+def test_memory_cache_replaces_and_skips_oversized(clock):
+    memory = MemoryCache(500)
+    memory.set("a", b"1", 60)
+    memory.set("a", b"22", 60)
+    assert memory.get("a") == b"22"
+    assert memory.bytes == entry_size("a", b"22")
+
+    # 上限を超える値・有効期間0は保存せず、古い値も残さない
+    memory.set("a", b"x" * 1000, 60)
+    assert memory.get("a") is None
+    memory.set("b", b"1", 0)
+    assert memory.get("b") is None
+    assert memory.bytes == 0
+
+
+def test_response_cache_without_redis(monkeypatch, clock):
+    memory = MemoryCache(10_000)
+    monkeypatch.setattr(cache, "memory_cache", memory)
+    monkeypatch.setattr(cache, "REDIS_ENABLED", False)
+
+    ResponseCache.set_many({"chart:a": b"body", "chart:a:etag": '"e"'}, 300)
+    assert ResponseCache.get_many(["chart:a", "chart:a:etag", "chart:b"]) == {
+        "chart:a": b"body", "chart:a:etag": '"e"', "chart:b": None,
+    }
+    assert ResponseCache.stats()["redis"]["enabled"] is False
+
+    clock.now += 300
+    assert ResponseCache.get("chart:a") is None
+
+
+class FakeRedis:
+    """コマンドごとに失敗させられるRedisクライアント"""
+
+    class Pool:
+        def __init__(self):
+            self.disconnected = False
+
+        def disconnect(self):
+            self.disconnected = True
+
+    def __init__(self):
+        self.data = {}
+        self.fail = False
+        self.connection_pool = self.Pool()
+
+    def _check(self):
+        if self.fail:
+            raise ConnectionError("connection lost")
+
+    def mget(self, keys):
+        self._check()
+        return [self.data.get(key) for key in keys]
+
+    def get(self, key):
+        self._check()
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self._check()
+        self.data[key] = value
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        self._check()
+
+
+def make_backend(**kwargs) -> cache.RedisBackend:
+    options = dict(max_connections=2, socket_timeout=0.1, connect_timeout=0.1, retry_interval=30)
+    options.update(kwargs)
+    return cache.RedisBackend("redis://127.0.0.1:1/0", **options)
+
+
+def test_redis_unreachable_is_retried_later(clock):
+    pytest.importorskip("redis")
+    backend = make_backend()
+
+    assert backend.get_many(["a", "b"]) == [None, None]
+    backend.set("a", b"1", 60)
+    # 失敗後は retry_interval の間は接続を試みない
+    assert backend.errors == 1
+    clock.now += 29
+    assert backend.get("a") is None
+    assert backend.errors == 1
+
+    clock.now += 1
+    assert backend.get("a") is None
+    assert backend.errors == 2
+    assert backend.stats() == {"connected": False, "errors": 2}
+
+
+def test_redis_command_failure_drops_connection(clock):
+    backend = make_backend()
+    client = FakeRedis()
+    backend._client = client
+
+    backend.set_many({"a": b"1", "b": b"2"}, 60)
+    assert backend.get_many(["a", "b", "c"]) == [b"1", b"2", None]
+
+    client.fail = True
+    assert backend.get("a") is None
+    assert client.connection_pool.disconnected
+    assert backend.stats() == {"connected": False, "errors": 1}
+    # 再接続までは呼び出しても例外を送出しない
+    backend.set_many({"a": b"1"}, 60)
+    assert backend.get_many(["a"]) == [None]
+    assert backend.errors == 1
+
+
+def test_response_cache_reads_through_redis(monkeypatch, clock):
+    memory = MemoryCache(10_000)
+    backend = make_backend()
+    backend._client = FakeRedis()
+    monkeypatch.setattr(cache, "memory_cache", memory)
+    monkeypatch.setattr(cache, "redis_backend", backend)
+    monkeypatch.setattr(cache, "REDIS_ENABLED", True)
+
+    backend._client.data["chart:a"] = b"body"
+    assert ResponseCache.get_many(["chart:a", "chart:b"]) == {"chart:a": b"body", "chart:b": None}
+    # Redisから取得した値は CACHE_MEMORY_REDIS_TTL 秒だけプロセス内にも保持する
+    backend._client.fail = True
+    assert ResponseCache.get("chart:a") == b"body"
+    clock.now += cache.CACHE_MEMORY_REDIS_TTL
+    assert ResponseCache.get("chart:a") is None
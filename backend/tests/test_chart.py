@@ -0,0 +1,259 @@
+from datetime import datetime, timedelta
+
+import orjson
+import pytest
+
+from app.cache import ResponseCache, memory_cache
+from app.market_hours import JST
+from app.routers.chart import _cache_ttl, build_chart_response, chart_cache_key
+
+
+def jst(*args) -> datetime:
+    return datetime(*args, tzinfo=JST)
+
+
+@pytest.fixture
+def chart_db(db, bar_cache_dir):
+    """ローカルの日足データで空のDB・レスポンスキャッシュからチャートを作る"""
+    from app.indicator_cache import IndicatorCache
+    from app.quote_cache import QuoteCache
+
+    def clear():
+        memory_cache._entries.clear()
+        memory_cache.bytes = 0
+        IndicatorCache._entries.clear()
+        QuoteCache._entries.clear()
+
+    clear()
+    yield db
+    clear()
+
+
+@pytest.fixture
+def client(chart_db, client):
+    """空のレスポンスキャッシュで起動したテストクライアント"""
+    yield client
+
+
+def test_refresh_overwrites_cached_response(chart_db):
+    key = chart_cache_key("7203", "1d", "records", None, None, "2y", None, None)
+    body = build_chart_response(chart_db, "7203", "1d")
+
+    # 大引け直後（終値の確定前）に作られたレスポンスが翌朝まで残っている状態
+    stale = orjson.dumps({"symbol": "7203.T", "data": []})
+    ResponseCache.set_many({key: stale, f"{key}:etag": '"stale"'}, 3600)
+    assert build_chart_response(chart_db, "7203", "1d") == stale
+
+    refreshed = build_chart_response(chart_db, "7203", "1d", refresh=True)
+    assert refreshed == body
+    assert ResponseCache.get(key) == body
+    assert ResponseCache.get(f"{key}:etag") not in (None, '"stale"', b'"stale"')
+
+
+@pytest.mark.parametrize("now, expires", [
+    # 立会中は最短の有効期間
+    (jst(2024, 5, 15, 10, 0), jst(2024, 5, 15, 10, 5)),
+    # 大引け後・先読み前に作ったレスポンスは先読みの時刻まで
+    (jst(2024, 5, 15, 15, 55), jst(2024, 5, 15, 16, 0)),
+    # 先読み以降は次の寄り付きまで
+    (jst(2024, 5, 15, 16, 0), jst(2024, 5, 16, 9, 0)),
+    (jst(2024, 5, 17, 18, 0), jst(2024, 5, 20, 9, 0)),
+])
+def test_cache_ttl_stops_at_prefetch(monkeypatch, now, expires):
+    from app import quote_cache
+    from app.jobs import prefetch
+
+    monkeypatch.setattr(prefetch, "PREFETCH_DELAY", 1800)
+    monkeypatch.setattr(quote_cache, "QUOTE_CLOSE_GRACE", 600)
+    assert _cache_ttl("7203.T", now) == int((expires - now).total_seconds())
+
+
+def test_prefetch_refreshes_cached_charts(chart_db, monkeypatch):
+    import asyncio
+
+    from app.jobs import prefetch
+
+    calls = []
+
+    def fake_build(db, symbol, timeframe, **kwargs):
+        calls.append((symbol, timeframe, kwargs.get("refresh")))
+        return b"{}"
+
+    monkeypatch.setattr("app.routers.chart.build_chart_response", fake_build)
+    monkeypatch.setattr(prefetch, "_load_symbols", lambda: ["7203"])
+    asyncio.run(prefetch.PrefetchScheduler(timeframes=["1d"]).run_once())
+    assert ("7203", "1d", True) in calls
+
+
+def test_columnar_matches_records(chart_db):
+    records = orjson.loads(build_chart_response(chart_db, "7203", "1d"))
+    columnar = orjson.loads(build_chart_response(chart_db, "7203", "1d", format="columnar"))
+
+    assert columnar["format"] == "columnar"
+    assert columnar["time"] == [bar["time"] for bar in records["data"]]
+    for name in ("open", "high", "low", "close", "volume"):
+        assert columnar["data"][name] == [bar[name] for bar in records["data"]]
+
+    # 指標は共通のtime配列に揃え、値のない足はnull（小数点以下4桁に丸める）
+    assert len(columnar["sma25"]) == len(columnar["time"])
+    sma = {time: value for time, value in zip(columnar["time"], columnar["sma25"]) if value is not None}
+    assert sma == pytest.approx(
+        {point["time"]: point["value"] for point in records["sma25"]}, abs=1e-4
+    )
+    assert set(columnar["bollinger"]) == set(records["bollinger"])
+    assert len(columnar["bollinger"]["upper"]) == len(columnar["time"])
+
+
+def test_selected_indicators_only(chart_db, indicator_engine):
+    body = orjson.loads(build_chart_response(chart_db, "7203", "1d", indicators="sma:5,rsi:14,macd:12:26:9"))
+
+    assert "sma25" not in body and "bollinger" not in body
+    assert set(body["indicators"]) == {"sma:5", "rsi:14", "macd:12:26:9"}
+    assert set(body["indicators"]["macd:12:26:9"]) == {"macd", "signal", "histogram"}
+    # 指定しなかった指標は計算しない
+    assert {key[2] for key in indicator_engine._entries} == {"sma:5", "rsi:14", "macd:12:26:9"}
+
+    empty = orjson.loads(build_chart_response(chart_db, "7203", "1d", indicators=""))
+    assert empty["indicators"] == {}
+    assert len(empty["data"]) == len(body["data"])
+
+
+def test_invalid_indicators_rejected(client):
+    response = client.get("/api/chart/7203", params={"indicators": "sma:5,foo:3"})
+    assert response.status_code == 400
+
+
+def test_since_returns_tail(chart_db):
+    full = orjson.loads(build_chart_response(chart_db, "7203", "1d", format="columnar"))
+    since = full["time"][-3]
+    delta = orjson.loads(build_chart_response(chart_db, "7203", "1d", format="columnar", since=since))
+
+    # 指定した足（確定前の値が更新されている可能性がある）以降だけを返す
+    assert delta["since"] == since
+    assert delta["time"] == full["time"][-3:]
+    assert delta["data"]["close"] == full["data"]["close"][-3:]
+    # 指標は全期間で計算した値の末尾と同じ
+    assert delta["sma200"] == full["sma200"][-3:]
+    assert delta["bollinger"]["lower"] == full["bollinger"]["lower"][-3:]
+
+
+def test_since_is_not_cached(client):
+    full = client.get("/api/chart/7203").json()
+    since = full["data"][-2]["time"]
+
+    response = client.get("/api/chart/7203", params={"since": since})
+    assert response.status_code == 200
+    assert "etag" not in response.headers
+    assert [bar["time"] for bar in response.json()["data"]] == [bar["time"] for bar in full["data"][-2:]]
+    assert not any("since" in key or key.endswith(since) for key in memory_cache._entries)
+
+    assert client.get("/api/chart/7203", params={"since": "2024-13-01"}).status_code == 400
+
+
+def test_chart_response_compression(client):
+    identity = client.get("/api/chart/7203", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert "Accept-Encoding" in identity.headers["vary"]
+
+    compressed = client.get("/api/chart/7203", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["content-type"] == "application/json"
+    assert compressed.content == identity.content
+
+    refused = client.get("/api/chart/7203", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in refused.headers
+
+
+def test_chart_etag_not_modified(client, monkeypatch):
+    response = client.get("/api/chart/7203", headers={"Accept-Encoding": "identity"})
+    etag = response.headers["etag"]
+    assert etag.startswith('"') and etag.endswith('"')
+
+    # 304はキャッシュ済みのETagだけで判定し、本文を作り直さない
+    def fail(*args, **kwargs):
+        raise AssertionError("chart rebuilt")
+
+    monkeypatch.setattr("app.routers.chart.build_chart_response", fail)
+    for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        not_modified = client.get(
+            "/api/chart/7203", headers={"If-None-Match": header, "Accept-Encoding": "identity"}
+        )
+        assert not_modified.status_code == 304
+        assert not_modified.headers["etag"] == etag
+        assert not_modified.content == b""
+
+
+def test_chart_etag_per_content_coding(client):
+    identity = client.get("/api/chart/7203", headers={"Accept-Encoding": "identity"}).headers["etag"]
+    gzipped = client.get("/api/chart/7203", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["etag"] == f'{identity[:-1]}-gzip"'
+
+    # 圧縮方式の異なる表現のETagでは304にしない
+    response = client.get(
+        "/api/chart/7203", headers={"If-None-Match": identity, "Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 200
+    response = client.get(
+        "/api/chart/7203",
+        headers={"If-None-Match": gzipped.headers["etag"], "Accept-Encoding": "gzip"}
+    )
+    assert response.status_code == 304
+
+
+def test_max_points_downsamples_bars_and_indicators(chart_db):
+    full = orjson.loads(build_chart_response(chart_db, "7203", "1d", format="columnar"))
+    thinned = orjson.loads(build_chart_response(chart_db, "7203", "1d", format="columnar", max_points=100))
+
+    assert len(full["time"]) > 100
+    assert len(thinned["time"]) == 100
+    assert thinned["time"][0] == full["time"][0] and thinned["time"][-1] == full["time"][-1]
+
+    # 選んだ足と同じ位置の指標値（間引く前の全データで計算した値）を返す
+    position = {time: i for i, time in enumerate(full["time"])}
+    indices = [position[time] for time in thinned["time"]]
+    assert thinned["data"]["close"] == [full["data"]["close"][i] for i in indices]
+    assert thinned["sma200"] == [full["sma200"][i] for i in indices]
+
+    # 上限より少なければ間引かない
+    assert orjson.loads(build_chart_response(
+        chart_db, "7203", "1d", format="columnar", max_points=10000
+    ))["time"] == full["time"]
+
+
+def test_start_end_window(chart_db):
+    full = orjson.loads(build_chart_response(chart_db, "7203", "1d", format="columnar", period="max"))
+    start, end = full["time"][300], full["time"][400]
+
+    window = orjson.loads(build_chart_response(
+        chart_db, "7203", "1d", format="columnar", start=start, end=end
+    ))
+    assert window["time"] == full["time"][300:401]
+    # 表示期間より前の足を助走期間に使うため、最初の足から指標の値がある
+    assert window["sma200"] == full["sma200"][300:401]
+    assert window["sma200"][0] is not None
+
+    # 週足は開始日を含む週の足から
+    weekly = orjson.loads(build_chart_response(
+        chart_db, "7203", "1wk", format="columnar", start=start, end=end
+    ))
+    first = datetime.strptime(weekly["time"][0], "%Y-%m-%d")
+    assert first <= datetime.strptime(start, "%Y-%m-%d") < first + timedelta(days=7)
+
+
+def test_period_window(chart_db):
+    body = orjson.loads(build_chart_response(chart_db, "7203", "1d", format="columnar", period="1y"))
+    latest = datetime.strptime(body["time"][-1], "%Y-%m-%d")
+    first = datetime.strptime(body["time"][0], "%Y-%m-%d")
+    assert timedelta(days=360) < latest - first <= timedelta(days=366)
+    assert body["sma200"][0] is not None
+
+
+@pytest.mark.parametrize("params, status", [
+    # 西暦1年より前になる期間
+    ({"period": "9999y"}, 400),
+    ({"period": "2w"}, 422),
+    ({"start": "2024-05-01", "end": "2024-04-01"}, 400),
+    ({"start": "2024-02-30"}, 400),
+])
+def test_invalid_window_rejected(client, params, status):
+    assert client.get("/api/chart/7203", params=params).status_code == status
@@ -0,0 +1,28 @@
+import numpy as np
+
+from app.downsample import lttb_indices
+
+
+def test_keeps_endpoints_and_count():
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=1000).cumsum()
+    indices = lttb_indices(np.arange(1000), y, 100)
+
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_keeps_spikes():
+    y = np.zeros(1000)
+    y[321] = 50.0
+    y[777] = -50.0
+    indices = lttb_indices(np.arange(1000), y, 50)
+    assert 321 in indices and 777 in indices
+
+
+def test_small_inputs_are_not_downsampled():
+    y = np.arange(10, dtype="float64")
+    np.testing.assert_array_equal(lttb_indices(np.arange(10), y, 10), np.arange(10))
+    np.testing.assert_array_equal(lttb_indices(np.arange(10), y, 20), np.arange(10))
+    np.testing.assert_array_equal(lttb_indices(np.arange(10), y, 2), np.arange(10))
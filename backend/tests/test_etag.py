@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from app.models import CompanyInfo, Stock, StockFundamental
+
+
+def test_fundamental_etag(client, db):
+    db.add(StockFundamental(symbol="7203", date=datetime.utcnow(), per=10.5, data_source="test"))
+    db.commit()
+
+    response = client.get("/api/fundamentals/7203")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    not_modified = client.get("/api/fundamentals/7203", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+    # 新しく取得したレコードは別のETagになる
+    db.add(StockFundamental(symbol="7203", date=datetime.utcnow(), per=11.0, data_source="test"))
+    db.commit()
+    response = client.get("/api/fundamentals/7203", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["per"] == 11.0
+
+
+def test_company_etag(client, db):
+    db.add(Stock(symbol="7203", name="トヨタ自動車"))
+    db.add(CompanyInfo(symbol="7203", long_name="Toyota Motor Corporation", data_source="test"))
+    db.commit()
+
+    response = client.get("/api/company/7203")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert client.get("/api/company/7203", headers={"If-None-Match": etag}).status_code == 304
+
+    company = db.query(CompanyInfo).filter(CompanyInfo.symbol == "7203").one()
+    company.industry = "Auto Manufacturers"
+    db.commit()
+    response = client.get("/api/company/7203", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from app.jobs.fundamentals_refresh import FundamentalsRefreshJob, load_universe
+from app.models import StockFundamental
+
+SYMBOLS = [f"{code}.T" for code in range(1000, 1010)]
+
+
+@pytest.fixture
+def infos(monkeypatch):
+    """get_ticker_info の代わり（銘柄ごとの info、例外なら送出する）"""
+    from app.data_fetcher import DataFetcher
+
+    infos = {symbol: {"marketCap": 1_000_000, "trailingPE": 12.0} for symbol in SYMBOLS}
+    def get_ticker_info(symbol, max_age=None):
+        value = infos.get(symbol, {})
+        if isinstance(value, Exception):
+            raise value
+        return dict(value)
+
+    monkeypatch.setattr(DataFetcher, "get_ticker_info", staticmethod(get_ticker_info))
+    monkeypatch.setattr(DataFetcher, "data_source", staticmethod(lambda: "test"))
+    return infos
+
+
+def make_job(tmp_path, symbols=SYMBOLS, **kwargs):
+    options = dict(workers=2, rate=1000, burst=1000, retries=1, backoff=0, batch_size=3,
+                   checkpoint_path=str(tmp_path / "checkpoint.json"))
+    options.update(kwargs)
+    return FundamentalsRefreshJob(symbols, **options)
+
+
+def test_saves_symbols_not_registered_in_stocks(db, infos, tmp_path):
+    assert not StockFundamental.__table__.foreign_keys
+
+    stats = make_job(tmp_path).run()
+
+    assert stats["saved"] == len(SYMBOLS) and stats["failed"] == 0
+    assert {row.symbol for row in db.query(StockFundamental)} == set(SYMBOLS)
+    # 全銘柄が終わるとチェックポイントは削除される
+    assert not (tmp_path / "checkpoint.json").exists()
+
+
+def test_failed_fetches_are_retried_and_kept_in_checkpoint(db, infos, tmp_path):
+    infos["1003.T"] = RuntimeError("rate limited")
+    infos["1004.T"] = {}
+
+    stats = make_job(tmp_path).run()
+
+    assert stats == {"saved": 8, "empty": 1, "failed": 1, "skipped": 0}
+    done = set(json.loads((tmp_path / "checkpoint.json").read_text())["done"])
+    assert done == set(SYMBOLS) - {"1003.T"}
+
+    # 次回は失敗した銘柄だけを処理する
+    infos["1003.T"] = {"marketCap": 1}
+    stats = make_job(tmp_path).run()
+    assert stats["skipped"] == len(SYMBOLS) - 1 and stats["saved"] == 1
+
+
+def test_failed_batch_is_skipped_not_reflushed(db, infos, tmp_path, monkeypatch):
+    from sqlalchemy.orm import Session
+
+    original = Session.bulk_insert_mappings
+    attempts = []
+
+    def bulk_insert_mappings(self, mapper, rows, *args, **kwargs):
+        attempts.append([row["symbol"] for row in rows])
+        if len(attempts) == 1:
+            raise RuntimeError("constraint violation")
+        return original(self, mapper, rows, *args, **kwargs)
+
+    monkeypatch.setattr(Session, "bulk_insert_mappings", bulk_insert_mappings)
+    stats = make_job(tmp_path, workers=1).run()
+
+    failed_batch = attempts[0]
+    assert stats["failed"] == len(failed_batch)
+    assert stats["saved"] == len(SYMBOLS) - len(failed_batch)
+    # 失敗したバッチは再び書き込まれず、チェックポイントにも記録されない
+    assert sum(batch == failed_batch for batch in attempts) == 1
+    done = set(json.loads((tmp_path / "checkpoint.json").read_text())["done"])
+    assert done == set(SYMBOLS) - set(failed_batch)
+    assert db.query(StockFundamental).count() == len(SYMBOLS) - len(failed_batch)
+
+
+def test_load_universe(tmp_path):
+    path = tmp_path / "stocks.csv"
+    path.write_text("code,name\n1301,極洋\n7203.T,トヨタ自動車\n,\n", encoding="utf-8")
+    assert load_universe(str(path)) == ["1301.T", "7203.T"]
@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+
+from app.bar_cache import BarSeries
+from app.indicators import IndicatorCalculator, parse_indicator_specs
+from conftest import make_frame
+
+SPECS = parse_indicator_specs("sma:25,ema:12,bb:20:2,rsi:14,macd:12:26:9")
+
+
+def assert_matches_calculator(values, bars, spec):
+    expected = IndicatorCalculator.calculate(bars, spec)
+    assert set(values) == set(expected)
+    for name, series in expected.items():
+        np.testing.assert_allclose(
+            values[name], series.to_numpy(dtype="float64"), rtol=1e-9, atol=1e-9, equal_nan=True
+        )
+
+
+@pytest.mark.parametrize("spec", SPECS, ids=lambda spec: spec.key)
+def test_rebuild_matches_calculator(indicator_engine, spec):
+    bars = BarSeries.from_frame(make_frame(300))
+    assert_matches_calculator(indicator_engine.series("X", "1d", spec, bars), bars, spec)
+
+
+@pytest.mark.parametrize("spec", SPECS, ids=lambda spec: spec.key)
+def test_appended_and_revised_bars_match_calculator(indicator_engine, spec):
+    df = make_frame(400)
+    indicator_engine.series("X", "1d", spec, BarSeries.from_frame(df.iloc[:300]))
+
+    # 足を1本ずつ追加し、そのたびに最後の足の終値も途中で更新する
+    for end in range(301, 340):
+        partial = df.iloc[:end].copy()
+        partial.loc[end - 1, "close"] *= 1.01
+        indicator_engine.series("X", "1d", spec, BarSeries.from_frame(partial))
+        bars = BarSeries.from_frame(df.iloc[:end])
+        assert_matches_calculator(indicator_engine.series("X", "1d", spec, bars), bars, spec)
+
+    assert indicator_engine.stats()["rebuilds"] == 1
+    assert indicator_engine.stats()["incremental"] > 0
+
+
+def test_returned_arrays_are_not_changed_by_later_updates(indicator_engine):
+    spec = SPECS[0]
+    df = make_frame(200)
+    first = indicator_engine.series("X", "1d", spec, BarSeries.from_frame(df))["value"]
+    snapshot = first.copy()
+
+    revised = df.copy()
+    revised.loc[len(df) - 1, "close"] += 50
+    indicator_engine.series("X", "1d", spec, BarSeries.from_frame(revised))
+
+    assert not first.flags.writeable
+    np.testing.assert_array_equal(first, snapshot)
+
+
+def test_changed_history_is_rebuilt(indicator_engine):
+    spec = SPECS[0]
+    df = make_frame(200)
+    indicator_engine.series("X", "1d", spec, BarSeries.from_frame(df))
+
+    # 分割の調整などで過去の足がすべて変わった場合
+    adjusted = df.copy()
+    adjusted[["open", "high", "low", "close"]] /= 2
+    bars = BarSeries.from_frame(adjusted)
+    assert_matches_calculator(indicator_engine.series("X", "1d", spec, bars), bars, spec)
+    assert indicator_engine.stats()["rebuilds"] == 2
+
+
+def test_update_matches_calculator(indicator_engine):
+    df = make_frame(300)
+    bars = BarSeries.from_frame(df)
+    for spec in SPECS:
+        indicator_engine.series("X", "1d", spec, bars)
+
+    # 最後の足の置き換えと、新しい日付の足の追加
+    live = df.copy()
+    live.loc[len(df) - 1, "close"] = 1234.5
+    updated = indicator_engine.update_symbol("X", bars.date[-1], 1234.5)
+    assert set(updated) == {spec.key for spec in SPECS}
+
+    expected_bars = BarSeries.from_frame(live)
+    for spec in SPECS:
+        for name, series in IndicatorCalculator.calculate(expected_bars, spec).items():
+            assert updated[spec.key][name] == pytest.approx(series.iloc[-1], rel=1e-9)
+
+    next_date = bars.date[-1] + np.timedelta64(1, "D")
+    assert indicator_engine.update("X", "1d", SPECS[0], next_date, 1300.0) is not None
+    assert indicator_engine.update("X", "1d", SPECS[0], bars.date[0], 1300.0) is None
+    assert indicator_engine.update_symbol("Y", next_date, 1300.0) == {}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False], ids=["orjson", "json"])
+def test_save_and_load_continue_incrementally(indicator_engine, tmp_path, monkeypatch, use_orjson):
+    from app import responses
+
+    if not use_orjson:
+        # orjsonがない環境（json モジュールで保存・読み込み）
+        monkeypatch.setattr(responses, "orjson", None)
+    df = make_frame(300)
+    for spec in SPECS:
+        indicator_engine.series("X", "1d", spec, BarSeries.from_frame(df.iloc[:280]))
+
+    path = str(tmp_path / "state.json")
+    assert indicator_engine.save(path) == len(SPECS)
+    # NaNは標準のJSONで扱えるnullで保存する
+    assert b"NaN" not in (tmp_path / "state.json").read_bytes()
+    indicator_engine._entries.clear()
+    indicator_engine.stats_counts["rebuilds"] = 0
+    assert indicator_engine.load(path) == len(SPECS)
+
+    bars = BarSeries.from_frame(df)
+    for spec in SPECS:
+        assert_matches_calculator(indicator_engine.series("X", "1d", spec, bars), bars, spec)
+    assert indicator_engine.stats()["rebuilds"] == 0
+
+
+def test_load_ignores_broken_file(indicator_engine, tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text("{broken")
+    assert indicator_engine.load(str(path)) == 0
+    assert indicator_engine.load(str(tmp_path / "missing.json")) == 0
@@ -0,0 +1,80 @@
+import pytest
+
+from app import data_fetcher
+from app.data_fetcher import DataFetcher
+from app.models import CompanyInfo, StockFundamental
+from app.services.info_service import InfoService
+from app.symbols import to_yahoo_symbol
+
+VALID_INFO = {"longName": "Toyota Motor Corporation", "marketCap": 40_000_000_000_000, "trailingPE": 10.5}
+
+
+class FakeProvider:
+    name = "fake"
+
+    def __init__(self, infos):
+        self.infos = infos
+        self.calls = []
+
+    def info(self, symbol):
+        self.calls.append(symbol)
+        return dict(self.infos.get(symbol, {}))
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    fake = FakeProvider({"7203.T": VALID_INFO, "^N225": {"regularMarketPrice": 38000.0}})
+    monkeypatch.setattr(data_fetcher, "get_provider", lambda: fake)
+    data_fetcher._info_cache.clear()
+    yield fake
+    data_fetcher._info_cache.clear()
+
+
+def test_to_yahoo_symbol():
+    assert to_yahoo_symbol("7203") == "7203.T"
+    assert to_yahoo_symbol("7203.T") == "7203.T"
+    assert to_yahoo_symbol("^N225") == "^N225"
+    assert to_yahoo_symbol("USDJPY=X") == "USDJPY=X"
+
+
+def test_refresh_saves_company_and_fundamental_from_one_fetch(db, provider):
+    company, fundamental = InfoService.refresh(db, "7203", "7203.T")
+
+    assert company.symbol == "7203" and company.long_name == "Toyota Motor Corporation"
+    assert fundamental.symbol == "7203" and float(fundamental.per) == 10.5
+    assert provider.calls == ["7203.T"]
+
+    # 2回目はキャッシュ済みの ticker.info を使う
+    InfoService.refresh(db, "7203", "7203.T")
+    assert provider.calls == ["7203.T"]
+    InfoService.refresh(db, "7203", "7203.T", force=True)
+    assert provider.calls == ["7203.T", "7203.T"]
+
+
+def test_refresh_skips_persistence_for_invalid_info(db, provider):
+    assert InfoService.refresh(db, "^N225", "^N225") == (None, None)
+    assert InfoService.refresh(db, "0000", "0000.T") == (None, None)
+    assert db.query(CompanyInfo).count() == 0
+    assert db.query(StockFundamental).count() == 0
+
+
+def test_info_cache_is_bounded(provider, monkeypatch):
+    monkeypatch.setattr(data_fetcher, "INFO_CACHE_SIZE", 3)
+    provider.infos = {f"{code}.T": VALID_INFO for code in range(1000, 1010)}
+    for symbol in provider.infos:
+        DataFetcher.get_ticker_info(symbol)
+
+    assert list(data_fetcher._info_cache) == ["1007.T", "1008.T", "1009.T"]
+
+
+def test_info_cache_drops_expired_entries(provider, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(data_fetcher.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(data_fetcher, "INFO_CACHE_TTL", 60)
+
+    DataFetcher.get_ticker_info("7203.T")
+    now[0] += 61
+    provider.infos["6758.T"] = VALID_INFO
+    DataFetcher.get_ticker_info("6758.T")
+
+    assert list(data_fetcher._info_cache) == ["6758.T"]
@@ -0,0 +1,54 @@
+from datetime import date, datetime
+
+import pytest
+
+from app.market_hours import (
+    JST, is_session_open, is_trading_day, is_tse_symbol, last_close, market_phase, next_close, next_open
+)
+
+
+def jst(*args) -> datetime:
+    return datetime(*args, tzinfo=JST)
+
+
+@pytest.mark.parametrize("now, phase", [
+    (jst(2024, 5, 15, 8, 59), "pre_open"),
+    (jst(2024, 5, 15, 9, 0), "morning"),
+    (jst(2024, 5, 15, 11, 30), "lunch"),
+    (jst(2024, 5, 15, 12, 30), "afternoon"),
+    (jst(2024, 5, 15, 15, 30), "closed"),
+    (jst(2024, 5, 18, 10, 0), "closed"),  # 土曜日
+    (jst(2024, 1, 2, 10, 0), "closed"),  # 年始の休場
+])
+def test_market_phase(now, phase):
+    assert market_phase(now) == phase
+    assert is_session_open(now) == (phase in ("morning", "afternoon"))
+
+
+def test_trading_days():
+    assert is_trading_day(date(2024, 5, 15))
+    assert not is_trading_day(date(2024, 5, 19))
+    assert not is_trading_day(date(2024, 12, 31))
+    assert not is_trading_day(date(2025, 1, 3))
+
+
+def test_open_and_close_times():
+    friday_evening = jst(2024, 5, 17, 16, 0)
+    assert next_open(friday_evening) == jst(2024, 5, 20, 9, 0)
+    assert last_close(friday_evening) == jst(2024, 5, 17, 15, 30)
+    assert next_close(friday_evening) == jst(2024, 5, 20, 15, 30)
+
+    lunch = jst(2024, 5, 15, 12, 0)
+    assert next_open(lunch) == jst(2024, 5, 15, 12, 30)
+    assert last_close(lunch) == jst(2024, 5, 14, 15, 30)
+    assert next_close(lunch) == jst(2024, 5, 15, 15, 30)
+
+    # UTCで渡しても東証の時刻で判定する
+    assert market_phase(datetime.fromisoformat("2024-05-15T01:00:00+00:00")) == "morning"
+
+
+def test_is_tse_symbol():
+    assert is_tse_symbol("7203.T")
+    assert is_tse_symbol("^N225")
+    assert not is_tse_symbol("USDJPY=X")
+    assert not is_tse_symbol("^GSPC")
@@ -0,0 +1,153 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from app.bar_cache import BarCache
+from app.models import Stock, StockPrice, StockPriceSync
+from app.price_store import HISTORY_EPOCH, PriceStore, period_start
+from conftest import make_frame
+
+
+class FakeUpstream:
+    """DataFetcher.fetch_stock_data の代わりに、用意した全期間の日足の一部を返す"""
+
+    def __init__(self, df: pd.DataFrame, visible: int):
+        self.df = df
+        self.visible = visible
+        self.calls = []
+
+    def fetch(self, symbol, period="1y", interval="1d", start=None):
+        self.calls.append({"period": period, "start": start})
+        df = self.df.iloc[:self.visible]
+        if start is not None:
+            df = df[df["date"] >= pd.Timestamp(start)]
+        elif period != "max":
+            df = df[df["date"] >= pd.Timestamp(period_start(period))]
+        return df.reset_index(drop=True).copy()
+
+
+@pytest.fixture
+def upstream(monkeypatch, bar_cache_dir):
+    from app import price_store
+    from app.data_fetcher import DataFetcher
+
+    today = datetime.utcnow()
+    df = make_frame(3000, start=(today - timedelta(days=3000 * 7 // 5 + 10)).strftime("%Y-%m-%d"))
+    fake = FakeUpstream(df, visible=2990)
+    monkeypatch.setattr(DataFetcher, "fetch_stock_data", staticmethod(fake.fetch))
+    # 問い合わせ間隔に関係なく毎回同期する
+    monkeypatch.setattr(price_store, "PRICE_SYNC_INTERVAL", 0)
+    return fake
+
+
+def stored(db, symbol="7203.T") -> pd.DataFrame:
+    return PriceStore.load(db, symbol)
+
+
+def test_backfill_and_coverage(db, upstream):
+    start = period_start("2y")
+    delta = PriceStore.sync(db, "7203.T", start=start)
+
+    expected = upstream.fetch("7203.T", start=start)
+    assert len(delta) == len(expected)
+    pd.testing.assert_series_equal(stored(db)["close"], expected["close"], check_names=False)
+    assert db.get(StockPriceSync, "7203.T").covered_from == start
+
+    # 範囲内の再同期は1本前の足からの差分だけを取得
+    assert len(PriceStore.sync(db, "7203.T", start=start)) == 2
+    assert upstream.calls[-1]["start"] == stored(db)["date"].iloc[-2]
+
+
+def test_sync_interval_skips_upstream(db, upstream, monkeypatch):
+    from app import price_store
+
+    PriceStore.sync(db, "7203.T", period="1y")
+    monkeypatch.setattr(price_store, "PRICE_SYNC_INTERVAL", 300)
+    calls = len(upstream.calls)
+    assert PriceStore.sync(db, "7203.T", period="1y") is None
+    assert len(upstream.calls) == calls
+
+
+def test_incremental_sync_replaces_last_bar_and_appends(db, upstream):
+    PriceStore.sync(db, "7203.T", period="1y")
+
+    # 最終足が確定値に変わり、新しい足が3本増えた
+    upstream.df.loc[upstream.visible - 1, "close"] += 5.0
+    upstream.visible += 3
+    delta = PriceStore.sync(db, "7203.T", period="1y")
+
+    assert len(delta) == 5
+    expected = upstream.fetch("7203.T", start=period_start("1y"))
+    pd.testing.assert_series_equal(stored(db)["close"], expected["close"], check_names=False)
+
+
+def test_earlier_start_backfills(db, upstream):
+    PriceStore.sync(db, "7203.T", period="1y")
+    PriceStore.sync(db, "7203.T", period="max")
+
+    assert len(stored(db)) == upstream.visible
+    assert db.get(StockPriceSync, "7203.T").covered_from == HISTORY_EPOCH
+    assert upstream.calls[-1]["period"] == "max"
+
+
+def test_adjustment_change_rebackfills_history(db, upstream):
+    PriceStore.sync(db, "7203.T", period="2y")
+
+    # 株式分割で過去の足がすべて半値に調整された
+    upstream.df[["open", "high", "low", "close"]] /= 2
+    upstream.visible += 1
+    PriceStore.sync(db, "7203.T", period="2y")
+
+    expected = upstream.fetch("7203.T", start=period_start("2y"))
+    result = stored(db)
+    assert len(result) == len(expected)
+    pd.testing.assert_series_equal(result["close"], expected["close"], check_names=False)
+
+
+def test_full_precision_is_kept(db, upstream):
+    upstream.df["close"] = 150.123456789
+    PriceStore.sync(db, "USDJPY=X", period="1mo")
+    assert stored(db, "USDJPY=X")["close"].iloc[-1] == 150.123456789
+
+
+def test_backfill_after_delete_does_not_reuse_old_coverage(db, upstream):
+    assert len(PriceStore.get_history(db, "7203.T", HISTORY_EPOCH)) == upstream.visible
+
+    PriceStore.delete(db, "7203.T")
+    db.commit()
+    assert db.get(StockPriceSync, "7203.T") is None
+    assert BarCache.read("7203.T", "1d") is None
+
+    PriceStore.get_history(db, "7203.T", period_start("2y"))
+    assert len(PriceStore.get_history(db, "7203.T", HISTORY_EPOCH)) == upstream.visible
+
+
+def test_wiped_prices_with_stale_sync_state_backfill_full_range(db, upstream):
+    PriceStore.sync(db, "7203.T", period="max")
+    # 同期状態だけが残った場合（以前のバージョンの銘柄削除など）
+    db.query(StockPrice).delete()
+    db.commit()
+
+    PriceStore.sync(db, "7203.T", period="2y")
+    assert db.get(StockPriceSync, "7203.T").covered_from == period_start("2y")
+    PriceStore.sync(db, "7203.T", period="max")
+    assert len(stored(db)) == upstream.visible
+
+
+def test_delete_stock_removes_sync_state_and_bar_cache(db, upstream):
+    from app.routers.stock import delete_stock
+
+    stock = Stock(symbol="7203.T", name="トヨタ自動車")
+    db.add(stock)
+    db.commit()
+    PriceStore.get_history(db, "7203.T", period_start("1y"))
+    assert os.path.exists(BarCache.path("7203.T", "1d"))
+
+    asyncio.run(delete_stock(stock.id, db))
+
+    assert db.query(StockPrice).count() == 0
+    assert db.get(StockPriceSync, "7203.T") is None
+    assert not os.path.exists(BarCache.path("7203.T", "1d"))
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.market_hours import JST
+from app.quote_cache import QUOTE_CLOSE_GRACE, QUOTE_TTL_OPEN, QuoteCache
+
+
+def jst(*args) -> datetime:
+    return datetime(*args, tzinfo=JST)
+
+
+@pytest.fixture(autouse=True)
+def empty_quote_cache():
+    QuoteCache._entries.clear()
+    yield
+    QuoteCache._entries.clear()
+
+
+@pytest.mark.parametrize("now, expires", [
+    # 立会中は短い有効期間
+    (jst(2024, 5, 15, 10, 0), jst(2024, 5, 15, 10, 0) + timedelta(seconds=QUOTE_TTL_OPEN)),
+    # 昼休みは後場の開始まで（前引け直後を除く）
+    (jst(2024, 5, 15, 12, 0), jst(2024, 5, 15, 12, 30)),
+    # 大引け後は次の寄り付きまで（金曜なら月曜）
+    (jst(2024, 5, 17, 18, 0), jst(2024, 5, 20, 9, 0)),
+    # 寄り付き前はその日の寄り付きまで
+    (jst(2024, 5, 15, 7, 0), jst(2024, 5, 15, 9, 0)),
+])
+def test_expires_at_follows_tse_session(now, expires):
+    assert QuoteCache.expires_at("7203.T", now) == expires
+
+
+def test_close_grace_keeps_short_ttl():
+    just_closed = jst(2024, 5, 15, 15, 30) + timedelta(seconds=QUOTE_CLOSE_GRACE - 60)
+    assert QuoteCache.expires_at("7203.T", just_closed) == just_closed + timedelta(seconds=QUOTE_TTL_OPEN)
+
+    after_grace = jst(2024, 5, 15, 15, 30) + timedelta(seconds=QUOTE_CLOSE_GRACE + 60)
+    assert QuoteCache.expires_at("7203.T", after_grace) == jst(2024, 5, 16, 9, 0)
+
+
+def test_non_tse_symbols_always_use_short_ttl():
+    now = jst(2024, 5, 18, 10, 0)
+    assert QuoteCache.expires_at("USDJPY=X", now) == now + timedelta(seconds=QUOTE_TTL_OPEN)
+
+
+def test_get_returns_copy_until_expiry():
+    now = jst(2024, 5, 15, 18, 0)
+    QuoteCache.put("7203.T", {"current_price": 100.0}, now)
+
+    quote = QuoteCache.get("7203.T", now + timedelta(hours=1))
+    assert quote == {"current_price": 100.0}
+    quote["current_price"] = 0
+    assert QuoteCache.get("7203.T", now)["current_price"] == 100.0
+    assert QuoteCache.get("7203.T", jst(2024, 5, 16, 9, 0)) is None
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from app import quote_stream
+from app.data_fetcher import DataFetcher
+from app.quote_stream import QuotePoller, QuoteSubscriber
+
+
+class Quotes:
+    """DataFetcher.get_realtime_quote の代わりに、銘柄ごとに設定した現在値を返す"""
+
+    def __init__(self):
+        self.prices = {}
+        self.calls = []
+
+    def __call__(self, symbol):
+        self.calls.append(symbol)
+        price = self.prices.get(symbol)
+        if price is None:
+            return None
+        return {"current_price": price, "previous_close": 100.0, "market_time": None}
+
+
+@pytest.fixture
+def quotes(monkeypatch, indicator_engine):
+    quotes = Quotes()
+    monkeypatch.setattr(DataFetcher, "get_realtime_quote", staticmethod(quotes))
+    return quotes
+
+
+def test_poller_pushes_only_changed_quotes(quotes):
+    async def run():
+        poller = QuotePoller(interval=3600)
+        first, second = QuoteSubscriber(), QuoteSubscriber()
+        poller.subscribe(first, ["7203", "6758"])
+        poller.subscribe(second, ["7203"])
+        await poller.stop()
+
+        quotes.prices = {"7203.T": 101.0, "6758.T": 50.0}
+        await poller.poll_once()
+        assert set(await first.next()) == {"7203", "6758"}
+        assert set(await second.next()) == {"7203"}
+
+        # 変化のない銘柄は配信しない
+        quotes.prices["6758.T"] = 51.0
+        await poller.poll_once()
+        assert set(await first.next()) == {"6758"}
+        assert not second._event.is_set()
+
+        # 銘柄ごとに1回だけ取得し、取得済みの最新値は購読直後に配信する
+        assert quotes.calls.count("7203.T") == 2
+        third = QuoteSubscriber()
+        poller.subscribe(third, ["7203"])
+        await poller.stop()
+        assert (await third.next())["7203"]["current_price"] == 101.0
+
+        poller.unsubscribe(first)
+        poller.unsubscribe(second)
+        poller.unsubscribe(third)
+        assert poller.stats()["symbols"] == 0
+
+    asyncio.run(run())
+
+
+def test_subscribe_limit(monkeypatch, quotes):
+    monkeypatch.setattr(quote_stream, "STREAM_MAX_SYMBOLS", 3)
+
+    async def run():
+        poller = QuotePoller(interval=3600)
+        subscriber = QuoteSubscriber()
+        poller.subscribe(subscriber, ["1", "2"])
+        # 上限を超える場合は何も登録しない
+        with pytest.raises(ValueError):
+            poller.subscribe(subscriber, ["3", "4"])
+        assert subscriber.symbols == {"1", "2"}
+        # 購読済みの銘柄は数えない
+        poller.subscribe(subscriber, ["1", "2", "3"])
+        assert subscriber.symbols == {"1", "2", "3"}
+        await poller.stop()
+
+    asyncio.run(run())
+
+
+def test_stream_endpoint(client, quotes, monkeypatch):
+    monkeypatch.setattr(quote_stream, "STREAM_MAX_SYMBOLS", 2)
+    quotes.prices = {"7203.T": 101.0}
+
+    with client.websocket_connect("/api/stream/quotes?symbols=7203") as websocket:
+        message = websocket.receive_json()
+        assert message["type"] == "quotes"
+        assert message["quotes"]["7203"]["current_price"] == 101.0
+
+        # 解釈できないメッセージ・上限を超える購読は接続を切らずにエラーを返す
+        websocket.send_text("not json")
+        assert websocket.receive_json() == {"type": "error", "detail": "Invalid message"}
+        websocket.send_json({"action": "subscribe", "symbols": "6758"})
+        assert websocket.receive_json()["type"] == "error"
+        websocket.send_json({"action": "subscribe", "symbols": ["6758", "9984"]})
+        assert websocket.receive_json() == {"type": "error", "detail": "Too many symbols (max 2)"}
+
+    assert quote_stream.poller.stats()["symbols"] == 0
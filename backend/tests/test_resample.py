@@ -0,0 +1,41 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from app.bar_cache import BarSeries
+from app.resample import bucket_start, resample_bars
+from conftest import make_frame
+
+
+def test_bucket_start():
+    wednesday = datetime(2024, 5, 15, 13, 30)
+    assert bucket_start(wednesday, "1d") == datetime(2024, 5, 15)
+    assert bucket_start(wednesday, "1wk") == datetime(2024, 5, 13)
+    assert bucket_start(wednesday, "1mo") == datetime(2024, 5, 1)
+
+
+@pytest.mark.parametrize("timeframe, rule", [("1wk", "W-SUN"), ("1mo", "MS")])
+def test_matches_pandas_resample(timeframe, rule):
+    df = make_frame(300)
+    # 祝日などで抜けた日を含める
+    df = df.drop(index=[3, 4, 50, 120]).reset_index(drop=True)
+    bars = resample_bars(BarSeries.from_frame(df), timeframe)
+
+    grouped = df.set_index("date").resample(rule)
+    expected = grouped.agg({
+        "open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"
+    }).dropna()
+    first_dates = grouped["close"].apply(lambda s: s.index[0] if len(s) else None).dropna()
+
+    np.testing.assert_array_equal(bars.date, first_dates.to_numpy(dtype="datetime64[ns]"))
+    for name in ("open", "high", "low", "close", "volume"):
+        np.testing.assert_allclose(getattr(bars, name), expected[name].to_numpy())
+
+
+def test_daily_and_empty_bars_are_returned_as_is():
+    bars = BarSeries.from_frame(make_frame(10))
+    assert resample_bars(bars, "1d") is bars
+    assert resample_bars(bars._slice(0, 0), "1wk").empty
+    with pytest.raises(ValueError):
+        resample_bars(bars, "1h")
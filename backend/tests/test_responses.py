@@ -0,0 +1,44 @@
+import gzip
+
+import pytest
+
+from app import responses
+from app.responses import _accepts, _encode_series, decode_json, encode_json
+
+
+@pytest.mark.parametrize("header, token, expected", [
+    ("gzip, deflate, br", "gzip", True),
+    ("deflate;q=1.0, GZIP;q=0.5", "gzip", True),
+    ("gzip;q=0", "gzip", False),
+    ("gzip; q=0.0, br", "gzip", False),
+    ("x-gzip", "gzip", False),
+    ("", "gzip", False),
+])
+def test_accepts(header, token, expected):
+    assert _accepts(header, token) is expected
+
+
+def test_encode_series_compresses_large_bodies(monkeypatch):
+    monkeypatch.setattr(responses, "RESPONSE_COMPRESS_MIN_SIZE", 1024)
+    content = {"time": [f"2024-01-{i % 28 + 1:02d}" for i in range(500)], "close": [1.5] * 500}
+
+    body, encoding = _encode_series(content, False, "gzip")
+    assert encoding == "gzip"
+    assert decode_json(gzip.decompress(body)) == content
+
+    # エンコード済みのJSON本文はそのまま使う
+    encoded = encode_json(content)
+    assert _encode_series(encoded, False, None) == (encoded, None)
+
+    # 小さい本文は圧縮しない
+    small = encode_json({"close": [1.5]})
+    assert _encode_series(small, False, "gzip") == (small, None)
+
+
+def test_encode_series_msgpack():
+    msgpack = pytest.importorskip("msgpack")
+    content = {"time": ["2024-01-04"], "close": [1.5]}
+
+    body, encoding = _encode_series(encode_json(content), True, None)
+    assert encoding is None
+    assert msgpack.unpackb(body) == content
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from app.bar_cache import BarCache
+from app.sparkline import SPARKLINE_POINTS, SPARKLINE_WINDOW, SparklineStore, make_sparkline
+from conftest import make_frame
+
+
+@pytest.fixture
+def sparklines(bar_cache_dir):
+    """SparklineStore をテストごとに空にする"""
+    def clear():
+        SparklineStore._rows.clear()
+        SparklineStore._values = np.empty((0, SPARKLINE_POINTS), dtype='float32')
+        SparklineStore._lengths = np.empty(0, dtype='int16')
+
+    clear()
+    yield SparklineStore
+    clear()
+
+
+def test_make_sparkline_uses_recent_closes():
+    closes = np.arange(200, dtype='float64')
+    sparkline = make_sparkline(closes)
+
+    assert len(sparkline) == SPARKLINE_POINTS
+    assert sparkline[0] == 200 - SPARKLINE_WINDOW and sparkline[-1] == 199
+
+    # 欠損は除き、点数が少なければ間引かない
+    assert make_sparkline(np.array([1.0, np.nan, 2.555, 3.0])) == [1.0, 2.56, 3.0]
+
+
+def test_store_update_and_grow(sparklines):
+    for i in range(100):
+        sparklines.update(f"{1000 + i}.T", np.full(10, float(i)))
+    sparklines.update("1000.T", np.arange(5, dtype='float64'))
+
+    result = sparklines.get_many(["1000.T", "1099.T", "9999.T"])
+    assert result["1000.T"] == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert result["1099.T"] == [99.0] * 10
+    assert result["9999.T"] is None
+    assert sparklines.stats()["symbols"] == 100
+
+
+def test_store_builds_from_bar_cache(sparklines):
+    df = make_frame(120)
+    BarCache.write("7203.T", "1d", df)
+
+    assert sparklines.get("7203.T") == pytest.approx(
+        make_sparkline(df["close"].to_numpy()), abs=0.01
+    )
+
+
+def test_watchlist_embeds_sparklines(client, sparklines):
+    # 起動時に登録されるサンプルのウォッチリストを使う
+    sparklines.update("7203.T", np.arange(10, dtype='float64'))
+
+    stocks = [stock for watchlist in client.get("/api/watchlists/").json() for stock in watchlist["stocks"]]
+    assert {stock["symbol"] for stock in stocks} >= {"7203.T", "6758.T"}
+    for stock in stocks:
+        expected = [float(i) for i in range(10)] if stock["symbol"] == "7203.T" else None
+        assert stock["sparkline"] == expected
@@ -0,0 +1,104 @@
+from datetime import timedelta
+
+import pytest
+
+from app.bar_cache import BarCache
+from app.cache import memory_cache
+from app.data_fetcher import DataFetcher
+from app.quote_cache import QuoteCache
+from app.services.summary_service import SummaryService
+from app.sparkline import SPARKLINE_POINTS
+from conftest import make_frame
+
+
+@pytest.fixture
+def caches(bar_cache_dir):
+    def clear():
+        memory_cache._entries.clear()
+        memory_cache.bytes = 0
+        QuoteCache._entries.clear()
+
+    clear()
+    yield
+    clear()
+
+
+class Panel:
+    """DataFetcher.fetch_ohlc_panel の代わりに、用意した日足を返す"""
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.calls = []
+
+    def __call__(self, symbols, period="3mo", interval="1d"):
+        self.calls.append(list(symbols))
+        return {s: self.frames[s].copy() for s in symbols if s in self.frames}
+
+
+@pytest.fixture
+def panel(monkeypatch):
+    panel = Panel({"7203.T": make_frame(80, price=2000.0), "6758.T": make_frame(80, seed=1)})
+    monkeypatch.setattr(DataFetcher, "fetch_ohlc_panel", staticmethod(panel))
+    return panel
+
+
+def test_missing_symbols_fetched_in_one_download(caches, panel):
+    summaries = SummaryService.get_many(["7203", "6758", "9999", "7203"])
+
+    assert panel.calls == [["7203.T", "6758.T", "9999.T"]]
+    assert list(summaries) == ["7203", "6758", "9999"]
+    assert summaries["9999"] is None
+
+    df = panel.frames["7203.T"]
+    summary = summaries["7203"]
+    assert summary["date"] == str(df["date"].iloc[-1].date())
+    assert summary["price"] == round(df["close"].iloc[-1], 2)
+    assert summary["previous_close"] == round(df["close"].iloc[-2], 2)
+    assert summary["change"] == pytest.approx(summary["price"] - summary["previous_close"], abs=0.011)
+    assert len(summary["sparkline"]) == SPARKLINE_POINTS
+
+    # 2回目はレスポンスキャッシュから返す（取得できなかった銘柄だけ再取得）
+    assert SummaryService.get_many(["7203", "6758", "9999"]) == summaries
+    assert panel.calls[1:] == [["9999.T"]]
+
+
+def test_summary_from_quote_cache_and_local_bars(caches, panel):
+    df = make_frame(80, start="2024-01-01", price=2000.0)
+    BarCache.write("7203.T", "1d", df)
+    latest = df["date"].iloc[-1]
+    QuoteCache.put("7203.T", {
+        "current_price": 2100.0,
+        "previous_close": 2050.0,
+        "market_time": latest.isoformat(),
+    })
+
+    summary = SummaryService.get_many(["7203"])["7203"]
+    assert panel.calls == []
+    assert summary["price"] == 2100.0
+    assert summary["change"] == 50.0
+    assert summary["change_percent"] == round(50 / 2050 * 100, 2)
+    assert summary["day_high"] >= 2100.0
+    # 最新の足は株価キャッシュの現在値に合わせる
+    assert summary["sparkline"][-1] == 2100.0
+
+
+def test_stale_local_bars_are_refetched(caches, panel):
+    df = make_frame(80, start="2024-01-01")
+    BarCache.write("7203.T", "1d", df)
+    newer = df["date"].iloc[-1] + timedelta(days=3)
+    QuoteCache.put("7203.T", {
+        "current_price": 1000.0, "previous_close": 990.0, "market_time": newer.isoformat()
+    })
+
+    SummaryService.get_many(["7203"])
+    assert panel.calls == [["7203.T"]]
+
+
+def test_summary_endpoint(client, caches, panel):
+    response = client.get("/api/quotes/summary", params={"symbols": "7203, 6758"})
+    assert response.status_code == 200
+    assert set(response.json()["summaries"]) == {"7203", "6758"}
+
+    assert client.get("/api/quotes/summary", params={"symbols": " , "}).status_code == 400
+    too_many = ",".join(str(1000 + i) for i in range(201))
+    assert client.get("/api/quotes/summary", params={"symbols": too_many}).status_code == 400
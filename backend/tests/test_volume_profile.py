@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.indicators import IndicatorCalculator
+from conftest import make_frame
+
+
+def brute_force_profile(df: pd.DataFrame, bins: int) -> np.ndarray:
+    """各足の出来高を、安値〜高値と各価格帯の重なった幅に比例して配分"""
+    price_min, price_max = df["low"].min(), df["high"].max()
+    edges = price_min + np.arange(bins + 1) * (price_max - price_min) / bins
+    volumes = np.zeros(bins)
+    for low, high, close, volume in df[["low", "high", "close", "volume"]].itertuples(index=False):
+        if high > low:
+            overlap = np.clip(np.minimum(edges[1:], high) - np.maximum(edges[:-1], low), 0, None)
+            volumes += volume * overlap / (high - low)
+        else:
+            index = min(int((close - price_min) / (edges[1] - edges[0])), bins - 1)
+            volumes[index] += volume
+    return volumes
+
+
+@pytest.mark.parametrize("bins", [10, 50, 100])
+def test_matches_brute_force(bins):
+    df = make_frame(500, seed=bins)
+    result = IndicatorCalculator.calculate_volume_profile(df, bins)
+
+    assert len(result["prices"]) == bins
+    np.testing.assert_allclose(result["volumes"], brute_force_profile(df, bins), atol=0.5)
+    assert sum(result["volumes"]) == pytest.approx(df["volume"].sum(), abs=bins)
+
+
+def test_bars_without_range_go_to_the_close_bin():
+    df = make_frame(200, seed=3)
+    flat = df.index % 5 == 0
+    df.loc[flat, ["open", "high", "low"]] = df.loc[flat, "close"]
+    result = IndicatorCalculator.calculate_volume_profile(df, 40)
+    np.testing.assert_allclose(result["volumes"], brute_force_profile(df, 40), atol=0.5)
+
+
+def test_high_price_narrow_range_keeps_precision():
+    # 株価が大きく値幅が小さい足は 傾き×価格 が巨大になり桁落ちしやすい
+    rng = np.random.default_rng(1)
+    n = 300
+    low = 1e5 + rng.uniform(0, 0.5, n)
+    high = low + rng.uniform(0.001, 0.01, n)
+    df = pd.DataFrame({"low": low, "high": high, "close": low, "volume": rng.uniform(5e8, 1e9, n)})
+
+    result = IndicatorCalculator.calculate_volume_profile(df, 50)
+    np.testing.assert_allclose(result["volumes"], brute_force_profile(df, 50), atol=0.5)
+
+
+def test_single_price_and_empty_input():
+    df = pd.DataFrame({"low": [100.0] * 3, "high": [100.0] * 3, "close": [100.0] * 3, "volume": [1.0, 2.0, 3.0]})
+    result = IndicatorCalculator.calculate_volume_profile(df, 10)
+    assert result["volumes"][0] == 6 and sum(result["volumes"]) == 6
+
+    empty = df.iloc[:0]
+    assert IndicatorCalculator.calculate_volume_profile(empty, 10) == {"prices": [], "volumes": []}
+
+
+def test_value_area_contains_ratio_of_volume():
+    df = make_frame(500, seed=7)
+    result = IndicatorCalculator.calculate_volume_profile(df, 50, value_area=0.7)
+    prices = np.array(result["prices"])
+    volumes = np.array(result["volumes"])
+
+    inside = (prices >= result["value_area_low"]) & (prices < result["value_area_high"])
+    assert volumes[inside].sum() >= 0.7 * volumes.sum()
+    poc_bin = int(np.argmax(volumes))
+    assert prices[poc_bin] < result["poc"] < prices[poc_bin] + (prices[1] - prices[0])